@@ -0,0 +1,11 @@
+"""
+Benchmark
+=========
+
+Headless harness to measure the add-on outside of Blender.
+
+The add-on is imported against stand-in ``bpy``, ``gpu``, ``bgl``,
+``blf`` and ``mathutils`` modules (see :mod:`benchmark.stubs`),
+so the figures are only meaningful relative to each other:
+they measure the add-on own Python, not Blender drawing.
+"""
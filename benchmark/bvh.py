@@ -0,0 +1,95 @@
+"""
+Hierarchy Benchmark
+===================
+
+Cost of the frustum queries of the bounds hierarchy against testing
+every object, for random scenes of growing size and a fixed view.
+Both must find the same objects.
+
+Usage (from the repository root)::
+
+    $ python -m benchmark.bvh --objects 1000 10000 100000
+"""
+
+import argparse
+import time
+
+from . import stubs
+
+stubs.install()
+
+import numpy
+
+from space_view3d_virtual_reality.bvh import BoundsHierarchy
+from space_view3d_virtual_reality.culling import frustumPlanes
+
+
+PROJECTION = ((1.5, 0.0, 0.0, 0.0),
+              (0.0, 1.5, 0.0, 0.0),
+              (0.0, 0.0, -1.002, -0.2),
+              (0.0, 0.0, -1.0, 0.0))
+
+MODELVIEW = ((1.0, 0.0, 0.0, 0.0),
+             (0.0, 1.0, 0.0, 0.0),
+             (0.0, 0.0, 1.0, -20.0),
+             (0.0, 0.0, 0.0, 1.0))
+
+
+def _timeit(function, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the frustum queries of the bounds hierarchy")
+    parser.add_argument("--objects", type=int, nargs="+", default=[1000, 10000, 100000], help="scene sizes")
+    parser.add_argument("--repeat", type=int, default=50, help="queries per measure")
+    parser.add_argument("--size", type=float, default=200.0, help="size of the scene")
+    args = parser.parse_args(argv)
+
+    planes = frustumPlanes(PROJECTION, MODELVIEW)
+    normals = planes[:, :3]
+    random = numpy.random.RandomState(0)
+
+    print("{0:>8} {1:>8} {2:>10} {3:>10} {4:>10} {5:>10}".format(
+          "objects", "visible", "build ms", "refit ms", "query ms", "flat ms"))
+
+    for object_count in args.objects:
+        centers = random.uniform(-args.size * 0.5, args.size * 0.5, (object_count, 3)).astype(numpy.float32)
+        extents = random.uniform(0.1, 2.0, (object_count, 3)).astype(numpy.float32)
+        lower = centers - extents
+        upper = centers + extents
+
+        tree = BoundsHierarchy()
+        build_ms = _timeit(lambda: tree.build(lower, upper), 1)
+
+        # a few objects moving, as when animating or modelling
+        moved = random.choice(object_count, max(1, object_count // 100), replace=False)
+        refit_ms = _timeit(lambda: tree.refit(moved, lower[moved], upper[moved]), args.repeat)
+
+        # the same rounding as the hierarchy
+        flat_centers = (lower + upper) * 0.5
+        flat_extents = (upper - lower) * 0.5
+
+        def flat():
+            distance = flat_centers.dot(normals.T) + flat_extents.dot(numpy.abs(normals).T) + planes[:, 3]
+            return numpy.flatnonzero(distance.min(axis=1) >= 0.0)
+
+        found = numpy.sort(tree.frustum(planes))
+        assert numpy.array_equal(found, flat()), "the hierarchy and testing every object disagree"
+        visible = len(found)
+
+        print("{0:>8} {1:>8} {2:>10.3f} {3:>10.4f} {4:>10.4f} {5:>10.4f}".format(
+              object_count,
+              visible,
+              build_ms,
+              refit_ms,
+              _timeit(lambda: tree.frustum(planes), args.repeat),
+              _timeit(flat, args.repeat),
+              ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Culling Benchmark
+=================
+
+Cost of the frustum culling against the drawing it saves, with the
+emulated draw cost (it grows with the visible objects only), for the
+camera looking across the objects.
+
+Usage (from the repository root)::
+
+    $ python -m benchmark.culling --objects 1000 10000 50000
+"""
+
+import argparse
+import math
+
+from .simulator import Simulator
+
+from mathutils import Matrix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the frustum culling of the headset drawing")
+    parser.add_argument("--frames", type=int, default=300, help="number of simulated frames")
+    parser.add_argument("--objects", type=int, nargs="+", default=[1000, 10000, 50000], help="scene sizes")
+    parser.add_argument("--edit-interval", type=int, default=0, help="emulate a scene edit every N frames")
+    args = parser.parse_args(argv)
+
+    print("{0:>8} {1:>8} {2:>10} {3:>10} {4:>10} {5:>10} {6:>10} {7:>14}".format(
+          "objects", "culling", "frame ms", "cull ms", "draw ms", "saved ms", "est. ms", "drawn/frame"))
+
+    for object_count in args.objects:
+        unculled_draw = None
+
+        for use_culling in (False, True):
+            simulator = Simulator(object_count, draw_cost=True, edit_interval=args.edit_interval)
+
+            # look along +Y, across the grid of objects instead of above it
+            camera = simulator.scene.camera
+            camera.matrix_world = camera.matrix_world * Matrix.Rotation(math.radians(90.0), 4, 'X')
+
+            result = simulator.run(args.frames, use_profiling=True, settings={"use_culling": use_culling})
+            stages = result["stages"]
+
+            draw = stages["draw_view3d.left"]["mean_ms"] + stages["draw_view3d.right"]["mean_ms"]
+            cull = stages["cull"]["mean_ms"] if use_culling else 0.0
+
+            if unculled_draw is None:
+                unculled_draw = draw
+
+            # drawing time saved, measured against the run without culling,
+            # and as the add-on estimates it for its profiling panel
+            saved = unculled_draw - draw
+            estimated = result["cull_saved_ms"]
+
+            print("{0:>8} {1:>8} {2:>10.3f} {3:>10.4f} {4:>10.4f} {5:>10.4f} {6:>10.4f} {7:>14.1f}".format(
+                  object_count,
+                  "on" if use_culling else "off",
+                  result["mean_ms"],
+                  cull,
+                  draw,
+                  saved,
+                  estimated,
+                  result["drawn_objects_per_frame"],
+                  ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Pose Publisher
+==============
+
+Stand-in for an external tracker, it publishes a synthetic head motion
+for the ``External Tracker`` display backend.
+
+Usage (from the repository root)::
+
+    $ python -m benchmark.publisher --transport UDP --rate 500 --duration 60
+"""
+
+import argparse
+
+from math import (
+        cos,
+        sin,
+        )
+
+from time import (
+        perf_counter,
+        sleep,
+        )
+
+from . import stubs
+
+stubs.install()
+
+from space_view3d_virtual_reality.hmd.external import PosePublisher
+
+
+def headPose(time):
+    """
+    Head turning left and right, and swaying a little
+    """
+    angle = 0.4 * sin(time * 1.5)
+    orientation = (cos(angle * 0.5), 0.0, sin(angle * 0.5), 0.0)
+    position = (0.05 * sin(time), 0.0, 0.02 * cos(time * 2.0))
+
+    ipd = 0.032
+    return ((orientation, orientation),
+            ((position[0] - ipd, position[1], position[2]), (position[0] + ipd, position[1], position[2])))
+
+
+def publish(publisher, rate, duration):
+    """
+    Publish poses at a fixed rate
+
+    :return: number of published poses
+    :rtype: int
+    """
+    period = 1.0 / rate
+    start = perf_counter()
+    count = 0
+
+    while True:
+        now = perf_counter()
+        time = now - start
+
+        if time > duration:
+            return count
+
+        orientations, positions = headPose(time)
+        publisher.publish(now, orientations, positions)
+        count += 1
+
+        wait = start + count * period - perf_counter()
+        if wait > 0.0:
+            sleep(wait)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish a synthetic head motion for the External Tracker backend")
+    parser.add_argument("--transport", choices=('SHARED_MEMORY', 'UDP'), default='SHARED_MEMORY', help="how the poses are published")
+    parser.add_argument("--address", default="", help="shared memory file or host:port (empty for the default)")
+    parser.add_argument("--rate", type=float, default=500.0, help="poses per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to publish for")
+    args = parser.parse_args(argv)
+
+    publisher = PosePublisher(args.transport, args.address)
+
+    try:
+        count = publish(publisher, args.rate, args.duration)
+
+    finally:
+        publisher.close()
+
+    print("published {0} poses".format(count))
+
+
+if __name__ == '__main__':
+    main()
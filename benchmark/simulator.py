@@ -0,0 +1,664 @@
+"""
+Frame Loop Simulator
+====================
+
+Drive :class:`VirtualRealityDisplayOperator` headless with the ``DEBUG``
+backend and report frame cost for different scene sizes.
+
+Usage (from the repository root)::
+
+    $ python -m benchmark.simulator --frames 2000 --objects 100 1000 20000
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from . import stubs
+
+stubs.install()
+
+import bpy
+
+from mathutils import Matrix
+
+
+ADDON_NAME = "space_view3d_virtual_reality"
+
+
+# ############################################################
+# Fake Blender data
+# ############################################################
+
+class FakeObject:
+    def __init__(self, name, location, radius=1.0):
+        self.name = name
+        self.type = 'MESH'
+        self._hide = False
+        self.hide_render = False
+        self.layers = [True] + [False] * 19
+        self.matrix_world = Matrix.Translation(location)
+        self.bound_box = [(x, y, z) for x in (-radius, radius) for y in (-radius, radius) for z in (-radius, radius)]
+        self.modifiers = []
+        self.data = None
+        self.is_updated = False
+        self.is_updated_data = False
+        self._properties = {}
+
+    def __repr__(self):
+        return "<FakeObject {0}>".format(self.name)
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __setitem__(self, key, value):
+        self._properties[key] = value
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+    def as_pointer(self):
+        return id(self)
+
+    @property
+    def hide(self):
+        return self._hide
+
+    @hide.setter
+    def hide(self, value):
+        # setting a property from Python runs its RNA update
+        stubs.state.rna_updates += 1
+        self._hide = value
+
+
+class FakeObjectCollection(list):
+    """
+    bpy_prop_collection, ``foreach_set`` writes the raw values without RNA updates
+    """
+    is_updated = False
+
+    def foreach_get(self, attr, seq):
+        if attr == "matrix_world":
+            # flattened column by column, like mathutils
+            values = [value for ob in self for row in ob.matrix_world.transposed() for value in row]
+
+        elif attr == "bound_box":
+            values = [value for ob in self for corner in ob.bound_box for value in corner]
+
+        else:
+            attr = "_" + attr if attr == "hide" else attr
+            values = [getattr(ob, attr) for ob in self]
+
+        for i, value in enumerate(values):
+            seq[i] = value
+
+    def foreach_set(self, attr, seq):
+        attr = "_" + attr if attr == "hide" else attr
+        for ob, value in zip(self, seq):
+            setattr(ob, attr, value)
+
+
+class FakeCameraData:
+    def __init__(self):
+        self.type = 'PERSP'
+        self.lens = 35.0
+        self.ortho_scale = 7.0
+        self.sensor_fit = 'AUTO'
+        self.sensor_width = 32.0
+        self.sensor_height = 18.0
+        self.shift_x = 0.0
+        self.shift_y = 0.0
+        self.clip_start = 0.1
+        self.clip_end = 100.0
+
+
+class FakeCamera(FakeObject):
+    def __init__(self):
+        super(FakeCamera, self).__init__("Camera", (0.0, -10.0, 2.0))
+        self.type = 'CAMERA'
+        self.data = FakeCameraData()
+
+    def calc_matrix_camera(self, x=1920, y=1080, scale_x=1.0, scale_y=1.0):
+        return _perspective(self.data.lens, self.data.clip_start, self.data.clip_end)
+
+
+class FakeUnitSettings:
+    def __init__(self):
+        self.system = 'METRIC'
+        self.scale_length = 1.0
+
+
+class FakeScene:
+    def __init__(self, object_count, camera):
+        self.name = "Scene"
+        self.unit_settings = FakeUnitSettings()
+        self.camera = camera
+        self.layers = [True] + [False] * 19
+        self.is_updated = False
+
+        side = max(1, int(math.ceil(object_count ** (1.0 / 3.0))))
+        objects = [camera]
+
+        for i in range(object_count):
+            x = (i % side) * 3.0
+            y = ((i // side) % side) * 3.0
+            z = (i // (side * side)) * 3.0
+            objects.append(FakeObject("Object.{0:05d}".format(i), (x - side, y - side, z)))
+
+        self.objects = FakeObjectCollection(objects)
+
+
+class FakeRegionData:
+    def __init__(self):
+        self.view_perspective = 'PERSP'
+        self.view_matrix = Matrix.Translation((0.0, 0.0, -10.0))
+        self.perspective_matrix = _perspective(35.0, 0.1, 100.0) * self.view_matrix
+
+
+class FakeSpaceView3D:
+    def __init__(self, camera):
+        self.type = 'VIEW_3D'
+        self.camera = camera
+        self.clip_start = 0.1
+        self.clip_end = 1000.0
+        self.lens = 35.0
+        self.show_grease_pencil = True
+        self.viewport_shade = 'SOLID'
+        self.layers = [True] + [False] * 19
+        self.lock_camera_and_layers = True
+
+
+class FakeRegion:
+    def __init__(self):
+        self.type = 'WINDOW'
+        self.width = 1920
+        self.height = 1080
+
+
+class FakeArea:
+    def __init__(self, camera):
+        self.type = 'VIEW_3D'
+        self.spaces = [FakeSpaceView3D(camera)]
+        self.regions = [FakeRegion()]
+        self.region_data = FakeRegionData()
+        self.is_tagged = False
+
+    def tag_redraw(self):
+        self.is_tagged = True
+
+
+class FakeScreen:
+    def __init__(self, name, areas):
+        self.name = name
+        self.areas = areas
+
+
+class FakeWindow:
+    def __init__(self, screen):
+        self.screen = screen
+        self.width = 1920
+        self.height = 1080
+
+
+class FakeTimer:
+    def __init__(self, step):
+        self.time_step = step
+
+
+class FakeWindowManager(bpy.types.WindowManager):
+    def __init__(self):
+        self.timers = []
+        self.modal_handlers = []
+
+    def event_timer_add(self, step, window=None):
+        timer = FakeTimer(step)
+        self.timers.append(timer)
+        return timer
+
+    def event_timer_remove(self, timer):
+        self.timers.remove(timer)
+
+    def modal_handler_add(self, operator):
+        self.modal_handlers.append(operator)
+
+
+class FakeAddonPreferences:
+    def __init__(self, display_backend):
+        self.display_backend = display_backend
+        self.replay_filepath = ""
+        self.replay_rate = 1.0
+        self.replay_start = 0.0
+        self.external_transport = 'SHARED_MEMORY'
+        self.external_address = ""
+        self.debug_vsync = False
+
+
+class FakeAddon:
+    def __init__(self, display_backend):
+        self.preferences = FakeAddonPreferences(display_backend)
+
+
+class FakeUserPreferences:
+    def __init__(self, display_backend):
+        self.addons = {ADDON_NAME: FakeAddon(display_backend)}
+
+
+class FakeContext:
+    """
+    Mimic ``bpy.context``, the area related members follow
+    the area currently being drawn
+    """
+    def __init__(self, scene, window_manager, window, area, user_preferences):
+        self.scene = scene
+        self.window_manager = window_manager
+        self.window = window
+        self.user_preferences = user_preferences
+        self.area = area
+
+    @property
+    def space_data(self):
+        return self.area.spaces[0]
+
+    @property
+    def region(self):
+        return self.area.regions[0]
+
+    @property
+    def region_data(self):
+        return self.area.region_data
+
+    def copy(self):
+        return {"window": self.window, "area": self.area, "scene": self.scene}
+
+
+class FakeEvent:
+    def __init__(self, type):
+        self.type = type
+        self.value = 'NOTHING'
+
+
+def _perspective(lens, near, far, sensor=32.0, aspect=16.0 / 9.0):
+    fx = 2.0 * lens / sensor
+    fy = fx * aspect
+    return Matrix(((fx, 0.0, 0.0, 0.0),
+                   (0.0, fy, 0.0, 0.0),
+                   (0.0, 0.0, (far + near) / (near - far), (2.0 * far * near) / (near - far)),
+                   (0.0, 0.0, -1.0, 0.0)))
+
+
+# ############################################################
+# Simulator
+# ############################################################
+
+class Simulator:
+    """
+    Run the operator life cycle: enable, slave window setup,
+    a number of timer driven frames and disable
+    """
+
+    def __init__(self, object_count, display_backend='DEBUG', draw_cost=False, edit_interval=0):
+        self._state = stubs.install()
+        self._state.draw_cost = draw_cost
+
+        self.addon = _import_addon()
+        self.bpy = bpy
+
+        camera = FakeCamera()
+        self.scene = FakeScene(object_count, camera)
+        self.master = FakeArea(camera)
+        self.screen = FakeScreen("Default", [self.master])
+        self.window = FakeWindow(self.screen)
+        self.window_manager = FakeWindowManager()
+        self.context = FakeContext(self.scene, self.window_manager, self.window,
+                                   self.master, FakeUserPreferences(display_backend))
+        self.slave = None
+        self.edit_interval = edit_interval
+        self.frame_count = 0
+        self._edited = []
+
+        bpy.data.screens[:] = [self.screen]
+        bpy.data.objects = FakeObjectCollection(self.scene.objects)
+        bpy.data.scenes[:] = [self.scene]
+        bpy.context = self.context
+
+        bpy.ops.screen.area_dupli.callback = self._areaDupli
+        bpy.ops.screen.screen_full_area.callback = self._screenFullArea
+
+        self.operator = None
+
+    def _areaDupli(self, *args, **kwargs):
+        area = FakeArea(self.scene.camera)
+        self.bpy.data.screens.append(FakeScreen("Dupli", [area]))
+        self.context.area = area
+        return {'FINISHED'}
+
+    def _screenFullArea(self, *args, **kwargs):
+        area = FakeArea(self.scene.camera)
+        self.bpy.data.screens.append(FakeScreen("Fullscreen", [area]))
+        self.context.area = area
+        return {'FINISHED'}
+
+    def _invoke(self, action):
+        from space_view3d_virtual_reality.operator import VirtualRealityDisplayOperator
+
+        self.context.area = self.master
+        operator = VirtualRealityDisplayOperator()
+        operator.action = action
+        result = operator.invoke(self.context, None)
+        return operator, result
+
+    def _drawArea(self, area):
+        """
+        Run the draw handlers the same way Blender does for one region redraw
+        """
+        self.context.area = area
+        area.is_tagged = False
+
+        handlers = self.bpy.types.SpaceView3D._draw_handlers
+
+        for draw_type in ('PRE_VIEW', 'POST_VIEW', 'POST_PIXEL'):
+            for callback, args, region_type, _draw_type in list(handlers):
+                if _draw_type == draw_type:
+                    callback(*args)
+
+    def _findSlave(self):
+        operator = self.operator
+        for screen in self.bpy.data.screens:
+            for area in screen.areas:
+                if hash(area) == operator._hash_slave:
+                    return area
+        return None
+
+    def start(self, settings=None):
+        """
+        Enable the virtual reality display and go through the slave window setup
+
+        :param settings: values for the ``virtual_reality`` properties
+        :type settings: dict
+        """
+        if not hasattr(self.window_manager, "virtual_reality"):
+            self.addon.register()
+
+        vr = self.window_manager.virtual_reality
+        for name, value in (settings or {}).items():
+            setattr(vr, name, value)
+
+        operator, result = self._invoke('ENABLE')
+        if result != {'RUNNING_MODAL'}:
+            raise RuntimeError("Failed to enable the virtual reality display")
+
+        self.operator = operator
+
+        if not operator._hmd.is_direct_mode:
+            # area duplicated, now make it fullscreen and ui-less
+            self._drawArea(self._findSlave())
+            self.slave = self._findSlave()
+
+            # user moved the window, ask to start
+            self._invoke('FULLSCREEN')
+            self._drawArea(self.slave)
+
+        self.context.area = self.master
+
+    def frame(self):
+        """
+        One timer tick followed by the redraw of the tagged areas
+        """
+        operator = self.operator
+        self.frame_count += 1
+
+        if self.edit_interval and self.frame_count % self.edit_interval == 0:
+            self._edit()
+
+        self._sceneUpdate()
+
+        self.context.area = self.master
+        operator.modal(self.context, FakeEvent('TIMER'))
+
+        if self.slave and self.slave.is_tagged:
+            self._drawArea(self.slave)
+
+        if self.master.is_tagged:
+            self._drawArea(self.master)
+
+        self.context.area = self.master
+
+    def _edit(self):
+        """
+        Emulate the user modelling in the master window
+        """
+        objects = self.scene.objects
+        ob = objects[self.frame_count % len(objects)]
+        ob.matrix_world[0][3] += 0.01
+        ob.is_updated = True
+        self.bpy.data.objects.is_updated = True
+        self._edited.append(ob)
+
+    def _sceneUpdate(self):
+        """
+        Run the scene update handlers, as Blender does on every event loop
+        """
+        scene = self.scene
+
+        for handler in self.bpy.app.handlers.scene_update_post:
+            handler(scene)
+
+        scene.is_updated = False
+        self.bpy.data.objects.is_updated = False
+
+        for ob in self._edited:
+            ob.is_updated = False
+
+        self._edited = []
+
+    def stop(self, unregister=True):
+        """
+        Disable the virtual reality display
+
+        :param unregister: also unregister the addon
+        :type unregister: bool
+        """
+        self._invoke('DISABLE')
+        self.context.area = self.master
+        self.operator.modal(self.context, FakeEvent('TIMER'))
+
+        if unregister:
+            self.addon.unregister()
+            self.bpy.types.SpaceView3D._draw_handlers[:] = []
+
+    def run(self, frames, warmup=50, use_tracemalloc=False, use_profiling=False, settings=None):
+        """
+        Simulate a number of frames
+
+        :return: the measurements
+        :rtype: dict
+        """
+        self.start(settings)
+
+        vr = self.window_manager.virtual_reality
+        vr.use_profiling = use_profiling
+
+        for i in range(warmup):
+            self.frame()
+
+        self._state.reset_counters()
+
+        timings = [0.0] * frames
+        clock = time.perf_counter
+
+        gc_collections = [0]
+
+        def gc_callback(phase, info):
+            if phase == 'start' and info["generation"] == 0:
+                gc_collections[0] += 1
+
+        gc.callbacks.append(gc_callback)
+        blocks = sys.getallocatedblocks()
+
+        if use_tracemalloc:
+            tracemalloc.start()
+
+        start = clock()
+
+        try:
+            for i in range(frames):
+                begin = clock()
+                self.frame()
+                timings[i] = clock() - begin
+
+        finally:
+            elapsed = clock() - start
+
+            if use_tracemalloc:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                peak = None
+
+            gc.callbacks.remove(gc_callback)
+            blocks = sys.getallocatedblocks() - blocks
+
+            stages = self._profilerSummary() if use_profiling else None
+            # last frame, as the profiling panel shows it
+            cull_times = (vr.cull_time, vr.cull_saved_time)
+            vr.use_profiling = False
+
+            self.stop()
+
+        report = _report(timings, elapsed, self, gc_collections[0], blocks, peak)
+        report["stages"] = stages
+        report["cull_ms"], report["cull_saved_ms"] = cull_times
+        return report
+
+    def _profilerSummary(self):
+        from space_view3d_virtual_reality.profiler import frame_profiler
+        return frame_profiler.summary()
+
+
+def _percentile(ordered, fraction):
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _report(timings, elapsed, simulator, gc_collections, blocks, peak):
+    ordered = sorted(timings)
+    frames = len(timings)
+    state = simulator._state
+
+    return {
+            "objects": len(simulator.scene.objects) - 1,
+            "frames": frames,
+            "fps": frames / elapsed if elapsed else 0.0,
+            "mean_ms": statistics.mean(timings) * 1000.0,
+            "stdev_ms": (statistics.stdev(timings) if frames > 1 else 0.0) * 1000.0,
+            "p50_ms": _percentile(ordered, 0.50) * 1000.0,
+            "p90_ms": _percentile(ordered, 0.90) * 1000.0,
+            "p99_ms": _percentile(ordered, 0.99) * 1000.0,
+            "max_ms": ordered[-1] * 1000.0,
+            "gc_gen0_per_1000_frames": gc_collections * 1000.0 / frames,
+            "leaked_blocks": blocks,
+            "tracemalloc_peak_kb": peak / 1024.0 if peak is not None else None,
+            "draw_calls": state.draw_calls,
+            "drawn_objects_per_frame": state.drawn_objects / frames,
+            "rna_updates_per_frame": state.rna_updates / frames,
+            "gl_calls_per_frame": state.gl_calls / frames,
+            }
+
+
+def _import_addon():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    if root not in sys.path:
+        sys.path.insert(0, root)
+
+    import importlib
+    return importlib.import_module(ADDON_NAME)
+
+
+# ############################################################
+# Command Line
+# ############################################################
+
+COLUMNS = (
+        ("objects", "objects", "{0:>8}"),
+        ("fps", "fps", "{0:>10.1f}"),
+        ("mean_ms", "mean ms", "{0:>9.3f}"),
+        ("p50_ms", "p50 ms", "{0:>9.3f}"),
+        ("p90_ms", "p90 ms", "{0:>9.3f}"),
+        ("p99_ms", "p99 ms", "{0:>9.3f}"),
+        ("max_ms", "max ms", "{0:>9.3f}"),
+        ("gc_gen0_per_1000_frames", "gc0/1k", "{0:>8.1f}"),
+        ("leaked_blocks", "blocks", "{0:>8}"),
+        )
+
+
+def print_table(results, columns=COLUMNS):
+    print(" ".join("{0:>{1}}".format(header, len(fmt.format(0))) for name, header, fmt in columns))
+
+    for result in results:
+        print(" ".join(fmt.format(result[name]) for name, header, fmt in columns))
+
+
+def print_stages(results):
+    for result in results:
+        print("\n{0} objects, mean / max ms per stage:".format(result["objects"]))
+
+        for stage, values in result["stages"].items():
+            print("  {0:<20} {1:>9.4f} {2:>9.4f}".format(stage, values["mean_ms"], values["max_ms"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless frame loop simulator for the Virtual Reality Viewport")
+    parser.add_argument("--frames", type=int, default=1000, help="number of simulated frames")
+    parser.add_argument("--warmup", type=int, default=50, help="frames to run before measuring")
+    parser.add_argument("--objects", type=int, nargs="+", default=[100, 1000, 10000], help="scene sizes")
+    parser.add_argument("--backend", default='DEBUG', help="display backend")
+    parser.add_argument("--vsync", action="store_true", help="block the debug backend frame submission until the next refresh")
+    parser.add_argument("--async-submission", action="store_true", help="send the frames from the submission worker")
+    parser.add_argument("--record", metavar="FILEPATH", help="save the tracking session")
+    parser.add_argument("--replay", metavar="FILEPATH", help="replay a tracking session (REPLAY backend)")
+    parser.add_argument("--replay-rate", type=float, default=1.0, help="playback speed of the replayed session")
+    parser.add_argument("--draw-cost", action="store_true", help="emulate a draw cost per visible object")
+    parser.add_argument("--culling", action="store_true", help="hide the objects outside of the eye frustums")
+    parser.add_argument("--tracemalloc", action="store_true", help="trace the peak memory (slower)")
+    parser.add_argument("--profile", action="store_true", help="report the per-stage timings of the add-on profiler")
+    parser.add_argument("--json", metavar="FILEPATH", help="save the results as json")
+    args = parser.parse_args(argv)
+
+    backend = 'REPLAY' if args.replay else args.backend
+
+    settings = {"use_async_submission": args.async_submission, "use_culling": args.culling}
+    if args.record:
+        settings.update(use_recording=True, record_filepath=args.record)
+
+    results = []
+    for object_count in args.objects:
+        simulator = Simulator(object_count, backend, args.draw_cost)
+
+        preferences = simulator.context.user_preferences.addons[ADDON_NAME].preferences
+        preferences.replay_filepath = args.replay or ""
+        preferences.replay_rate = args.replay_rate
+        preferences.debug_vsync = args.vsync
+
+        results.append(simulator.run(args.frames, args.warmup, args.tracemalloc, args.profile, settings))
+
+    print_table(results)
+
+    if args.profile:
+        print_stages(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Startup Benchmark
+=================
+
+Time to import and register the add-on, as Blender does at startup,
+each run in a fresh interpreter with the stand-in Blender modules.
+
+It fails (exit status 1) when the median time is over the budget, or
+when ``register()`` imports a module only needed once the display
+starts (a display backend, NumPy, the worker pools, ...).
+
+Usage (from the repository root)::
+
+    $ python -m benchmark.startup --runs 10 --budget 50
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from .simulator import ADDON_NAME
+
+
+# imported on demand, when the virtual reality display starts
+DEFERRED_MODULES = (
+        "numpy",
+        "concurrent.futures",
+        "multiprocessing",
+        ADDON_NAME + ".hmd",
+        ADDON_NAME + ".hmd.oculus",
+        ADDON_NAME + ".hmd.oculus_legacy",
+        ADDON_NAME + ".hmd.debug",
+        ADDON_NAME + ".hmd.replay",
+        ADDON_NAME + ".hmd.external",
+        ADDON_NAME + ".preview",
+        ADDON_NAME + ".stereo",
+        ADDON_NAME + ".opengl_helper",
+        ADDON_NAME + ".capture",
+        ADDON_NAME + ".export",
+        ADDON_NAME + ".readback",
+        ADDON_NAME + ".culling",
+        ADDON_NAME + ".lod",
+        ADDON_NAME + ".bvh",
+        )
+
+SCRIPT = """
+import json, sys, time
+
+from benchmark import stubs
+stubs.install()
+
+modules = set(sys.modules)
+start = time.perf_counter()
+
+import {addon} as addon
+imported = time.perf_counter()
+
+addon.register()
+registered = time.perf_counter()
+
+json.dump({{
+        "import_ms": (imported - start) * 1000.0,
+        "register_ms": (registered - imported) * 1000.0,
+        "modules": sorted(set(sys.modules) - modules),
+        }}, sys.stdout)
+""".format(addon=ADDON_NAME)
+
+
+def measure():
+    """
+    Import and register the add-on in a new interpreter
+
+    :return: import_ms, register_ms and the newly imported modules
+    :rtype: dict
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, "-c", SCRIPT], cwd=root)
+    return json.loads(output.decode())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import and registration time of the add-on")
+    parser.add_argument("--runs", type=int, default=10, help="number of fresh interpreters")
+    parser.add_argument("--budget", type=float, default=50.0, help="maximum median time (in milliseconds)")
+    parser.add_argument("--modules", action="store_true", help="list the modules imported by the add-on")
+    args = parser.parse_args(argv)
+
+    results = [measure() for i in range(args.runs)]
+
+    import_ms = statistics.median(result["import_ms"] for result in results)
+    register_ms = statistics.median(result["register_ms"] for result in results)
+    total_ms = statistics.median(result["import_ms"] + result["register_ms"] for result in results)
+
+    modules = results[0]["modules"]
+    deferred = [name for name in DEFERRED_MODULES if name in modules]
+
+    print("import    {0:>8.2f} ms".format(import_ms))
+    print("register  {0:>8.2f} ms".format(register_ms))
+    print("total     {0:>8.2f} ms (budget {1:.2f} ms)".format(total_ms, args.budget))
+    print("modules   {0:>8}".format(len(modules)))
+
+    if args.modules:
+        for name in modules:
+            print("  " + name)
+
+    is_valid = True
+
+    if deferred:
+        print("\nImported at startup, but only needed once the display starts:")
+        for name in deferred:
+            print("  " + name)
+        is_valid = False
+
+    if total_ms > args.budget:
+        print("\nOver the startup budget")
+        is_valid = False
+
+    return 0 if is_valid else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
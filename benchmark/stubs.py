@@ -0,0 +1,790 @@
+"""
+Stubs
+=====
+
+Stand-in Blender modules for the headless harness.
+
+Only the surface used by the add-on is implemented, following the
+Blender 2.77 API (``Matrix * Matrix`` multiplication, ``gpu.offscreen``,
+``bgl`` immediate mode and ``bpy.app.handlers.scene_update_post``).
+Call :func:`install` before importing the add-on.
+"""
+
+import math
+import sys
+import types
+
+from operator import attrgetter
+from time import perf_counter
+
+
+# ############################################################
+# mathutils
+# ############################################################
+
+class Vector:
+    __slots__ = ("_data",)
+
+    def __init__(self, seq=(0.0, 0.0, 0.0)):
+        self._data = [float(v) for v in seq]
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __getitem__(self, index):
+        return self._data[index]
+
+    def __setitem__(self, index, value):
+        self._data[index] = value
+
+    def __add__(self, other):
+        return Vector([a + b for a, b in zip(self._data, other)])
+
+    def __sub__(self, other):
+        return Vector([a - b for a, b in zip(self._data, other)])
+
+    def __mul__(self, value):
+        return Vector([a * value for a in self._data])
+
+    def __repr__(self):
+        return "Vector({0})".format(tuple(self._data))
+
+    @property
+    def x(self):
+        return self._data[0]
+
+    @property
+    def y(self):
+        return self._data[1]
+
+    @property
+    def z(self):
+        return self._data[2]
+
+    @property
+    def length(self):
+        return math.sqrt(sum(a * a for a in self._data))
+
+    def copy(self):
+        return Vector(self._data)
+
+    def to_tuple(self):
+        return tuple(self._data)
+
+
+class Matrix:
+    __slots__ = ("_rows",)
+
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = ((1.0, 0.0, 0.0, 0.0),
+                    (0.0, 1.0, 0.0, 0.0),
+                    (0.0, 0.0, 1.0, 0.0),
+                    (0.0, 0.0, 0.0, 1.0))
+
+        self._rows = [[float(v) for v in row] for row in rows]
+
+    @classmethod
+    def Identity(cls, size):
+        return cls([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+    @classmethod
+    def Translation(cls, vector):
+        matrix = cls()
+        matrix._rows[0][3] = vector[0]
+        matrix._rows[1][3] = vector[1]
+        matrix._rows[2][3] = vector[2]
+        return matrix
+
+    @classmethod
+    def Rotation(cls, angle, size, axis):
+        c = math.cos(angle)
+        s = math.sin(angle)
+
+        if axis == 'X':
+            rows = [[1.0, 0.0, 0.0], [0.0, c, -s], [0.0, s, c]]
+        elif axis == 'Y':
+            rows = [[c, 0.0, s], [0.0, 1.0, 0.0], [-s, 0.0, c]]
+        elif axis == 'Z':
+            rows = [[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]]
+        else:
+            raise ValueError("axis must be 'X', 'Y' or 'Z'")
+
+        matrix = cls(rows)
+        return matrix.to_4x4() if size == 4 else matrix
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __getitem__(self, index):
+        return self._rows[index]
+
+    def __setitem__(self, index, value):
+        self._rows[index] = [float(v) for v in value]
+
+    def __eq__(self, other):
+        return isinstance(other, Matrix) and self._rows == other._rows
+
+    def __repr__(self):
+        return "Matrix({0})".format(self._rows)
+
+    def __mul__(self, other):
+        a = self._rows
+
+        if isinstance(other, Matrix):
+            b = other._rows
+            size = len(b)
+            return Matrix([[sum(row[k] * b[k][j] for k in range(size)) for j in range(len(b[0]))] for row in a])
+
+        vector = list(other)
+        if len(vector) == 3 and len(a) == 4:
+            vector.append(1.0)
+            result = [sum(row[k] * vector[k] for k in range(4)) for row in a]
+            return Vector(result[:3])
+
+        return Vector([sum(row[k] * vector[k] for k in range(len(vector))) for row in a])
+
+    def copy(self):
+        return Matrix(self._rows)
+
+    def transposed(self):
+        return Matrix([list(col) for col in zip(*self._rows)])
+
+    def to_3x3(self):
+        return Matrix([row[:3] for row in self._rows[:3]])
+
+    def to_4x4(self):
+        rows = [list(row[:3]) + [0.0] for row in self._rows[:3]]
+        if len(self._rows) == 4:
+            rows = [list(row) for row in self._rows]
+        else:
+            rows.append([0.0, 0.0, 0.0, 1.0])
+        return Matrix(rows)
+
+    def to_translation(self):
+        return Vector([self._rows[0][3], self._rows[1][3], self._rows[2][3]])
+
+    def to_quaternion(self):
+        m = self._rows
+        trace = m[0][0] + m[1][1] + m[2][2]
+
+        if trace > 0.0:
+            s = 0.5 / math.sqrt(trace + 1.0)
+            return Quaternion((0.25 / s,
+                               (m[2][1] - m[1][2]) * s,
+                               (m[0][2] - m[2][0]) * s,
+                               (m[1][0] - m[0][1]) * s))
+
+        if m[0][0] > m[1][1] and m[0][0] > m[2][2]:
+            s = 2.0 * math.sqrt(1.0 + m[0][0] - m[1][1] - m[2][2])
+            return Quaternion(((m[2][1] - m[1][2]) / s, 0.25 * s,
+                               (m[0][1] + m[1][0]) / s, (m[0][2] + m[2][0]) / s))
+
+        if m[1][1] > m[2][2]:
+            s = 2.0 * math.sqrt(1.0 + m[1][1] - m[0][0] - m[2][2])
+            return Quaternion(((m[0][2] - m[2][0]) / s, (m[0][1] + m[1][0]) / s,
+                               0.25 * s, (m[1][2] + m[2][1]) / s))
+
+        s = 2.0 * math.sqrt(1.0 + m[2][2] - m[0][0] - m[1][1])
+        return Quaternion(((m[1][0] - m[0][1]) / s, (m[0][2] + m[2][0]) / s,
+                           (m[1][2] + m[2][1]) / s, 0.25 * s))
+
+    def inverted(self):
+        size = len(self._rows)
+        work = [list(row) + [1.0 if i == j else 0.0 for j in range(size)] for i, row in enumerate(self._rows)]
+
+        for col in range(size):
+            pivot = max(range(col, size), key=lambda r: abs(work[r][col]))
+            if abs(work[pivot][col]) < 1e-12:
+                raise ValueError("Matrix.inverted(): matrix does not have an inverse")
+
+            work[col], work[pivot] = work[pivot], work[col]
+            factor = work[col][col]
+            work[col] = [v / factor for v in work[col]]
+
+            for row in range(size):
+                if row != col and work[row][col]:
+                    ratio = work[row][col]
+                    work[row] = [a - ratio * b for a, b in zip(work[row], work[col])]
+
+        return Matrix([row[size:] for row in work])
+
+
+class Quaternion:
+    __slots__ = ("_data",)
+
+    def __init__(self, seq=(1.0, 0.0, 0.0, 0.0)):
+        self._data = [float(v) for v in seq]
+
+    def __len__(self):
+        return 4
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __getitem__(self, index):
+        return self._data[index]
+
+    def to_matrix(self):
+        w, x, y, z = self._data
+        return Matrix(((1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - z * w), 2.0 * (x * z + y * w)),
+                       (2.0 * (x * y + z * w), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - x * w)),
+                       (2.0 * (x * z - y * w), 2.0 * (y * z + x * w), 1.0 - 2.0 * (x * x + y * y))))
+
+
+class Euler:
+    __slots__ = ("_data", "order")
+
+    def __init__(self, seq=(0.0, 0.0, 0.0), order='XYZ'):
+        self._data = [float(v) for v in seq]
+        self.order = order
+
+
+# ############################################################
+# bgl
+# ############################################################
+
+_GL_FUNCTIONS = """
+glActiveTexture glAttachShader glBegin glBindBuffer glBindFramebuffer
+glBindRenderbuffer glBindTexture glBlendFunc glBlitFramebuffer
+glBufferData glCallList glCheckFramebufferStatus glClear glClearColor
+glColor4f glCompileShader glCopyTexImage2D glCopyTexSubImage2D
+glCreateProgram glCreateShader glDeleteBuffers glDeleteFramebuffers
+glDeleteLists glDeleteProgram glDeleteRenderbuffers glDeleteShader
+glDeleteTextures glDepthFunc glDisable glDrawBuffers glEnable glEnd
+glEndList glFinish glFlush glFramebufferRenderbuffer
+glFramebufferTexture2D glGenBuffers glGenFramebuffers glGenLists
+glGenRenderbuffers glGenTextures glGetError glGetFloatv glGetIntegerv
+glGetProgramInfoLog glGetProgramiv glGetShaderInfoLog glGetShaderSource
+glGetShaderiv glGetTexImage glGetUniformLocation glIsBuffer
+glIsEnabled glIsFramebuffer glIsList glIsProgram glIsTexture glLinkProgram
+glLoadIdentity glMatrixMode glNewList glOrtho glPixelStorei
+glPolygonMode glPopMatrix glPushMatrix glReadBuffer glReadPixels
+glRenderbufferStorage glScissor glShaderSource glTexCoord2f
+glTexCoord3f glTexImage2D glTexParameteri glTexSubImage2D glTranslatef
+glUniform1f glUniform1i glUniform4f glUseProgram glVertex2f glViewport
+gluLookAt
+"""
+
+_GL_CONSTANTS = """
+GL_ACTIVE_TEXTURE GL_ARRAY_BUFFER GL_BGRA GL_BYTE GL_COLOR_ATTACHMENT0
+GL_COLOR_BUFFER_BIT GL_COMPILE GL_COMPILE_STATUS GL_DEPTH_ATTACHMENT
+GL_DEPTH_BUFFER_BIT GL_DEPTH_COMPONENT GL_DEPTH_COMPONENT32
+GL_DEPTH_TEST GL_DRAW_FRAMEBUFFER GL_DRAW_FRAMEBUFFER_BINDING
+GL_DYNAMIC_READ GL_FALSE GL_FILL
+GL_FLOAT GL_FRAGMENT_SHADER GL_FRAMEBUFFER
+GL_FRAMEBUFFER_ATTACHMENT_OBJECT_TYPE GL_FRAMEBUFFER_COMPLETE
+GL_FRAMEBUFFER_INCOMPLETE_ATTACHMENT
+GL_FRAMEBUFFER_INCOMPLETE_DRAW_BUFFER
+GL_FRAMEBUFFER_INCOMPLETE_LAYER_TARGETS
+GL_FRAMEBUFFER_INCOMPLETE_MISSING_ATTACHMENT
+GL_FRAMEBUFFER_INCOMPLETE_MULTISAMPLE
+GL_FRAMEBUFFER_INCOMPLETE_READ_BUFFER GL_FRAMEBUFFER_UNDEFINED
+GL_FRAMEBUFFER_UNSUPPORTED GL_FRONT_AND_BACK GL_INT GL_LESS GL_LINEAR
+GL_LINK_STATUS GL_MODELVIEW GL_MODELVIEW_MATRIX GL_NEAREST GL_NONE
+GL_PACK_ALIGNMENT GL_PIXEL_PACK_BUFFER GL_PROJECTION
+GL_PROJECTION_MATRIX GL_QUADS GL_READ_BUFFER GL_READ_FRAMEBUFFER
+GL_RENDERBUFFER GL_RENDERBUFFER_SAMPLES GL_RGB GL_RGBA GL_RGBA8
+GL_SCISSOR_BOX GL_SCISSOR_TEST GL_STREAM_READ GL_TEXTURE GL_TEXTURE0
+GL_TEXTURE_2D GL_TEXTURE_BINDING_2D GL_TEXTURE_COMPARE_MODE
+GL_TEXTURE_FIXED_SAMPLE_LOCATIONS GL_TEXTURE_MAG_FILTER
+GL_TEXTURE_MIN_FILTER GL_TEXTURE_SAMPLES GL_TRUE GL_UNSIGNED_BYTE
+GL_VERTEX_SHADER GL_VIEWPORT
+"""
+
+
+# GL_BYTE, filled in with the bgl constants
+_byte_types = set()
+
+
+class ByteBuffer(bytearray):
+    """bgl.Buffer stand-in for the GL_BYTE buffers, with the buffer protocol of recent bgl"""
+
+    def __init__(self, type, size):
+        super(ByteBuffer, self).__init__(size)
+        self.type = type
+        self.dimensions = size
+
+    def to_list(self):
+        return list(self)
+
+
+class Buffer:
+    """bgl.Buffer stand-in, a flat (or nested) list of numbers"""
+    __slots__ = ("type", "dimensions", "_data")
+
+    def __new__(cls, type, dimensions=0, template=None):
+        if type in _byte_types and template is None:
+            size = dimensions
+
+            if isinstance(dimensions, (list, tuple)):
+                size = 1
+                for value in dimensions:
+                    size *= value
+
+            return ByteBuffer(type, size)
+
+        return super(Buffer, cls).__new__(cls)
+
+    def __init__(self, type, dimensions, template=None):
+        if isinstance(dimensions, (list, tuple)):
+            size = 1
+            for value in dimensions:
+                size *= value
+        else:
+            size = dimensions
+
+        self.type = type
+        self.dimensions = dimensions
+        self._data = [0] * size
+
+        if template is not None:
+            flat = list(_flatten(template))
+            self._data[:len(flat)] = flat
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        return self._data[index]
+
+    def __setitem__(self, index, value):
+        self._data[index] = value
+
+    def to_list(self):
+        return list(self._data)
+
+
+def _flatten(values):
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            yield from _flatten(value)
+        else:
+            yield value
+
+
+def _build_bgl(state):
+    bgl = types.ModuleType("bgl")
+    bgl.Buffer = Buffer
+
+    for i, name in enumerate(_GL_CONSTANTS.split()):
+        setattr(bgl, name, 0x1000 + i)
+
+    _byte_types.add(bgl.GL_BYTE)
+
+    def noop(*args):
+        state.gl_calls += 1
+        return 0
+
+    for name in _GL_FUNCTIONS.split():
+        setattr(bgl, name, noop)
+
+    def gen(count, buf):
+        state.gl_calls += 1
+        for i in range(count):
+            state.gl_names += 1
+            buf[i] = state.gl_names
+
+    def create(*args):
+        state.gl_calls += 1
+        state.gl_names += 1
+        return state.gl_names
+
+    def gen_lists(count):
+        return create()
+
+    def get_integerv(pname, buf):
+        state.gl_calls += 1
+        if pname in (bgl.GL_VIEWPORT, bgl.GL_SCISSOR_BOX):
+            for i, value in enumerate(state.viewport):
+                buf[i] = value
+        else:
+            buf[0] = 0
+
+    def get_shaderiv(shader, pname, buf):
+        state.gl_calls += 1
+        buf[0] = 1
+
+    def check_framebuffer_status(target):
+        state.gl_calls += 1
+        return bgl.GL_FRAMEBUFFER_COMPLETE
+
+    def is_object(name):
+        state.gl_calls += 1
+        return True
+
+    def get_uniform_location(program, name):
+        state.gl_calls += 1
+        return hash(name) & 0xff
+
+    for name in ("glGenTextures", "glGenFramebuffers", "glGenRenderbuffers", "glGenBuffers"):
+        setattr(bgl, name, gen)
+
+    bgl.glCreateProgram = create
+    bgl.glCreateShader = create
+    bgl.glGenLists = gen_lists
+    bgl.glGetIntegerv = get_integerv
+    bgl.glGetShaderiv = get_shaderiv
+    bgl.glGetProgramiv = get_shaderiv
+    bgl.glCheckFramebufferStatus = check_framebuffer_status
+    bgl.glIsTexture = is_object
+    bgl.glIsFramebuffer = is_object
+    bgl.glIsBuffer = is_object
+    bgl.glIsList = is_object
+    bgl.glIsProgram = is_object
+    bgl.glGetUniformLocation = get_uniform_location
+
+    return bgl
+
+
+# ############################################################
+# gpu
+# ############################################################
+
+# emulated drawing time of each visible object (seconds), with the draw cost on
+DRAW_OBJECT_COST = 0.000002
+
+_get_hide = attrgetter("hide")
+
+
+class GPUOffScreen:
+    def __init__(self, state, width, height, samples):
+        self._state = state
+        self.width = width
+        self.height = height
+        self.samples = samples
+        state.gl_names += 1
+        self.color_texture = state.gl_names
+        state.offscreens_created += 1
+
+    def draw_view3d(self, scene, view3d, region, projection_matrix, modelview_matrix):
+        state = self._state
+        state.draw_calls += 1
+
+        if state.draw_cost:
+            # emulate a draw cost that grows with the visible objects only,
+            # Blender skips the hidden ones before any drawing work
+            objects = scene.objects
+            visible = len(objects) - sum(map(_get_hide, objects))
+            state.drawn_objects += visible
+
+            end = perf_counter() + visible * DRAW_OBJECT_COST
+            while perf_counter() < end:
+                pass
+
+    def bind(self, save=True):
+        pass
+
+    def unbind(self, restore=True):
+        pass
+
+    def free(self):
+        self._state.offscreens_freed += 1
+
+
+def _build_gpu(state):
+    gpu = types.ModuleType("gpu")
+    offscreen = types.ModuleType("gpu.offscreen")
+
+    def new(width, height, samples=0):
+        return GPUOffScreen(state, width, height, samples)
+
+    offscreen.new = new
+    gpu.offscreen = offscreen
+    return gpu
+
+
+# ############################################################
+# bpy
+# ############################################################
+
+class _Property:
+    """
+    Property descriptor, the value of each instance
+    is kept in its own ``__dict__``
+    """
+    __slots__ = ("kind", "keywords")
+
+    def __init__(self, kind, keywords):
+        self.kind = kind
+        self.keywords = keywords
+
+    def _default(self):
+        if self.kind == 'COLLECTION':
+            return Collection(self.keywords["type"])
+        elif self.kind == 'POINTER':
+            return self.keywords["type"]()
+        elif self.kind == 'ENUM_FLAG':
+            return set(self.keywords.get("default", ()))
+        elif self.kind == 'VECTOR':
+            return list(self.keywords.get("default", (0.0,) * self.keywords.get("size", 3)))
+        return self.keywords.get("default", {'BOOL': False, 'INT': 0, 'FLOAT': 0.0, 'STRING': "", 'ENUM': ""}[self.kind])
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        key = id(self)
+        values = instance.__dict__.setdefault("_rna", {})
+
+        if key not in values:
+            values[key] = self._default()
+
+        return values[key]
+
+    def __set__(self, instance, value):
+        instance.__dict__.setdefault("_rna", {})[id(self)] = value
+
+        update = self.keywords.get("update")
+        if update:
+            update(instance, _context())
+
+
+class Collection(list):
+    def __init__(self, type):
+        super(Collection, self).__init__()
+        self._type = type
+
+    def add(self):
+        item = self._type()
+        self.append(item)
+        return item
+
+    def remove(self, index):
+        del self[index]
+
+    def clear(self):
+        del self[:]
+
+
+def _props_factory(kind):
+    def factory(**keywords):
+        return _Property(kind, keywords)
+    return factory
+
+
+def _enum_property(**keywords):
+    kind = 'ENUM_FLAG' if 'ENUM_FLAG' in keywords.get("options", ()) else 'ENUM'
+    return _Property(kind, keywords)
+
+
+class _RNAStruct:
+    bl_rna = None
+
+
+class Operator(_RNAStruct):
+    def report(self, level, message):
+        print("REPORT {0}: {1}".format(", ".join(sorted(level)), message))
+
+
+class Panel(_RNAStruct):
+    pass
+
+
+class PropertyGroup(_RNAStruct):
+    pass
+
+
+class AddonPreferences(_RNAStruct):
+    pass
+
+
+class WindowManager(_RNAStruct):
+    pass
+
+
+class SpaceView3D(_RNAStruct):
+    _draw_handlers = []
+
+    @classmethod
+    def draw_handler_add(cls, callback, args, region_type, draw_type):
+        handle = (callback, args, region_type, draw_type)
+        cls._draw_handlers.append(handle)
+        return handle
+
+    @classmethod
+    def draw_handler_remove(cls, handle, region_type):
+        cls._draw_handlers.remove(handle)
+
+
+class _OperatorCall:
+    def __init__(self, name):
+        self._name = name
+        self.callback = None
+
+    def __call__(self, *args, **kwargs):
+        if self.callback:
+            return self.callback(*args, **kwargs)
+        return {'FINISHED'}
+
+
+class _OperatorNamespace:
+    def __init__(self):
+        self._calls = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        if name not in self._calls:
+            self._calls[name] = _OperatorCall(name)
+        return self._calls[name]
+
+
+class _Ops:
+    def __init__(self):
+        self._namespaces = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        if name not in self._namespaces:
+            self._namespaces[name] = _OperatorNamespace()
+        return self._namespaces[name]
+
+
+def _context():
+    return sys.modules["bpy"].context
+
+
+def _build_bpy(state):
+    bpy = types.ModuleType("bpy")
+
+    bpy_types = types.ModuleType("bpy.types")
+    for cls in (Operator, Panel, PropertyGroup, AddonPreferences, WindowManager, SpaceView3D):
+        setattr(bpy_types, cls.__name__, cls)
+
+    props = types.ModuleType("bpy.props")
+    props.BoolProperty = _props_factory('BOOL')
+    props.IntProperty = _props_factory('INT')
+    props.FloatProperty = _props_factory('FLOAT')
+    props.FloatVectorProperty = _props_factory('VECTOR')
+    props.StringProperty = _props_factory('STRING')
+    props.EnumProperty = _enum_property
+    props.CollectionProperty = _props_factory('COLLECTION')
+    props.PointerProperty = _props_factory('POINTER')
+
+    app = types.ModuleType("bpy.app")
+    handlers = types.ModuleType("bpy.app.handlers")
+
+    for name in ("load_pre", "load_post", "scene_update_pre", "scene_update_post", "save_pre"):
+        setattr(handlers, name, [])
+
+    def persistent(func):
+        return func
+
+    handlers.persistent = persistent
+    app.handlers = handlers
+    app.version = (2, 77, 0)
+    app.tempdir = "/tmp/"
+    app.binary_path_python = sys.executable
+
+    utils = types.ModuleType("bpy.utils")
+    utils.register_class = lambda cls: state.registered.add(cls)
+    utils.unregister_class = lambda cls: state.registered.discard(cls)
+
+    path = types.ModuleType("bpy.path")
+    path.abspath = lambda filepath: filepath
+
+    bpy.types = bpy_types
+    bpy.props = props
+    bpy.app = app
+    bpy.utils = utils
+    bpy.path = path
+    bpy.ops = _Ops()
+    bpy.data = types.SimpleNamespace(screens=[], objects=[], scenes=[], meshes=[], is_dirty=False)
+    bpy.context = None
+
+    return bpy, {
+            "bpy.types": bpy_types,
+            "bpy.props": props,
+            "bpy.app": app,
+            "bpy.app.handlers": handlers,
+            "bpy.utils": utils,
+            "bpy.path": path,
+            }
+
+
+# ############################################################
+# blf
+# ############################################################
+
+def _build_blf():
+    blf = types.ModuleType("blf")
+    blf.SHADOW = 4
+
+    for name in ("enable", "disable", "shadow", "shadow_offset", "position", "size", "draw"):
+        setattr(blf, name, lambda *args: None)
+
+    return blf
+
+
+# ############################################################
+# Installation
+# ############################################################
+
+class State:
+    """
+    Counters shared by the stand-in modules
+    """
+    def __init__(self):
+        self.gl_calls = 0
+        self.gl_names = 0
+        self.draw_calls = 0
+        self.drawn_objects = 0
+        self.rna_updates = 0
+        self.draw_cost = False
+        self.offscreens_created = 0
+        self.offscreens_freed = 0
+        self.viewport = [0, 0, 1920, 1080]
+        self.registered = set()
+
+    def reset_counters(self):
+        self.gl_calls = 0
+        self.draw_calls = 0
+        self.drawn_objects = 0
+        self.rna_updates = 0
+
+
+state = None
+
+
+def install():
+    """
+    Register the stand-in modules in ``sys.modules``
+
+    :return: the counters shared by the stand-in modules
+    :rtype: :class:`State`
+    """
+    global state
+
+    if state is not None:
+        return state
+
+    state = State()
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Matrix = Matrix
+    mathutils.Quaternion = Quaternion
+    mathutils.Vector = Vector
+    mathutils.Euler = Euler
+
+    gpu = _build_gpu(state)
+    bpy, submodules = _build_bpy(state)
+
+    sys.modules["mathutils"] = mathutils
+    sys.modules["bgl"] = _build_bgl(state)
+    sys.modules["blf"] = _build_blf()
+    sys.modules["gpu"] = gpu
+    sys.modules["gpu.offscreen"] = gpu.offscreen
+    sys.modules["bpy"] = bpy
+    sys.modules.update(submodules)
+
+    return state
@@ -0,0 +1,48 @@
+"""
+Visibility Benchmark
+====================
+
+Cost of hiding the scene objects in the viewport draw callbacks,
+for each hide method against the number of objects.
+
+Usage (from the repository root)::
+
+    $ python -m benchmark.visibility --objects 100 1000 5000 20000
+"""
+
+import argparse
+
+from .simulator import Simulator
+
+
+METHODS = ('OBJECT', 'BULK')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hide methods of the draw callbacks")
+    parser.add_argument("--frames", type=int, default=300, help="number of simulated frames")
+    parser.add_argument("--objects", type=int, nargs="+", default=[100, 1000, 5000, 20000], help="scene sizes")
+    parser.add_argument("--edit-interval", type=int, default=0, help="emulate a scene edit every N frames")
+    args = parser.parse_args(argv)
+
+    print("{0:>8} {1:>8} {2:>10} {3:>10} {4:>10} {5:>12}".format(
+          "objects", "method", "frame ms", "hide ms", "show ms", "rna/frame"))
+
+    for object_count in args.objects:
+        for method in METHODS:
+            simulator = Simulator(object_count, edit_interval=args.edit_interval)
+            result = simulator.run(args.frames, use_profiling=True, settings={"hide_method": method})
+            stages = result["stages"]
+
+            print("{0:>8} {1:>8} {2:>10.3f} {3:>10.4f} {4:>10.4f} {5:>12.1f}".format(
+                  object_count,
+                  method,
+                  result["mean_ms"],
+                  stages["pre_draw_hide"]["mean_ms"],
+                  stages["post_draw_show"]["mean_ms"],
+                  result["rna_updates_per_frame"],
+                  ))
+
+
+if __name__ == '__main__':
+    main()
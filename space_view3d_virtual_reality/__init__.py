@@ -34,6 +34,7 @@ import bpy
 
 from . import ui
 from . import operator
+from . import pool
 
 
 # ############################################################
@@ -50,16 +51,77 @@ class VirtualRealityPreferences(bpy.types.AddonPreferences):
         items=(("OCULUS", "Oculus", "Oculus - oculus.com"),
                ("OCULUS_LEGACY", "Oculus Legacy", "Oculus 0.5 - oculus.com"),
                ("DEBUG", "Debug", "Debug backend - no real HMD"),
+               ("REPLAY", "Replay", "Replay a recorded tracking session - no real HMD"),
+               ("EXTERNAL", "External Tracker", "Poses published by an external tracker - no real HMD"),
                ),
         default="OCULUS",
         )
 
+    replay_filepath = bpy.props.StringProperty(
+        name="Recording",
+        description="Tracking session to replay",
+        subtype='FILE_PATH',
+        )
+
+    replay_rate = bpy.props.FloatProperty(
+        name="Rate",
+        description="Playback speed of the recording",
+        default=1.0,
+        min=0.01,
+        max=10.0,
+        )
+
+    replay_start = bpy.props.FloatProperty(
+        name="Start",
+        description="Time (in seconds) of the recording to start the playback from",
+        default=0.0,
+        min=0.0,
+        subtype='TIME',
+        unit='TIME',
+        )
+
+    external_transport = bpy.props.EnumProperty(
+        name="Transport",
+        description="How the external tracker publishes the poses",
+        items=(("SHARED_MEMORY", "Shared Memory", "Memory mapped file"),
+               ("UDP", "UDP", "Localhost UDP socket"),
+               ),
+        default="SHARED_MEMORY",
+        )
+
+    external_address = bpy.props.StringProperty(
+        name="Address",
+        description="Shared memory file, or host:port of the UDP socket (empty for the default)",
+        default="",
+        )
+
+    debug_vsync = bpy.props.BoolProperty(
+        name="Simulate VSync",
+        description="Block the frame submission until the next refresh, like a compositor with vsync",
+        default=False,
+        )
+
     def draw(self, context):
         layout = self.layout
 
         row = layout.row()
         row.prop(self, "display_backend")
 
+        if self.display_backend in {'DEBUG', 'REPLAY', 'EXTERNAL'}:
+            layout.prop(self, "debug_vsync")
+
+        if self.display_backend == 'REPLAY':
+            col = layout.column()
+            col.prop(self, "replay_filepath")
+            row = col.row()
+            row.prop(self, "replay_rate")
+            row.prop(self, "replay_start")
+
+        elif self.display_backend == 'EXTERNAL':
+            row = layout.row()
+            row.prop(self, "external_transport", expand=True)
+            layout.prop(self, "external_address")
+
 
 # ############################################################
 # Un/Registration
@@ -78,6 +140,12 @@ def unregister():
     operator.unregister()
     ui.unregister()
 
+    # release the offscreens, buffers and programs kept between sessions
+    pool.clearPools()
+
+    from .opengl_helper import invalidate_shader_cache
+    invalidate_shader_cache(delete=True)
+
 
 if __name__ == '__main__':
     register()
@@ -0,0 +1,221 @@
+"""
+Bounding Volume Hierarchy
+*************************
+
+Hierarchy of the world space bounds of the scene objects
+
+The objects are sorted once along a Morton curve, every node then
+covers a contiguous range of them and ``BRANCHING`` nodes of a level
+are grouped under a node of the next. When objects move they keep their
+place (the hierarchy is loose), only the bounds of their ancestors are
+refitted; it is sorted again once the nodes grew twice as large.
+
+A query walks down from the top level and only visits the children of
+the nodes crossing the query volume, the nodes fully inside it take
+their whole range of objects at once. It needs NumPy.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BRANCHING = 8
+
+
+def _spreadBits(values):
+    """
+    Insert two zero bits between each of the 10 lowest bits
+    """
+    values = values & 0x3ff
+    values = (values | (values << 16)) & 0x30000ff
+    values = (values | (values << 8)) & 0x300f00f
+    values = (values | (values << 4)) & 0x30c30c3
+    values = (values | (values << 2)) & 0x9249249
+    return values
+
+
+def mortonOrder(centers):
+    """
+    Indices sorting the points along a Morton (Z-order) curve
+
+    :type centers: numpy.ndarray (n, 3)
+    :rtype: numpy.ndarray (n,)
+    """
+    if not len(centers):
+        return numpy.zeros(0, dtype=numpy.intp)
+
+    lower = centers.min(axis=0)
+    size = float((centers.max(axis=0) - lower).max()) or 1.0
+
+    cells = ((centers - lower) * (1023.0 / size)).astype(numpy.int64)
+    codes = _spreadBits(cells[:, 0]) | (_spreadBits(cells[:, 1]) << 1) | (_spreadBits(cells[:, 2]) << 2)
+    return numpy.argsort(codes, kind='mergesort')
+
+
+def _ranges(starts, stops):
+    """
+    Concatenation of numpy.arange(start, stop) of every pair
+    """
+    lengths = stops - starts
+    total = int(lengths.sum())
+
+    if not total:
+        return numpy.zeros(0, dtype=numpy.intp)
+
+    offsets = numpy.repeat(starts - numpy.cumsum(lengths) + lengths, lengths)
+    return offsets + numpy.arange(total)
+
+
+class BoundsHierarchy:
+    __slots__ = {
+        "count",
+        "order",
+        "_position",
+        "_levels",
+        "_spread",
+        }
+
+    def __init__(self):
+        self.count = 0
+        self.order = None
+        self._position = None
+        self._levels = []
+        self._spread = 0.0
+
+    def build(self, lower, upper):
+        """
+        Sort the objects and build all the levels
+
+        :param lower: minimum corner of the bounds of every object
+        :type lower: numpy.ndarray (n, 3)
+        :param upper: maximum corner of the bounds of every object
+        :type upper: numpy.ndarray (n, 3)
+        """
+        count = len(lower)
+        order = mortonOrder((lower + upper) * 0.5)
+
+        self.count = count
+        self.order = order
+        self._position = numpy.empty(count, dtype=numpy.intp)
+        self._position[order] = numpy.arange(count)
+
+        # level 0 are the objects themselves
+        self._levels = [(lower[order], upper[order])]
+        self._buildLevels()
+        self._spread = self._nodeSpread()
+
+    def _nodeSpread(self):
+        """
+        Sum of the sizes of the nodes right above the objects, they grow as the objects move apart
+        """
+        if len(self._levels) < 2:
+            return 0.0
+
+        lower, upper = self._levels[1]
+        return float((upper - lower).sum())
+
+    def _buildLevels(self):
+        levels = self._levels
+        del levels[1:]
+
+        while len(levels[-1][0]) > BRANCHING:
+            lower, upper = levels[-1]
+            starts = numpy.arange(0, len(lower), BRANCHING)
+            levels.append((numpy.minimum.reduceat(lower, starts, axis=0),
+                           numpy.maximum.reduceat(upper, starts, axis=0)))
+
+    def refit(self, indices, lower, upper):
+        """
+        Update the bounds of some objects, and of their ancestors only
+
+        :param indices: object indices
+        :type indices: numpy.ndarray
+        :param lower: their new minimum corner
+        :type lower: numpy.ndarray (len(indices), 3)
+        :param upper: their new maximum corner
+        :type upper: numpy.ndarray (len(indices), 3)
+        """
+        positions = self._position[indices]
+        levels = self._levels
+
+        levels[0][0][positions] = lower
+        levels[0][1][positions] = upper
+
+        if len(positions) > self.count // BRANCHING:
+            self._buildLevels()
+
+        else:
+            for level in range(1, len(levels)):
+                child_lower, child_upper = levels[level - 1]
+                positions = numpy.unique(positions // BRANCHING)
+
+                # clamped to the last child, which is harmless for min and max
+                children = numpy.minimum(positions[:, None] * BRANCHING + numpy.arange(BRANCHING), len(child_lower) - 1)
+
+                levels[level][0][positions] = child_lower[children].min(axis=1)
+                levels[level][1][positions] = child_upper[children].max(axis=1)
+
+        if self._nodeSpread() > 2.0 * self._spread:
+            # the nodes grew too loose, sort again
+            lower, upper = levels[0]
+            self.build(lower[self._position], upper[self._position])
+
+    def _query(self, classify):
+        """
+        Indices of the objects :func:`classify` doesn't reject
+
+        :param classify: function of the (lower, upper) bounds of some nodes,
+                         returning whether they are outside and whether they are inside the volume
+        """
+        if not self.count:
+            return numpy.zeros(0, dtype=numpy.intp)
+
+        found = []
+        top = len(self._levels) - 1
+        candidates = numpy.arange(len(self._levels[top][0]))
+
+        for level in range(top, -1, -1):
+            lower, upper = self._levels[level]
+            is_outside, is_inside = classify(lower[candidates], upper[candidates])
+
+            if level == 0:
+                found.append(candidates[~is_outside])
+                break
+
+            # the objects of a node are a contiguous range
+            span = BRANCHING ** level
+            inside = candidates[is_inside]
+            found.append(_ranges(inside * span, numpy.minimum((inside + 1) * span, self.count)))
+
+            crossing = candidates[~(is_outside | is_inside)]
+            candidates = (crossing[:, None] * BRANCHING + numpy.arange(BRANCHING)).ravel()
+            candidates = candidates[candidates < len(self._levels[level - 1][0])]
+
+        return self.order[numpy.concatenate(found)]
+
+    def frustum(self, planes):
+        """
+        Indices of the objects intersecting a frustum
+
+        :param planes: inward planes (a, b, c, d)
+        :type planes: numpy.ndarray (6, 4)
+        :rtype: numpy.ndarray
+        """
+        normals = planes[:, :3]
+        magnitudes = numpy.abs(normals)
+        offsets = planes[:, 3:]
+
+        def classify(lower, upper):
+            centers = ((lower + upper) * 0.5).T
+            extents = ((upper - lower) * 0.5).T
+
+            distance = normals.dot(centers) + offsets
+            spread = magnitudes.dot(extents)
+
+            # furthest and nearest corners along each plane normal
+            is_outside = (distance + spread).min(axis=0) < 0.0
+            is_inside = (distance - spread).min(axis=0) >= 0.0
+            return is_outside, is_inside
+
+        return self._query(classify)
@@ -0,0 +1,338 @@
+"""
+Capture
+*******
+
+Save what the headset showed, every frame, as image sequences
+
+The pixels come from the rotating readback buffers, the encoder threads
+copy them and write the poses, the PNG compression and the writing
+happen in encoder processes, so the frame loop never waits for zlib or
+the disk. The encoders run this file as a script with
+the Python of Blender (not the Blender binary, and without importing
+the add-on), a thread per encoder feeds them the images through a pipe.
+The pose of every frame goes to ``poses.csv`` next to the images.
+
+Every frame shown in the headset is saved, the frames the redraw
+elision skipped repeat the image of the previous one. When the encoders
+fall behind, frames are dropped (and counted) rather than stalling the
+session.
+"""
+
+import os
+import struct
+import subprocess
+import sys
+import threading
+import zlib
+
+from queue import Queue
+
+# filepath length, width, height, pixels length
+REQUEST = struct.Struct('<IIII')
+
+
+def encodePNG(pixels, width, height, level=1):
+    """
+    RGBA 8-bit PNG of bottom-up (OpenGL) pixels
+
+    :param pixels: width * height * 4 bytes
+    :type pixels: bytes
+    :param level: zlib compression level, favour speed
+    :type level: int
+    :rtype: bytes
+    """
+    stride = width * 4
+    rows = bytearray()
+
+    # PNG rows go top-down, each with a filter byte (0, no filter)
+    for offset in range((height - 1) * stride, -1, -stride):
+        rows.append(0)
+        rows += pixels[offset:offset + stride]
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(bytes(rows), level)),
+        chunk(b'IEND', b''),
+        ))
+
+
+def _encoder(stdin, stdout):
+    """
+    Run in an encoder process, write the images sent on stdin, answer each
+    with an empty line or the error
+    """
+    while True:
+        request = stdin.read(REQUEST.size)
+
+        if len(request) < REQUEST.size:
+            return
+
+        filepath_length, width, height, pixels_length = REQUEST.unpack(request)
+        filepath = stdin.read(filepath_length).decode('utf-8')
+        pixels = stdin.read(pixels_length)
+
+        try:
+            with open(filepath, 'wb') as f:
+                f.write(encodePNG(pixels, width, height))
+
+        except Exception as E:
+            stdout.write(str(E).replace("\n", " ").encode('utf-8'))
+
+        stdout.write(b"\n")
+        stdout.flush()
+
+
+class _Images:
+    """
+    Pixels of both eyes of a frame, views on the readback buffers until
+    an encoder thread copies them
+    """
+    __slots__ = {
+        "pixels",
+        "sizes",
+        "orientations",
+        "positions",
+        "_lock",
+        }
+
+    def __init__(self, pixels, sizes, orientations, positions):
+        self.pixels = list(pixels)
+        self.sizes = list(sizes)
+        self.orientations = orientations
+        self.positions = positions
+        self._lock = threading.Lock()
+
+    def get(self, eye):
+        """
+        The pixels of an eye, copied the first time
+        """
+        with self._lock:
+            pixels = self.pixels[eye]
+
+            if not isinstance(pixels, bytes):
+                pixels = self.pixels[eye] = bytes(pixels)
+
+            return pixels
+
+
+class FrameCapture:
+    __slots__ = {
+        "directory",
+        "written",
+        "dropped",
+        "exception",
+        "_queue",
+        "_encoders",
+        "_threads",
+        "_pending",
+        "_max_pending",
+        "_lock",
+        "_last",
+        "_poses",
+        "_poses_lock",
+        }
+
+    def __init__(self, directory, executable=None, max_workers=2, max_pending=8):
+        """
+        :param directory: folder of the image sequences, created if needed
+        :type directory: str
+        :param executable: Python interpreter of the encoders (bpy.app.binary_path_python in Blender)
+        :type executable: str
+        :param max_workers: number of encoder processes
+        :type max_workers: int
+        :param max_pending: frames waiting for the encoders before dropping the new ones
+        :type max_pending: int
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.written = 0
+        self.dropped = 0
+        self.exception = None
+        self._pending = 0
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._poses_lock = threading.Lock()
+        self._last = None
+        self._poses = None
+        self._queue = Queue()
+        self._encoders = []
+        self._threads = []
+
+        try:
+            self._poses = open(os.path.join(directory, "poses.csv"), 'w')
+
+            for i in range(max_workers):
+                encoder = subprocess.Popen(
+                        # isolated, the add-on folder would shadow the standard library modules
+                        (executable or sys.executable, "-I", os.path.abspath(__file__)),
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        )
+                self._encoders.append(encoder)
+
+                thread = threading.Thread(target=self._run, args=(encoder,), name="VirtualRealityCapture")
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+        except OSError:
+            self.close()
+            raise
+
+        self._poses.write("frame,timestamp,"
+                          "left_qw,left_qx,left_qy,left_qz,left_x,left_y,left_z,"
+                          "right_qw,right_qx,right_qy,right_qz,right_x,right_y,right_z\n")
+
+    def write(self, frame, timestamp, orientations, positions, pixels, sizes):
+        """
+        Queue the images of both eyes, the encoder threads copy the pixels
+
+        :param pixels: RGBA pixels of each eye, valid until the next call
+        :type pixels: list of bytes-like
+        :param sizes: (width, height) of each eye
+        :type sizes: list of tuple
+        :return: False if the frame was dropped
+        :rtype: bool
+        """
+        # the readback buffers rotate, the previous pixels must be copied before they are reused,
+        # the encoder threads have done it by now unless they are far behind
+        last = self._last
+        if last is not None:
+            last.get(0)
+            last.get(1)
+
+        self._last = _Images(pixels, sizes, orientations, positions)
+
+        if not self._queueFrame(frame, timestamp):
+            # the pixels are not copied, nothing to repeat
+            self._last = None
+            return False
+
+        return True
+
+    def repeat(self, frame, timestamp):
+        """
+        Queue the images of the last frame again, for a frame the headset
+        showed without redrawing it
+
+        :return: False if the frame was dropped
+        :rtype: bool
+        """
+        if self._last is None:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        return self._queueFrame(frame, timestamp)
+
+    def _queueFrame(self, frame, timestamp):
+        images = self._last
+
+        with self._lock:
+            # two images per frame
+            if self._pending >= 2 * self._max_pending:
+                self.dropped += 1
+                return False
+
+            self._pending += 2
+
+        # the pose row goes with the left image
+        pose = (frame, timestamp, images.orientations, images.positions)
+
+        for eye, name in enumerate(("left", "right")):
+            filepath = os.path.join(self.directory, "{0}_{1:06d}.png".format(name, frame))
+            self._queue.put((filepath, images, eye, pose if eye == 0 else None))
+
+        return True
+
+    def _writePose(self, frame, timestamp, orientations, positions):
+        values = [frame, timestamp]
+        for eye in range(2):
+            values.extend(orientations[eye])
+            values.extend(positions[eye])
+
+        self._poses.write(",".join(str(value) for value in values))
+        self._poses.write("\n")
+
+    def _run(self, encoder):
+        """
+        Feed an encoder, pipe writes and reads do not hold the GIL
+        """
+        while True:
+            # the images are taken in order, so are the pose rows
+            with self._poses_lock:
+                image = self._queue.get()
+
+                if image is None:
+                    return
+
+                filepath, images, eye, pose = image
+
+                if pose:
+                    self._writePose(*pose)
+
+            pixels = images.get(eye)
+            width, height = images.sizes[eye]
+            filepath = filepath.encode('utf-8')
+
+            try:
+                encoder.stdin.write(REQUEST.pack(len(filepath), width, height, len(pixels)))
+                encoder.stdin.write(filepath)
+                encoder.stdin.write(pixels)
+                encoder.stdin.flush()
+
+                error = encoder.stdout.readline()
+
+                if not error:
+                    error = b"encoder stopped"
+
+            except OSError as E:
+                error = str(E).encode('utf-8')
+
+            with self._lock:
+                self._pending -= 1
+
+                if error == b"\n":
+                    self.written += 1
+
+                elif self.exception is None:
+                    # kept for the interface
+                    self.exception = RuntimeError(error.decode('utf-8', 'replace').strip())
+
+    def _stop(self):
+        for thread in self._threads:
+            self._queue.put(None)
+
+        for thread in self._threads:
+            thread.join()
+
+        for encoder in self._encoders:
+            try:
+                encoder.stdin.close()
+            except OSError:
+                pass
+
+            encoder.wait()
+            encoder.stdout.close()
+
+        self._threads = []
+        self._encoders = []
+
+    def close(self):
+        """
+        Wait for the queued images to be written
+        """
+        self._stop()
+
+        if self._poses:
+            self._poses.close()
+
+
+if __name__ == "__main__":
+    _encoder(sys.stdin.buffer, sys.stdout.buffer)
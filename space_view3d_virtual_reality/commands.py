@@ -0,0 +1,131 @@
+"""
+Commands
+********
+
+Commands sent from the main window to the window drawing the HMD
+
+The commands live in memory, pushing and popping them does not touch RNA.
+Redundant commands are coalesced, so the queue does not pile up while
+the slave window is not redrawing. A copy of the queue is mirrored
+to RNA (outside of the drawing) only for the UI.
+"""
+
+from collections import deque
+
+
+class Commands:
+    recenter = 'RECENTER'
+    fullscreen = 'FULLSCREEN'
+    play = 'PLAY'
+    pause = 'PAUSE'
+    test = 'TEST'
+
+
+# commands of the same group are coalesced,
+# repeated commands are dropped and a new playback state replaces the pending one
+_GROUPS = {
+        Commands.recenter: Commands.recenter,
+        Commands.fullscreen: Commands.fullscreen,
+        Commands.play: 'PLAYBACK',
+        Commands.pause: 'PLAYBACK',
+        }
+
+
+class CommandBus:
+    __slots__ = {
+        "_queue",
+        "_pending",
+        "_length",
+        "_version",
+        "_mirrored",
+        }
+
+    def __init__(self):
+        self._queue = deque() # [action, is_valid]
+        self._pending = {} # group -> queue entry
+        self._length = 0
+        self._version = 0
+        self._mirrored = -1
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __iter__(self):
+        for action, is_valid in self._queue:
+            if is_valid:
+                yield action
+
+    def push(self, action):
+        """
+        Add a command, unless an equivalent one is already pending
+        """
+        group = _GROUPS.get(action)
+        entry = self._pending.get(group)
+
+        if entry is not None:
+            if entry[0] == action:
+                return
+
+            # invalidate the previous playback state, it is skipped when popped
+            entry[1] = False
+            self._length -= 1
+
+        entry = [action, True]
+        self._queue.append(entry)
+        self._length += 1
+        self._version += 1
+
+        if group is not None:
+            self._pending[group] = entry
+
+    def pop(self):
+        """
+        Get the oldest pending command
+
+        :rtype: str
+        """
+        queue = self._queue
+
+        while queue:
+            entry = queue.popleft()
+            action, is_valid = entry
+
+            if not is_valid:
+                continue
+
+            group = _GROUPS.get(action)
+            if self._pending.get(group) is entry:
+                del self._pending[group]
+
+            self._length -= 1
+            self._version += 1
+            return action
+
+        raise IndexError("pop from an empty command bus")
+
+    def clear(self):
+        self._queue.clear()
+        self._pending.clear()
+        self._length = 0
+        self._version += 1
+
+    def mirror(self, collection):
+        """
+        Copy the pending commands to a collection of :class:`VirtualRealityCommandInfo`,
+        only when they changed since the last call
+        """
+        if self._mirrored == self._version:
+            return
+
+        self._mirrored = self._version
+        collection.clear()
+
+        for action in self:
+            command = collection.add()
+            command.action = action
+
+
+command_bus = CommandBus()
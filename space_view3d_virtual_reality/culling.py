@@ -0,0 +1,313 @@
+"""
+Culling
+*******
+
+Hide the objects outside of both eye frustums while the HMD renders
+
+The world space bounds of all the objects are kept in a bounding volume
+hierarchy, refitted with the objects updated in the scene. Every frame
+it is queried with the planes of both eye frustums, an object is drawn
+if it is inside any of them.
+
+Only the geometry is culled, lamps and empties (that may instance
+groups) are always drawn. It needs NumPy, ``numpy`` is None otherwise.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .bvh import BoundsHierarchy
+
+from .visibility import (
+        add_scene_update_listener,
+        remove_scene_update_listener,
+        scene_generation,
+        )
+
+GEOMETRY_TYPES = {'MESH', 'CURVE', 'SURFACE', 'META', 'FONT'}
+
+IDENTITY = ((1.0, 0.0, 0.0, 0.0),
+            (0.0, 1.0, 0.0, 0.0),
+            (0.0, 0.0, 1.0, 0.0),
+            (0.0, 0.0, 0.0, 1.0))
+
+
+def frustumPlanes(projection_matrix, modelview_matrix):
+    """
+    World space planes (a, b, c, d) of the frustum, pointing inwards
+
+    :rtype: numpy.ndarray (6, 4)
+    """
+    clip = numpy.asarray(projection_matrix, dtype=numpy.float64).dot(
+           numpy.asarray(modelview_matrix, dtype=numpy.float64))
+
+    # Gribb & Hartmann, -w <= x, y, z <= w
+    return numpy.array((clip[3] + clip[0],
+                        clip[3] - clip[0],
+                        clip[3] + clip[1],
+                        clip[3] - clip[1],
+                        clip[3] + clip[2],
+                        clip[3] - clip[2]))
+
+
+def worldBounds(matrices, corners):
+    """
+    World space axis aligned bounds of the objects
+
+    :param matrices: world matrices (rows)
+    :type matrices: numpy.ndarray (n, 4, 4)
+    :param corners: local bounding box corners
+    :type corners: numpy.ndarray (n, 8, 3)
+    :return: minimum and maximum corners
+    :rtype: tuple of numpy.ndarray (n, 3)
+    """
+    world = numpy.einsum('nij,nkj->nki', matrices[:, :3, :3], corners) + matrices[:, None, :3, 3]
+    return world.min(axis=1), world.max(axis=1)
+
+
+class SceneBounds:
+    """
+    World space bounds and hide flags of the scene objects, in a :class:`bvh.BoundsHierarchy`
+
+    Only the objects tagged in the scene updates are read again and refitted,
+    everything is read when objects are added or removed.
+    """
+    __slots__ = {
+        "count",
+        "objects",
+        "tree",
+        "centers",
+        "radii",
+        "flags",
+        "cullable",
+        "generation",
+        "structure",
+        "_scene_generation",
+        "_scene_hash",
+        "_dirty",
+        "_updated",
+        "_is_applied",
+        }
+
+    def __init__(self):
+        self.count = 0
+        self.objects = []
+        self.tree = BoundsHierarchy()
+        self.centers = None
+        self.radii = None
+        self.flags = None
+        self.cullable = None
+        self.generation = 0
+        self.structure = 0
+        self._scene_generation = -1
+        self._scene_hash = None
+        self._dirty = None
+        self._updated = None
+        self._is_applied = False
+
+        add_scene_update_listener(self._sceneUpdate)
+
+    def close(self):
+        remove_scene_update_listener(self._sceneUpdate)
+
+    def _sceneUpdate(self, scene):
+        """
+        Collect the updated objects, their flags are only valid during the scene update
+        """
+        dirty = self._dirty
+        if dirty is None:
+            return
+
+        objects = scene.objects
+        if self._scene_hash != hash(scene) or self.count != len(objects):
+            self._dirty = None
+            return
+
+        updated = self._updated
+        objects.foreach_get("is_updated", updated)
+        dirty |= updated
+
+        objects.foreach_get("is_updated_data", updated)
+        dirty |= updated
+
+    def update(self, scene):
+        """
+        Read the bounds of the updated objects, if the scene changed
+
+        :return: whether the bounds changed
+        :rtype: bool
+        """
+        objects = scene.objects
+        count = len(objects)
+
+        if self.count != count or self._scene_hash != hash(scene):
+            self._build(scene)
+
+        elif self._scene_generation != scene_generation():
+            self._refit(scene)
+
+        else:
+            return False
+
+        self.flags = numpy.zeros(count, dtype=bool)
+        objects.foreach_get("hide", self.flags)
+
+        self.generation += 1
+        self._scene_generation = scene_generation()
+        self._dirty = numpy.zeros(count, dtype=bool)
+        return True
+
+    def _readBounds(self, objects):
+        count = len(objects)
+
+        matrices = numpy.zeros(count * 16, dtype=numpy.float32)
+        objects.foreach_get("matrix_world", matrices)
+
+        # stored column by column, transpose to get the rows
+        matrices = matrices.reshape(count, 4, 4).transpose(0, 2, 1)
+
+        corners = numpy.zeros(count * 24, dtype=numpy.float32)
+        objects.foreach_get("bound_box", corners)
+
+        return worldBounds(matrices, corners.reshape(count, 8, 3))
+
+    def _setBounds(self, indices, lower, upper):
+        extents = (upper - lower) * 0.5
+        self.centers[indices] = (lower + upper) * 0.5
+        self.radii[indices] = numpy.sqrt((extents * extents).sum(axis=1))
+
+    def _build(self, scene):
+        objects = scene.objects
+        count = len(objects)
+
+        # index lookups in the scene objects are not constant time
+        self.objects = list(objects)
+
+        # the type is not available to foreach_get, only read when objects are added or removed
+        self.cullable = numpy.fromiter((ob.type in GEOMETRY_TYPES for ob in objects), dtype=bool, count=count)
+
+        lower, upper = self._readBounds(objects)
+        self.centers = numpy.empty((count, 3), dtype=numpy.float32)
+        self.radii = numpy.empty(count, dtype=numpy.float32)
+        self._setBounds(slice(None), lower, upper)
+        self.tree.build(lower, upper)
+
+        self._updated = numpy.zeros(count, dtype=bool)
+        self.count = count
+        self.structure += 1
+        self._scene_hash = hash(scene)
+
+    def _refit(self, scene):
+        dirty = self._dirty
+
+        if dirty is None:
+            indices = numpy.arange(self.count)
+        else:
+            indices = numpy.flatnonzero(dirty)
+
+        if not len(indices):
+            return
+
+        if len(indices) > self.count // 8:
+            lower, upper = self._readBounds(scene.objects)
+            lower = lower[indices]
+            upper = upper[indices]
+
+        else:
+            objects = self.objects
+            matrices = numpy.array([objects[i].matrix_world for i in indices], dtype=numpy.float32)
+            corners = numpy.array([objects[i].bound_box for i in indices], dtype=numpy.float32)
+            lower, upper = worldBounds(matrices, corners)
+
+        self._setBounds(indices, lower, upper)
+        self.tree.refit(indices, lower, upper)
+
+    def viewObjects(self, perspective_matrix):
+        """
+        The objects a view draws: the geometry in its frustum, and all the others
+
+        :param perspective_matrix: projection * view matrix
+        :type perspective_matrix: :class:`mathutils.Matrix`
+        :rtype: list
+        """
+        indices = self.tree.frustum(frustumPlanes(perspective_matrix, IDENTITY))
+        indices = numpy.union1d(indices, numpy.flatnonzero(~self.cullable))
+
+        objects = self.objects
+        return [objects[i] for i in indices]
+
+    def hide(self, scene, hidden):
+        """
+        Replace the hide flags for the HMD drawing
+
+        :param hidden: hide flag of every object, :attr:`flags` when nothing changes
+        :type hidden: numpy.ndarray
+        """
+        if hidden is not self.flags:
+            scene.objects.foreach_set("hide", hidden)
+            self._is_applied = True
+
+    def show(self, scene):
+        """
+        Restore the hide flags replaced in :meth:`hide`
+        """
+        if self._is_applied:
+            scene.objects.foreach_set("hide", self.flags)
+            self._is_applied = False
+
+
+class FrustumCuller:
+    __slots__ = {
+        "culled",
+        "drawn",
+        "cost",
+        "saved",
+        }
+
+    def __init__(self):
+        self.culled = 0
+        self.drawn = 0
+        self.cost = 0.0
+        self.saved = 0.0
+
+    def apply(self, scene_bounds, matrices, hidden):
+        """
+        Hide the objects outside of all the frustums
+
+        :param matrices: (projection, modelview) matrices of each eye
+        :type matrices: list of tuple
+        :param hidden: hide flag of every object, it is not modified
+        :type hidden: numpy.ndarray
+        :return: the new hide flags
+        :rtype: numpy.ndarray
+        """
+        is_visible = numpy.zeros(scene_bounds.count, dtype=bool)
+
+        for projection_matrix, modelview_matrix in matrices:
+            planes = frustumPlanes(projection_matrix, modelview_matrix)
+            is_visible[scene_bounds.tree.frustum(planes)] = True
+
+        culled = scene_bounds.cullable & ~is_visible & ~hidden
+        self.culled = int(culled.sum())
+
+        if self.culled:
+            hidden = hidden | culled
+
+        self.drawn = scene_bounds.count - int(hidden.sum())
+        return hidden
+
+    def measure(self, cost, draw_time):
+        """
+        Weigh the culling against the drawing it saved, the culled objects
+        are assumed to take the same time to draw as the ones drawn, an upper
+        bound since part of the drawing time does not depend on the objects
+
+        :param cost: time (in seconds) spent culling, and hiding and showing the objects
+        :type cost: float
+        :param draw_time: time (in seconds) spent drawing both eyes
+        :type draw_time: float
+        """
+        self.cost = cost
+        self.saved = draw_time * self.culled / self.drawn if self.drawn else 0.0
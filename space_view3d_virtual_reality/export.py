@@ -0,0 +1,287 @@
+"""
+Frame Export
+************
+
+Publish the eye frames in a shared memory ring, for other local processes
+
+The ring is a memory mapped file: a header followed by a number of slots,
+each with the frame metadata and the RGBA pixels of both eyes (native
+little-endian):
+
+    header: magic, uint16 version, uint16 slot count, uint32 width,
+            uint32 height (largest eye size), uint64 latest frame,
+            uint32 layout
+    slot:   uint32 sequence, uint64 frame, float64 timestamp,
+            float32 orientation (w, x, y, z) and position of each eye,
+            uint32 width and uint32 height of each eye, then the pixels
+            of the left eye followed by the ones of the right eye
+
+The slot sequence is a seqlock (odd while the frame is written), the
+latest frame is updated once its slot is complete. The writer never
+waits for the readers, and readers access the pixels in place.
+
+Each eye has room for width * height pixels of the header. A larger eye
+grows the ring: the file is extended, the slots are cleared and the
+layout is incremented, readers map the file again when it changes.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+
+from .readback import copyPixels
+
+MAGIC = b'VRFX'
+VERSION = 2
+
+HEADER = struct.Struct('<4sHHIIQI')
+HEADER_SIZE = 64
+
+SLOT = struct.Struct('<I4xQd14fIIII')
+SLOT_SIZE = 96
+SEQUENCE = struct.Struct('<I')
+LATEST = struct.Struct('<Q')
+LATEST_OFFSET = 16
+LAYOUT = struct.Struct('<I')
+LAYOUT_OFFSET = 24
+
+DEFAULT_FILEPATH = os.path.join(tempfile.gettempdir(), "virtual_reality_frames")
+
+
+def _slotStride(width, height):
+    return SLOT_SIZE + 2 * width * height * 4
+
+
+class FrameExport:
+    __slots__ = {
+        "filepath",
+        "width",
+        "height",
+        "slot_count",
+        "published",
+        "dropped",
+        "_file",
+        "_data",
+        "_view",
+        "_stride",
+        "_sequences",
+        "_layout",
+        }
+
+    def __init__(self, filepath, width, height, slot_count=3):
+        """
+        :param filepath: file to map, it is overwritten
+        :type filepath: str
+        :param width: largest eye width
+        :type width: int
+        :param height: largest eye height
+        :type height: int
+        :param slot_count: number of frames in the ring
+        :type slot_count: int
+        """
+        self.filepath = filepath
+        self.slot_count = slot_count
+        self.published = 0
+        self.dropped = 0
+        self._data = None
+        self._view = None
+        self._layout = 0
+
+        self._file = open(filepath, 'w+b')
+        self._allocate(width, height)
+
+    def _allocate(self, width, height):
+        """
+        Map the ring for eyes up to width * height pixels, the previous frames are lost
+        """
+        stride = _slotStride(width, height)
+        size = HEADER_SIZE + self.slot_count * stride
+
+        if self._data is not None:
+            self._view.release()
+            self._data.close()
+            self._data = None
+
+        # the file only grows, readers still mapping the previous size stay valid
+        self._file.truncate(max(size, os.fstat(self._file.fileno()).st_size))
+        self._data = mmap.mmap(self._file.fileno(), size)
+        self._view = memoryview(self._data)
+
+        self.width = width
+        self.height = height
+        self._stride = stride
+        self._sequences = [0] * self.slot_count
+        self._layout += 1
+
+        for index in range(self.slot_count):
+            SLOT.pack_into(self._data, HEADER_SIZE + index * stride, 0, 0, 0.0, *((0.0,) * 14), 0, 0, 0, 0)
+
+        HEADER.pack_into(self._data, 0, MAGIC, VERSION, self.slot_count, width, height, 0, self._layout)
+
+    def publish(self, frame, timestamp, orientations, positions, pixels, sizes):
+        """
+        Write a frame in its slot of the ring
+
+        :param frame: frame index, starting at 1
+        :type frame: int
+        :param pixels: RGBA pixels of each eye
+        :type pixels: list of bytes-like
+        :param sizes: (width, height) of each eye
+        :type sizes: list of tuple
+        :return: False if the frame was dropped
+        :rtype: bool
+        """
+        capacity = self.width * self.height
+
+        if any(width * height > capacity for width, height in sizes):
+            try:
+                self._allocate(max(self.width, *(size[0] for size in sizes)),
+                               max(self.height, *(size[1] for size in sizes)))
+
+            except (OSError, ValueError) as E:
+                print("Frame export: {0}".format(E))
+                self.dropped += 1
+                return False
+
+        data = self._data
+        index = frame % self.slot_count
+        offset = HEADER_SIZE + index * self._stride
+
+        # odd sequence while writing
+        sequence = self._sequences[index] + 1
+        SEQUENCE.pack_into(data, offset, sequence)
+
+        orientation_left, orientation_right = orientations
+        position_left, position_right = positions
+
+        SLOT.pack_into(data, offset, sequence, frame, timestamp,
+                       *orientation_left, *position_left,
+                       *orientation_right, *position_right,
+                       *sizes[0], *sizes[1])
+
+        start = offset + SLOT_SIZE
+
+        for eye in range(2):
+            width, height = sizes[eye]
+            eye_size = width * height * 4
+            copyPixels(self._view[start:start + eye_size], pixels[eye])
+            start += eye_size
+
+        sequence += 1
+        SEQUENCE.pack_into(data, offset, sequence)
+        self._sequences[index] = sequence
+
+        LATEST.pack_into(data, LATEST_OFFSET, frame)
+        self.published += 1
+        return True
+
+    def close(self):
+        self._view.release()
+        self._data.close()
+        self._file.close()
+
+
+class FrameReader:
+    """
+    Consumer side of the ring, the reference for other processes
+    """
+    __slots__ = {
+        "slot_count",
+        "_file",
+        "_data",
+        "_view",
+        "_stride",
+        "_layout",
+        }
+
+    def __init__(self, filepath=DEFAULT_FILEPATH):
+        self._file = open(filepath, 'rb')
+        self._data = None
+
+        if not self._map():
+            self.close()
+            raise ValueError("Invalid frame export: \"{0}\"".format(filepath))
+
+    def _map(self):
+        """
+        Map the file with the current layout of the ring
+        """
+        if self._data is not None:
+            self._unmap()
+
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._data)
+
+        magic, version, self.slot_count, width, height, latest, self._layout = HEADER.unpack_from(self._data, 0)
+        self._stride = _slotStride(width, height)
+
+        return magic == MAGIC and version == VERSION
+
+    def _unmap(self):
+        self._view.release()
+
+        try:
+            self._data.close()
+
+        except BufferError:
+            # pixels given out are still in use, it is unmapped once they are released
+            pass
+
+        self._data = None
+
+    @property
+    def latest(self):
+        """
+        Index of the latest complete frame, 0 if none yet
+        """
+        return LATEST.unpack_from(self._data, LATEST_OFFSET)[0]
+
+    def read(self, frame=None):
+        """
+        Metadata and pixels of a frame, the pixels are views on the shared memory
+
+        :return: (sequence, frame, timestamp, orientations, positions, pixels, sizes),
+                 or None if the frame is being written or was already overwritten
+        """
+        if LAYOUT.unpack_from(self._data, LAYOUT_OFFSET)[0] != self._layout:
+            # the ring grew, the views returned before are on the previous mapping
+            self._map()
+
+        if frame is None:
+            frame = self.latest
+
+        offset = HEADER_SIZE + (frame % self.slot_count) * self._stride
+        values = SLOT.unpack_from(self._data, offset)
+        sequence = values[0]
+
+        if sequence & 1 or values[1] != frame:
+            return None
+
+        sizes = (values[17:19], values[19:21])
+        left_size = sizes[0][0] * sizes[0][1] * 4
+        right_size = sizes[1][0] * sizes[1][1] * 4
+        start = offset + SLOT_SIZE
+
+        orientations = (values[3:7], values[10:14])
+        positions = (values[7:10], values[14:17])
+        pixels = (self._view[start:start + left_size],
+                  self._view[start + left_size:start + left_size + right_size])
+
+        return sequence, frame, values[2], orientations, positions, pixels, sizes
+
+    def isValid(self, frame, sequence):
+        """
+        Whether the frame read with :meth:`read` was not overwritten in the meantime
+        """
+        if LAYOUT.unpack_from(self._data, LAYOUT_OFFSET)[0] != self._layout:
+            return False
+
+        offset = HEADER_SIZE + (frame % self.slot_count) * self._stride
+        return SEQUENCE.unpack_from(self._data, offset)[0] == sequence
+
+    def close(self):
+        if self._data is not None:
+            self._unmap()
+
+        self._file.close()
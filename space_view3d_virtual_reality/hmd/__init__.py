@@ -6,15 +6,88 @@ from mathutils import (
         Quaternion,
         )
 
+from time import perf_counter
+
 import gpu
 
+from . import matrices
+
+from ..pool import newPool
+
+from ..stereo import viewportProjection
+
+from ..visibility import scene_generation
+
+from .prediction import PosePredictor
+
+from .recording import Recorder
+
+from .submission import SubmissionWorker
+
+from .resolution import (
+        ResolutionScaler,
+        resolutionTiers,
+        )
+
 VERBOSE = True
 
 
+# ############################################################
+# Offscreen Pool
+# ############################################################
+
+def _newOffscreen(key):
+    width, height, format, samples = key
+    return gpu.offscreen.new(width, height, samples)
+
+
+def _freeOffscreen(offscreen):
+    if hasattr(offscreen, "free"):
+        offscreen.free()
+
+
+# offscreens survive disable/enable of the display, in direct mode only:
+# the framebuffers belong to the GL context they were created in, they are
+# not shared between windows and the slave window is closed on quit
+offscreen_pool = newPool(_newOffscreen, _freeOffscreen)
+
+
 # ############################################################
 # Data structs
 # ############################################################
 
+# display backend: module defining its HMD class, imported on first use
+backends = {
+        'OCULUS': ".oculus",
+        'OCULUS_LEGACY': ".oculus_legacy",
+        'DEBUG': ".debug",
+        'REPLAY': ".replay",
+        'EXTERNAL': ".external",
+        }
+
+_backend_classes = {}
+
+
+def backendClass(display_backend):
+    """
+    The HMD class of a display backend, its module is only imported the first time
+
+    :param display_backend: backend engine
+    :type display_backend: str
+    """
+    cls = _backend_classes.get(display_backend)
+
+    if cls is None:
+        if display_backend not in backends:
+            assert False, "Display Backend \"{0}\" not implemented".format(display_backend)
+
+        from importlib import import_module
+        cls = import_module(backends[display_backend], __name__).HMD
+        _backend_classes[display_backend] = cls
+
+    return cls
+
+
 def HMD(display_backend, context, error_callback):
     """
     return the head mounted display device class
@@ -27,20 +100,7 @@ def HMD(display_backend, context, error_callback):
     :param error_callback: error handler
     :type error_callback: func(message, is_fatal)
     """
-    from .oculus import HMD as OculusHMD
-    from .oculus_legacy import HMD as OculusLegacyHMD
-    from .debug import HMD as DebugHMD
-
-    displays = {
-            'OCULUS':OculusHMD,
-            'OCULUS_LEGACY':OculusLegacyHMD,
-            'DEBUG':DebugHMD,
-            }
-
-    if display_backend not in displays:
-        assert False, "Display Backend \"{0}\" not implemented".format(display_backend)
-
-    return displays[display_backend](context, error_callback)
+    return backendClass(display_backend)(context, error_callback)
 
 
 # ############################################################
@@ -63,8 +123,27 @@ class baseHMD:
         "_modelview_matrix",
         "_near",
         "_far",
+        "_view_matrix_cache",
+        "_clipping_cache",
+        "_predictor",
+        "_pose_timestamp",
+        "_pose_age",
+        "_resolution_scaler",
+        "_offscreen_tiers",
+        "_recorder",
+        "_submission",
+        "_frame_wait",
+        "_stereo_layout",
+        "_viewport",
         }
 
+    # refresh rate in Hz, set per device
+    _refresh_rate = 75.0
+
+    # pose prediction, set per device
+    _use_prediction = False
+    _prediction_latency = 0.0
+
     def __init__(self, name, is_direct_mode, context, error_callback):
         self._name = name
         self._is_direct_mode = is_direct_mode
@@ -78,6 +157,18 @@ class baseHMD:
         self._offscreen = [None, None]
         self._eye_orientation_raw = [[1.0, 0.0, 0.0, 0.0], [1.0, 0.0, 0.0, 0.0]]
         self._eye_position_raw = [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+        self._view_matrix_cache = None
+        self._clipping_cache = None
+        self._predictor = PosePredictor(self._use_prediction, self._prediction_latency)
+        self._pose_timestamp = 0.0
+        self._pose_age = 0.0
+        self._resolution_scaler = None
+        self._offscreen_tiers = []
+        self._recorder = None
+        self._submission = None
+        self._frame_wait = 0.0
+        self._stereo_layout = 'SEPARATE'
+        self._viewport = [(0, 0, 0, 0), (0, 0, 0, 0)]
         self._scale = self._calculateScale(context)
 
         self._updateViewClipping(context)
@@ -86,6 +177,24 @@ class baseHMD:
     def is_direct_mode(self):
         return self._is_direct_mode
 
+    @property
+    def refresh_rate(self):
+        return self._refresh_rate
+
+    @property
+    def pose_age(self):
+        """
+        Time (in seconds) between reading the tracking sample and using it
+        """
+        return self._pose_age
+
+    @property
+    def frame_wait(self):
+        """
+        Time (in seconds) the latest frame submission blocked the main thread waiting for the device
+        """
+        return self._frame_wait
+
     @property
     def width(self):
         return self._width[self._current_eye]
@@ -114,13 +223,107 @@ class baseHMD:
     def projection_matrix(self):
         return self._projection_matrix[self._current_eye]
 
+    @property
+    def is_side_by_side(self):
+        """
+        Whether both eyes are drawn in the same offscreen
+        """
+        return self._stereo_layout == 'SIDE_BY_SIDE'
+
+    @property
+    def viewport(self):
+        """
+        Rectangle (x, y, width, height) of the eye in its offscreen
+        """
+        return self._viewport[self._current_eye]
+
+    @property
+    def viewport_projection_matrix(self):
+        """
+        Projection matrix drawing the eye in its viewport, the whole offscreen unless side-by-side
+        """
+        projection_matrix = self._projection_matrix[self._current_eye]
+
+        if self._stereo_layout != 'SIDE_BY_SIDE':
+            return projection_matrix
+
+        offscreen = self.offscreen
+        return viewportProjection(projection_matrix, self.viewport, offscreen.width, offscreen.height)
+
     @property
     def modelview_matrix(self):
         return self._modelview_matrix[self._current_eye]
 
+    @property
+    def resolution_scale(self):
+        """
+        Scale of the eye buffers in relation to the native resolution
+        """
+        if self._resolution_scaler:
+            return self._resolution_scaler.scale
+        return 1.0
+
+    def pose(self):
+        """
+        Tracking used for the current frame
+
+        :return: timestamp, orientations (w, x, y, z) and positions of both eyes
+        :rtype: (float, tuple, tuple)
+        """
+        return (self._pose_timestamp,
+                tuple(tuple(orientation) for orientation in self._eye_orientation_raw),
+                tuple(tuple(position) for position in self._eye_position_raw))
+
     def setEye(self, eye):
         self._current_eye = int(bool(eye))
 
+    def setDynamicResolution(self, is_enabled, floor=0.5):
+        """
+        Scale the eye buffers based on the frame time, call it before init()
+
+        :param is_enabled: whether to scale the resolution
+        :type is_enabled: bool
+        :param floor: smallest scale factor
+        :type floor: float
+        """
+        if is_enabled:
+            self._resolution_scaler = ResolutionScaler(resolutionTiers(floor))
+        else:
+            self._resolution_scaler = None
+
+    def setStereoLayout(self, layout):
+        """
+        How the eyes are laid out in the offscreens, call it before init()
+
+        :param layout: 'SEPARATE' for an offscreen per eye, 'SIDE_BY_SIDE' for a shared one
+        :type layout: str
+        """
+        self._stereo_layout = layout
+
+    def setAsyncSubmission(self, is_enabled):
+        """
+        Send the frames to the device from a worker thread, call it before init()
+        """
+        if is_enabled:
+            self._submission = SubmissionWorker(self._frameWait)
+        else:
+            self._submission = None
+
+    def startRecording(self, filepath):
+        """
+        Save the raw tracking samples of the session
+
+        :param filepath: file to write, it is overwritten
+        :type filepath: str
+        """
+        self.stopRecording()
+        self._recorder = Recorder(filepath)
+
+    def stopRecording(self):
+        if self._recorder:
+            self._recorder.close()
+            self._recorder = None
+
     def init(self):
         """
         Initialize device
@@ -129,34 +332,197 @@ class baseHMD:
         :rtype: bool
         """
         try:
-            for i in range(2):
-                self._offscreen[i] = gpu.offscreen.new(self._width[i], self._height[i], 0)
-                if hasattr(self._offscreen[i], "color_texture"):
-                    self._color_texture[i] = self._offscreen[i].color_texture
-                else: # TODO remove this once the patch is merged
-                    self._color_texture[i] = self._offscreen[i].color_object
+            if self._resolution_scaler:
+                scales = self._resolution_scaler.tiers
+            else:
+                scales = (1.0,)
+
+            # all the tiers are created upfront, not in the middle of the session
+            self._offscreen_tiers = []
+            for scale in scales:
+                offscreens = []
+                color_textures = []
+                viewports = []
+                self._offscreen_tiers.append((offscreens, color_textures, viewports))
+
+                sizes = [(max(1, int(self._width[i] * scale)), max(1, int(self._height[i] * scale))) for i in range(2)]
+
+                if self._stereo_layout == 'SIDE_BY_SIDE':
+                    # both eyes share a double width offscreen, left eye on the left half
+                    width = sizes[0][0] + sizes[1][0]
+                    height = max(sizes[0][1], sizes[1][1])
+                    offscreen = self._acquireOffscreen(width, height, offscreens, color_textures)
+
+                    offscreens.append(offscreen)
+                    color_textures.append(color_textures[0])
+                    viewports.append((0, 0, sizes[0][0], sizes[0][1]))
+                    viewports.append((sizes[0][0], 0, sizes[1][0], sizes[1][1]))
+
+                else:
+                    for width, height in sizes:
+                        self._acquireOffscreen(width, height, offscreens, color_textures)
+                        viewports.append((0, 0, width, height))
+
+            self._useResolutionTier(0)
+
+            if self._submission:
+                self._submission.start()
 
         except Exception as E:
             print(E)
-            self._offscreen[0] = None
-            self._offscreen[1] = None
+            self._releaseOffscreens()
             return False
 
         else:
             return True
 
+    def _acquireOffscreen(self, width, height, offscreens, color_textures):
+        key = (width, height, 'RGBA8', 0)
+
+        if self._is_direct_mode:
+            offscreen = offscreen_pool.acquire(key)
+        else:
+            offscreen = _newOffscreen(key)
+
+        offscreens.append(offscreen)
+
+        if hasattr(offscreen, "color_texture"):
+            color_textures.append(offscreen.color_texture)
+        else: # TODO remove this once the patch is merged
+            color_textures.append(offscreen.color_object)
+
+        return offscreen
+
+    def _releaseOffscreens(self):
+        """
+        Give the offscreens back to the pool, or free them with the slave window
+        """
+        for offscreens, color_textures, viewports in self._offscreen_tiers:
+            # side-by-side eyes share the offscreen
+            for offscreen in set(offscreens):
+                if self._is_direct_mode:
+                    offscreen_pool.release(offscreen)
+                else:
+                    _freeOffscreen(offscreen)
+
+        self._offscreen_tiers = []
+        self._offscreen[0] = None
+        self._offscreen[1] = None
+
+    def _useResolutionTier(self, tier):
+        offscreens, color_textures, viewports = self._offscreen_tiers[tier]
+
+        for i in range(2):
+            self._offscreen[i] = offscreens[i]
+            self._color_texture[i] = color_textures[i]
+            self._viewport[i] = viewports[i]
+
+    def updateResolution(self, frame_time):
+        """
+        Pick the resolution for the next frames
+
+        :param frame_time: time (in seconds) spent rendering the latest frame
+        :type frame_time: float
+        :return: True if the eye buffers changed
+        :rtype: bool
+        """
+        scaler = self._resolution_scaler
+
+        if not scaler:
+            return False
+
+        # leave some room for the rest of the frame
+        budget = 0.8 / self.refresh_rate
+
+        if not scaler.update(frame_time, budget):
+            return False
+
+        self._useResolutionTier(scaler.tier)
+        self._resolutionChanged()
+        return True
+
+    def _resolutionChanged(self):
+        """
+        The eye buffers changed, devices may need to know about the new textures
+        """
+        pass
+
     def loop(self, context):
         """
         Get fresh tracking data
         """
         self._updateViewClipping(context)
+        self._predictPose(context)
         self.updateMatrices(context)
 
     def frameReady(self):
         """
         The frame is ready to be sent to the device
         """
-        assert False, "frameReady() not implemented for the \"{0}\" device".format(self._name)
+        try:
+            self._frameSubmit()
+
+            wait_start = perf_counter()
+            self._frameWait()
+            self._frame_wait = perf_counter() - wait_start
+
+            self._frameSubmitted()
+
+        except Exception as E:
+            self.error("frameReady", E, False)
+            return False
+
+        return True
+
+    def _frameSubmit(self):
+        """
+        Hand the frame over to the device, errors are raised to the caller
+        (always from the main thread, where the GL context is current)
+        """
+        assert False, "_frameSubmit() not implemented for the \"{0}\" device".format(self._name)
+
+    def _frameWait(self):
+        """
+        Wait for the device to take the frame, e.g. until the vsync, errors are raised to the caller
+        (it may run from the submission worker, no GL call)
+        """
+        pass
+
+    def submitFrame(self):
+        """
+        Send the frame to the device, and wait for it from the submission worker if enabled
+        """
+        if not self._submission:
+            return self.frameReady()
+
+        self._frame_wait = 0.0
+        self._collectSubmission()
+
+        try:
+            self._frameSubmit()
+
+        except Exception as E:
+            self.error("frameReady", E, False)
+            return False
+
+        self._submission.submit()
+        return True
+
+    def waitSubmission(self):
+        """
+        Wait for the frame in flight, before drawing into the eye buffers again
+        """
+        if self._submission:
+            self._collectSubmission()
+
+    def _collectSubmission(self):
+        timestamp, exception = self._submission.wait()
+
+        if exception is not None:
+            self.error("frameReady", exception, False)
+
+        elif timestamp is not None:
+            self._predictor.frameSubmitted(timestamp)
 
     def reCenter(self):
         """
@@ -172,8 +538,12 @@ class baseHMD:
         Garbage collection
         """
         try:
-            for i in range(2):
-                self._offscreen[i] = None
+            if self._submission:
+                self.waitSubmission()
+                self._submission.stop()
+
+            self.stopRecording()
+            self._releaseOffscreens()
 
         except Exception as E:
             print(E)
@@ -198,6 +568,37 @@ class baseHMD:
         # send the error the interface
         self._error_callback(message, is_fatal)
 
+    def _trackingSample(self, timestamp, orientations, positions):
+        """
+        A new raw sample of the tracking, the devices call it for every sample they get
+        (not once per frame), it is recorded and feeds the pose prediction
+        """
+        if self._recorder:
+            self._recorder.write(timestamp, orientations, positions)
+
+        if self._predictor.is_enabled:
+            self._predictor.push(timestamp, orientations, positions)
+
+    def _predictPose(self, context):
+        """
+        Extrapolate the raw tracking data to when the frame will be displayed
+        """
+        predictor = self._predictor
+
+        if not predictor.is_enabled:
+            return
+
+        if not context.window_manager.virtual_reality.use_prediction:
+            return
+
+        predictor.predict(self._eye_orientation_raw, self._eye_position_raw)
+
+    def _frameSubmitted(self):
+        """
+        To be called once the frame is sent to the device (inline)
+        """
+        self._predictor.frameSubmitted(perf_counter())
+
     def updateMatrices(self, context):
         """
         Update OpenGL drawing matrices
@@ -207,6 +608,10 @@ class baseHMD:
         tracking_mode = vr.tracking_mode
         view_matrix = self._getViewMatrix(context, vr.lock_camera)
 
+        if tracking_mode != 'NONE' and matrices.numpy is not None:
+            self._updateMatricesBatched(view_matrix, tracking_mode == 'ALL')
+            return
+
         for i in range(2):
             if tracking_mode == 'NONE':
                 self._modelview_matrix[i] = view_matrix
@@ -230,13 +635,35 @@ class baseHMD:
 
             self._modelview_matrix[i] = transformation.inverted() * view_matrix
 
+    def _updateMatricesBatched(self, view_matrix, use_position):
+        """
+        All the views in a single NumPy operation
+        """
+        positions = self._eye_position_raw if use_position else None
+
+        modelview_matrices = matrices.modelviewMatrices(
+                self._eye_orientation_raw, positions, view_matrix, self._scale)
+
+        for i, modelview_matrix in enumerate(modelview_matrices.tolist()):
+            self._modelview_matrix[i] = Matrix(modelview_matrix)
+
     def _getViewMatrix(self, context, lock_camera):
         region = context.region_data
 
         if (self._is_direct_mode and lock_camera) or (region.view_perspective == 'CAMERA'):
             space = context.space_data
             camera = space.camera
-            return camera.matrix_world.inverted()
+
+            # only invert the camera matrix when the camera changes or the scene is updated (it may have moved)
+            cache = self._view_matrix_cache
+            key = (camera.as_pointer(), scene_generation())
+
+            if cache and cache[0] == key:
+                return cache[1]
+
+            view_matrix = camera.matrix_world.inverted()
+            self._view_matrix_cache = (key, view_matrix)
+            return view_matrix
         else:
             return region.view_matrix.copy()
 
@@ -246,11 +673,22 @@ class baseHMD:
 
         if region.view_perspective == 'CAMERA':
             camera_ob = space.camera
+
+            # the camera data only changes with a scene update, like its matrix
+            cache = self._clipping_cache
+            key = (camera_ob.as_pointer(), scene_generation())
+
+            if cache and cache[0] == key:
+                self._near, self._far = cache[1]
+                return
+
             camera = camera_ob.data
 
             self._near = camera.clip_start
             self._far = camera.clip_end
+            self._clipping_cache = (key, (self._near, self._far))
         else:
+            # editing the viewport does not update the scene, it is read every frame
             self._near = space.clip_start
             self._far = space.clip_end
 
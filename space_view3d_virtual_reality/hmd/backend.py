@@ -5,8 +5,14 @@ Backend
 Base hmd sdk bridge backend class to be extended for each HMD
 """
 
+import threading
+
+from time import perf_counter
+
 from . import baseHMD
 
+from .tracking import TrackingThread
+
 from ..lib import (
         checkModule,
         )
@@ -14,9 +20,16 @@ from ..lib import (
 class HMD(baseHMD):
     _name = 'Backend'
     _is_direct_mode = False
+    _use_prediction = True
+    _prediction_latency = 1.0 / 75.0 # scan-out of one frame
+    _tracking_rate = 250.0 # Hz, when polling from the tracking thread
 
     def __init__(self, context, error_callback):
         super(HMD, self).__init__(self._name, self._is_direct_mode, context, error_callback)
+        self._projection_key = [None, None]
+        self._tracking = None
+        self._lock = threading.Lock() # the bridge is not thread safe, shared with the tracking thread
+        self._is_split_submission = False
         checkModule('hmd_sdk_bridge')
 
     def _getHMDClass(self):
@@ -25,12 +38,20 @@ class HMD(baseHMD):
 
     @property
     def projection_matrix(self):
-        if self._current_eye:
-            matrix = self._hmd.getProjectionMatrixRight(self._near, self._far)
-        else:
-            matrix = self._hmd.getProjectionMatrixLeft(self._near, self._far)
+        # the device projection only changes with the clipping planes
+        eye = self._current_eye
+        key = (self._near, self._far)
+
+        if self._projection_key[eye] != key:
+            with self._lock:
+                if eye:
+                    matrix = self._hmd.getProjectionMatrixRight(self._near, self._far)
+                else:
+                    matrix = self._hmd.getProjectionMatrixLeft(self._near, self._far)
+
+            self.projection_matrix = matrix
+            self._projection_key[eye] = key
 
-        self.projection_matrix = matrix
         return super(HMD, self).projection_matrix
 
     @projection_matrix.setter
@@ -48,6 +69,10 @@ class HMD(baseHMD):
         try:
             hmd = self._getHMDClass()
             self._hmd = hmd()
+            self._projection_key = [None, None]
+
+            # not every bridge reports the refresh rate
+            self._refresh_rate = getattr(self._hmd, "refresh_rate", self._refresh_rate)
 
             # gather arguments from HMD
 
@@ -59,6 +84,21 @@ class HMD(baseHMD):
             self.width = self._hmd.width_right
             self.height = self._hmd.height_right
 
+            # the bridge needs to know where the eyes are in the shared texture
+            if self.is_side_by_side and not hasattr(self._hmd, "setupSideBySide"):
+                print("{0}: side-by-side layout not supported by the bridge, using separate eyes".format(self._name))
+                self.setStereoLayout('SEPARATE')
+
+            # bridges with frameSubmit() and frameWait() let the vsync wait happen
+            # off the main thread and outside of the lock, frameSubmit() is still
+            # called from the main thread where the GL context is current
+            self._is_split_submission = hasattr(self._hmd, "frameSubmit") and hasattr(self._hmd, "frameWait")
+
+            if self._submission and not self._is_split_submission:
+                self.error("init", RuntimeError("{0}: async submission not supported by the bridge, "
+                                                "submitting from the main thread".format(self._name)), False)
+                self._submission = None
+
             # initialize FBO
             if not super(HMD, self).init():
                 raise Exception("Failed to initialize HMD")
@@ -67,6 +107,9 @@ class HMD(baseHMD):
             if not self._setup():
                 raise Exception("Failed to setup HMD")
 
+            if context.window_manager.virtual_reality.use_tracking_thread:
+                self._startTracking()
+
         except Exception as E:
             self.error("init", E, True)
             self._hmd = None
@@ -76,14 +119,73 @@ class HMD(baseHMD):
             return True
 
     def _setup(self):
-        return self._hmd.setup(self._color_texture[0], self._color_texture[1])
+        with self._lock:
+            if self.is_side_by_side:
+                return self._hmd.setupSideBySide(self._color_texture[0], self._viewport[0], self._viewport[1])
+
+            return self._hmd.setup(self._color_texture[0], self._color_texture[1])
+
+    def _startTracking(self):
+        rate = getattr(self._hmd, "sensor_rate", self._tracking_rate)
+        self._tracking = TrackingThread(self._hmd.update, rate, self._lock)
+        self._tracking.start()
+
+    def _stopTracking(self):
+        if self._tracking:
+            self._tracking.stop()
+            self._tracking = None
+
+    def _readTracking(self):
+        """
+        Latest sample of the tracking thread, or None to poll the device directly
+        """
+        tracking = self._tracking
+
+        if tracking.exception:
+            exception = tracking.exception
+            self._stopTracking()
+            raise exception
+
+        latest, unread = tracking.slot.read()
+
+        if latest is None:
+            return None
+
+        # the samples in between frames are recorded, and make for a better velocity estimation
+        for sequence, timestamp, data in unread:
+            self._trackingSample(timestamp, (data[0], data[2]), (data[1], data[3]))
+
+        return latest[1], latest[2]
+
+    def _resolutionChanged(self):
+        """
+        Send the textures of the new resolution tier to the bridge
+        """
+        try:
+            if not self._setup():
+                raise Exception("Failed to setup HMD")
+
+        except Exception as E:
+            self.error("_resolutionChanged", E, False)
 
     def loop(self, context):
         """
         Get fresh tracking data
         """
         try:
-            data = self._hmd.update()
+            sample = self._readTracking() if self._tracking else None
+
+            if sample:
+                self._pose_timestamp, data = sample
+
+            else:
+                with self._lock:
+                    data = self._hmd.update()
+                self._pose_timestamp = perf_counter()
+
+                self._trackingSample(self._pose_timestamp, (data[0], data[2]), (data[1], data[3]))
+
+            self._pose_age = perf_counter() - self._pose_timestamp
 
             self._eye_orientation_raw[0] = data[0]
             self._eye_orientation_raw[1] = data[2]
@@ -99,18 +201,18 @@ class HMD(baseHMD):
 
         return True
 
-    def frameReady(self):
-        """
-        The frame is ready to be sent to the device
-        """
-        try:
-            self._hmd.frameReady()
-
-        except Exception as E:
-            self.error("frameReady", E, False)
-            return False
+    def _frameSubmit(self):
+        with self._lock:
+            if self._is_split_submission:
+                self._hmd.frameSubmit()
+            else:
+                # it also waits for the vsync, the tracking thread waits meanwhile
+                self._hmd.frameReady()
 
-        return True
+    def _frameWait(self):
+        # only a wait, it is safe along with the other bridge calls
+        if self._is_split_submission:
+            self._hmd.frameWait()
 
     def reCenter(self):
         """
@@ -119,12 +221,14 @@ class HMD(baseHMD):
         :return: return True if success
         :rtype: bool
         """
-        return self._hmd.reCenter()
+        with self._lock:
+            return self._hmd.reCenter()
 
     def quit(self):
         """
         Garbage collection
         """
+        self._stopTracking()
         self._hmd = None
         return super(HMD, self).quit()
 
@@ -5,8 +5,22 @@ Debug
 Debug device for testing
 """
 
+from math import (
+        fmod,
+        radians,
+        )
+
+from mathutils import Matrix
+
+from time import (
+        perf_counter,
+        sleep,
+        )
+
 from . import baseHMD
 
+from ..lib import getAddonPreferences
+
 VERBOSE = False
 
 def print_debug(*args):
@@ -15,8 +29,15 @@ def print_debug(*args):
 
 
 class HMD(baseHMD):
+    # the debug motion is synthetic, set to True to test the prediction
+    _use_prediction = False
+
     def __init__(self, context, error_callback):
         super(HMD, self).__init__('HMD', False, context, error_callback)
+        self._projection_cache = None
+
+        # block in frameReady until the next refresh, like a compositor with vsync
+        self._simulate_vsync = False
 
     def init(self, context):
         """
@@ -30,6 +51,8 @@ class HMD(baseHMD):
         self._width = [512, 512]
         self._height = [512, 512]
 
+        self._simulate_vsync = getAddonPreferences(context).debug_vsync
+
         return super(HMD, self).init()
 
     def loop(self, context):
@@ -38,9 +61,6 @@ class HMD(baseHMD):
         """
         print_debug('loop()')
 
-        from math import fmod, radians
-        from mathutils import Matrix
-
         global time
 
         speed = 0.001
@@ -66,6 +86,9 @@ class HMD(baseHMD):
             self._eye_orientation_raw[eye] = quaternion
             self._projection_matrix[eye] = projection_matrix
 
+        self._pose_timestamp = perf_counter()
+        self._trackingSample(self._pose_timestamp, self._eye_orientation_raw, self._eye_position_raw)
+
         super(HMD, self).loop(context)
 
     def _getProjectionMatrix(self, context):
@@ -74,7 +97,20 @@ class HMD(baseHMD):
         if region.view_perspective == 'CAMERA':
             space = context.space_data
             camera = space.camera
-            return camera.calc_matrix_camera()
+            data = camera.data
+
+            # only recalculate when the camera or its lens change
+            key = (camera.as_pointer(), data.type, data.lens, data.ortho_scale,
+                   data.sensor_fit, data.sensor_width, data.sensor_height,
+                   data.shift_x, data.shift_y, data.clip_start, data.clip_end)
+
+            cache = self._projection_cache
+            if cache and cache[0] == key:
+                return cache[1]
+
+            projection_matrix = camera.calc_matrix_camera()
+            self._projection_cache = (key, projection_matrix)
+            return projection_matrix
         else:
             return region.perspective_matrix.copy()
 
@@ -83,6 +119,15 @@ class HMD(baseHMD):
         The frame is ready to be send to the device
         """
         print_debug('frameReady()')
+        return super(HMD, self).frameReady()
+
+    def _frameSubmit(self):
+        pass
+
+    def _frameWait(self):
+        if self._simulate_vsync:
+            period = 1.0 / self.refresh_rate
+            sleep(period - fmod(perf_counter(), period))
 
     def quit(self):
         """
@@ -0,0 +1,292 @@
+"""
+External
+========
+
+Head poses published by an external tracker, no SDK
+
+The tracker writes the poses in a shared memory file or sends them
+to a localhost UDP socket, using the same fixed binary layout
+(native little-endian):
+
+    uint32 sequence, 4 bytes padding, float64 timestamp,
+    float32 orientation (w, x, y, z) and position of the left eye, then the right eye
+
+The timestamp is when the tracker sampled the pose, in seconds of the
+``time.perf_counter()`` clock of this machine. The sequence starts at 0
+(nothing published yet) and grows with every pose; in shared memory it is
+a seqlock: odd while the tracker writes.
+The raw eye slots are views on the received bytes, a new pose is copied
+in a single block and no Python objects are created per value.
+"""
+
+import mmap
+import os
+import socket
+import struct
+import tempfile
+
+from time import perf_counter
+
+import bpy
+
+from .debug import HMD as DebugHMD
+
+from ..lib import getAddonPreferences
+
+LAYOUT = struct.Struct('<I4xd14f')
+SEQUENCE = struct.Struct('<I')
+TIMESTAMP = struct.Struct('<d')
+TIMESTAMP_OFFSET = 8
+POSE_OFFSET = 16 # bytes before the float32 values
+
+DEFAULT_FILEPATH = os.path.join(tempfile.gettempdir(), "virtual_reality_pose")
+DEFAULT_ADDRESS = "127.0.0.1:9775"
+
+# attempts at reading a pose while the tracker is writing it
+SEQLOCK_RETRIES = 16
+
+
+def parseAddress(address):
+    """
+    :param address: "host:port"
+    :type address: str
+    :rtype: (str, int)
+    """
+    host, _, port = address.rpartition(':')
+    return (host or "127.0.0.1"), int(port)
+
+
+# ############################################################
+# Transports
+# ############################################################
+
+class SharedMemorySource:
+    __slots__ = {
+        "_file",
+        "_data",
+        "_view",
+        "_sequence",
+        }
+
+    def __init__(self, filepath):
+        self._file = open(filepath, 'r+b')
+        self._data = mmap.mmap(self._file.fileno(), LAYOUT.size)
+        self._view = memoryview(self._data)
+        # nothing published yet
+        self._sequence = 0
+
+    def read(self, buffer):
+        """
+        Copy the latest pose into the buffer
+
+        :return: True if it is a new pose
+        :rtype: bool
+        """
+        data = self._data
+
+        for i in range(SEQLOCK_RETRIES):
+            sequence = SEQUENCE.unpack_from(data, 0)[0]
+
+            if sequence & 1:
+                continue
+
+            # 0 is the zero-filled file before the first pose
+            if sequence == self._sequence or not sequence:
+                return False
+
+            buffer[:] = self._view
+
+            if SEQUENCE.unpack_from(data, 0)[0] == sequence:
+                self._sequence = sequence
+                return True
+
+        return False
+
+    def close(self):
+        self._view.release()
+        self._data.close()
+        self._file.close()
+
+
+class UDPSource:
+    __slots__ = {
+        "_socket",
+        "_scratch",
+        }
+
+    def __init__(self, address):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(parseAddress(address))
+        self._socket.setblocking(False)
+        self._scratch = bytearray(LAYOUT.size)
+
+    def read(self, buffer):
+        """
+        Copy the latest received pose into the buffer
+
+        :return: True if it is a new pose
+        :rtype: bool
+        """
+        is_new = False
+
+        # drain the socket, only the latest pose matters
+        while True:
+            try:
+                size = self._socket.recv_into(self._scratch)
+
+            except (BlockingIOError, InterruptedError):
+                return is_new
+
+            if size == LAYOUT.size and SEQUENCE.unpack_from(self._scratch, 0)[0]:
+                buffer[:] = self._scratch
+                is_new = True
+
+    def close(self):
+        self._socket.close()
+
+
+# ############################################################
+# Publisher
+# ############################################################
+
+class PosePublisher:
+    """
+    Reference implementation of the tracker side, and stand-in for testing
+    """
+    __slots__ = {
+        "transport",
+        "_sequence",
+        "_file",
+        "_data",
+        "_socket",
+        "_address",
+        "_packet",
+        }
+
+    def __init__(self, transport='SHARED_MEMORY', address=""):
+        """
+        :param transport: 'SHARED_MEMORY' or 'UDP'
+        :type transport: str
+        :param address: shared memory file or "host:port", empty for the default
+        :type address: str
+        """
+        self.transport = transport
+        self._sequence = 0
+        self._file = None
+        self._data = None
+        self._socket = None
+        self._packet = bytearray(LAYOUT.size)
+
+        if transport == 'SHARED_MEMORY':
+            self._file = open(address or DEFAULT_FILEPATH, 'w+b')
+            self._file.write(bytes(LAYOUT.size))
+            self._file.flush()
+            self._data = mmap.mmap(self._file.fileno(), LAYOUT.size)
+
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._address = parseAddress(address or DEFAULT_ADDRESS)
+
+    def publish(self, timestamp, orientations, positions):
+        orientation_left, orientation_right = orientations
+        position_left, position_right = positions
+        values = (*orientation_left, *position_left, *orientation_right, *position_right)
+
+        if self._data is not None:
+            data = self._data
+
+            # odd sequence while writing
+            self._sequence += 1
+            SEQUENCE.pack_into(data, 0, self._sequence)
+
+            LAYOUT.pack_into(data, 0, self._sequence, timestamp, *values)
+
+            self._sequence += 1
+            SEQUENCE.pack_into(data, 0, self._sequence)
+
+        else:
+            self._sequence += 2
+            LAYOUT.pack_into(self._packet, 0, self._sequence, timestamp, *values)
+            self._socket.sendto(self._packet, self._address)
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._file.close()
+
+        else:
+            self._socket.close()
+
+
+# ############################################################
+# Device
+# ############################################################
+
+class HMD(DebugHMD):
+    def __init__(self, context, error_callback):
+        super(HMD, self).__init__(context, error_callback)
+        self._source = None
+        self._buffer = bytearray(LAYOUT.size)
+
+        values = memoryview(self._buffer)[POSE_OFFSET:].cast('f')
+        self._orientation_views = [values[0:4], values[7:11]]
+        self._position_views = [values[4:7], values[11:14]]
+
+    def init(self, context):
+        """
+        Initialize device
+
+        :return: return True if the device was properly initialized
+        :rtype: bool
+        """
+        preferences = getAddonPreferences(context)
+        address = preferences.external_address
+
+        try:
+            if preferences.external_transport == 'UDP':
+                self._source = UDPSource(address or DEFAULT_ADDRESS)
+            else:
+                self._source = SharedMemorySource(bpy.path.abspath(address) if address else DEFAULT_FILEPATH)
+
+        except (OSError, ValueError) as E:
+            self.error("init", E, True)
+            return False
+
+        # identity until the first pose arrives
+        self._orientation_views[0][0] = self._orientation_views[1][0] = 1.0
+        self._pose_timestamp = perf_counter()
+
+        return super(HMD, self).init(context)
+
+    def loop(self, context):
+        """
+        Get the latest published pose
+        """
+        # the pose prediction replaces the slots, point them back to the views
+        for eye in range(2):
+            self._eye_orientation_raw[eye] = self._orientation_views[eye]
+            self._eye_position_raw[eye] = self._position_views[eye]
+
+        if self._source.read(self._buffer):
+            self._pose_timestamp = TIMESTAMP.unpack_from(self._buffer, TIMESTAMP_OFFSET)[0]
+            self._trackingSample(self._pose_timestamp, self._orientation_views, self._position_views)
+
+        projection_matrix = self._getProjectionMatrix(context)
+        self._projection_matrix[0] = projection_matrix
+        self._projection_matrix[1] = projection_matrix
+
+        # time since the tracker published a new pose
+        self._pose_age = perf_counter() - self._pose_timestamp
+
+        # skip DebugHMD.loop(), it generates its own motion
+        super(DebugHMD, self).loop(context)
+
+    def quit(self):
+        """
+        Garbage collection
+        """
+        if self._source:
+            self._source.close()
+            self._source = None
+
+        return super(HMD, self).quit()
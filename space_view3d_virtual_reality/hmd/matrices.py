@@ -0,0 +1,73 @@
+"""
+Matrices
+========
+
+Batched modelview matrices for all the views at once
+
+It uses NumPy when available, ``numpy`` is None otherwise
+and the caller should fall back to mathutils
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def modelviewMatrices(orientations, positions, view_matrix, scale=None):
+    """
+    Inverse of the tracked transformation of every view, times the view matrix
+
+    The tracked transformation is rigid (rotation then translation),
+    so its inverse is the transposed rotation and the rotated negated translation,
+    no general matrix inversion is needed.
+
+    :param orientations: quaternions (w, x, y, z) of each view, degenerate ones count as the identity
+    :type orientations: sequence of N sequences of 4 floats
+    :param positions: position of each view, or None for rotation only
+    :type positions: sequence of N sequences of 3 floats
+    :param view_matrix: 4x4 view matrix shared by all views
+    :type view_matrix: :class:`mathutils.Matrix`
+    :param scale: scene units scale applied to the positions
+    :type scale: float
+    :return: N 4x4 modelview matrices
+    :rtype: numpy.ndarray
+    """
+    quaternion = numpy.array(orientations, dtype=numpy.float64)
+    norm = numpy.linalg.norm(quaternion, axis=1)
+
+    # a degenerate quaternion (zero, or not a number) is taken as the identity, not NaN matrices
+    degenerate = ~(norm > 0.0) | ~numpy.isfinite(norm)
+    if degenerate.any():
+        quaternion[degenerate] = (1.0, 0.0, 0.0, 0.0)
+        norm[degenerate] = 1.0
+
+    quaternion = quaternion / norm[:, None]
+
+    w, x, y, z = quaternion.T
+    count = quaternion.shape[0]
+
+    inverse = numpy.zeros((count, 4, 4))
+    inverse[:, 3, 3] = 1.0
+
+    # the inverse of a rotation is its transposed
+    rotation = inverse[:, :3, :3]
+    rotation[:, 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    rotation[:, 1, 0] = 2.0 * (x * y - z * w)
+    rotation[:, 2, 0] = 2.0 * (x * z + y * w)
+    rotation[:, 0, 1] = 2.0 * (x * y + z * w)
+    rotation[:, 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    rotation[:, 2, 1] = 2.0 * (y * z - x * w)
+    rotation[:, 0, 2] = 2.0 * (x * z - y * w)
+    rotation[:, 1, 2] = 2.0 * (y * z + x * w)
+    rotation[:, 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+
+    if positions is not None:
+        translation = numpy.asarray(positions, dtype=numpy.float64)
+
+        if scale is not None:
+            translation = translation * scale
+
+        inverse[:, :3, 3] = -numpy.einsum('nij,nj->ni', rotation, translation)
+
+    return numpy.matmul(inverse, numpy.asarray(view_matrix, dtype=numpy.float64))
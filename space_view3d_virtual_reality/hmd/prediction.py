@@ -0,0 +1,164 @@
+"""
+Prediction
+==========
+
+Extrapolate the tracking data to the time the frame reaches the display
+
+The angular and linear velocities are taken from a short history
+of the raw eye samples. The prediction horizon is the measured time
+between reading the samples and sending the frame to the device,
+plus the display latency of the backend.
+"""
+
+from collections import deque
+from math import (
+        acos,
+        cos,
+        sin,
+        sqrt,
+        )
+
+MAX_HORIZON = 0.1 # seconds, do not extrapolate further than that
+
+
+# ############################################################
+# Quaternion Helpers (w, x, y, z)
+# ############################################################
+
+def _multiply(a, b):
+    aw, ax, ay, az = a
+    bw, bx, by, bz = b
+
+    return (aw * bw - ax * bx - ay * by - az * bz,
+            aw * bx + ax * bw + ay * bz - az * by,
+            aw * by - ax * bz + ay * bw + az * bx,
+            aw * bz + ax * by - ay * bx + az * bw)
+
+
+def _conjugate(q):
+    return (q[0], -q[1], -q[2], -q[3])
+
+
+def _angularVelocity(q0, q1, dt):
+    """
+    Axis and angle per second that rotates q0 into q1
+    """
+    if q0[0] * q1[0] + q0[1] * q1[1] + q0[2] * q1[2] + q0[3] * q1[3] < 0.0:
+        q0 = (-q0[0], -q0[1], -q0[2], -q0[3])
+
+    delta = _multiply(q1, _conjugate(q0))
+    angle = 2.0 * acos(max(-1.0, min(1.0, delta[0])))
+    sine = sqrt(max(0.0, 1.0 - delta[0] * delta[0]))
+
+    if sine < 1e-8:
+        return (0.0, 0.0, 1.0), 0.0
+
+    axis = (delta[1] / sine, delta[2] / sine, delta[3] / sine)
+    return axis, angle / dt
+
+
+def _rotate(q, axis, angle):
+    half = angle * 0.5
+    sine = sin(half)
+    return _multiply((cos(half), axis[0] * sine, axis[1] * sine, axis[2] * sine), q)
+
+
+# ############################################################
+# Predictor
+# ############################################################
+
+class PosePredictor:
+    __slots__ = {
+        "is_enabled",
+        "latency",
+        "_history",
+        "_render_time",
+        "_sample_time",
+        }
+
+    def __init__(self, is_enabled=True, latency=0.0, size=3):
+        """
+        :param is_enabled: whether to extrapolate the samples
+        :type is_enabled: bool
+        :param latency: time (in seconds) between sending a frame and its photons
+        :type latency: float
+        :param size: number of samples used to estimate the velocities
+        :type size: int
+        """
+        self.is_enabled = is_enabled
+        self.latency = latency
+        self._history = deque(maxlen=max(2, size))
+        self._render_time = 0.0
+        self._sample_time = None
+
+    @property
+    def horizon(self):
+        """
+        How far in the future (in seconds) the pose is predicted
+        """
+        return min(MAX_HORIZON, self._render_time + self.latency)
+
+    def reset(self):
+        self._history.clear()
+        self._render_time = 0.0
+        self._sample_time = None
+
+    def push(self, timestamp, orientations, positions):
+        """
+        Add the raw samples of all the eyes
+        """
+        if self._history and timestamp <= self._history[-1][0]:
+            return
+
+        self._history.append((timestamp,
+                              [tuple(orientation) for orientation in orientations],
+                              [tuple(position) for position in positions]))
+        self._sample_time = timestamp
+
+    def frameSubmitted(self, timestamp):
+        """
+        Measure the time between the latest sample and the frame submission
+        """
+        if self._sample_time is None:
+            return
+
+        render_time = timestamp - self._sample_time
+        if render_time < 0.0:
+            return
+
+        # exponential moving average
+        self._render_time += (render_time - self._render_time) * 0.1
+
+    def predict(self, orientations, positions):
+        """
+        Replace the samples with their extrapolation to the predicted display time
+
+        :param orientations: eye orientations, updated in place
+        :type orientations: list
+        :param positions: eye positions, updated in place
+        :type positions: list
+        """
+        history = self._history
+
+        if not self.is_enabled or len(history) < 2:
+            return
+
+        t0, orientations0, positions0 = history[0]
+        t1, orientations1, positions1 = history[-1]
+        dt = t1 - t0
+
+        if dt <= 0.0:
+            return
+
+        horizon = self.horizon
+
+        for i in range(len(orientations)):
+            axis, velocity = _angularVelocity(orientations0[i], orientations1[i], dt)
+            orientations[i] = list(_rotate(orientations1[i], axis, velocity * horizon))
+
+            p0 = positions0[i]
+            p1 = positions1[i]
+            factor = horizon / dt
+            positions[i] = [p1[0] + (p1[0] - p0[0]) * factor,
+                            p1[1] + (p1[1] - p0[1]) * factor,
+                            p1[2] + (p1[2] - p0[2]) * factor]
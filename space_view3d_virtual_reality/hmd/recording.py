@@ -0,0 +1,211 @@
+"""
+Recording
+=========
+
+Tracking sessions saved to disk, to replay a head motion without a device
+
+The file is a small header followed by fixed size records, one per
+tracking sample: the timestamp, and the orientation (w, x, y, z)
+and position of both eyes. The records are written by a separate
+thread, so the frame never waits for the disk.
+"""
+
+import mmap
+import struct
+import threading
+
+from queue import (
+        Empty,
+        Queue,
+        )
+
+MAGIC = b'VRRT'
+VERSION = 1
+
+# magic, version, number of eyes
+HEADER = struct.Struct('<4sHH8x')
+
+# timestamp, 2 orientations, 2 positions
+RECORD = struct.Struct('<d8f6f')
+
+
+# ############################################################
+# Recorder
+# ############################################################
+
+class Recorder:
+    __slots__ = {
+        "filepath",
+        "count",
+        "_file",
+        "_queue",
+        "_thread",
+        }
+
+    def __init__(self, filepath):
+        """
+        :param filepath: file to write, it is overwritten
+        :type filepath: str
+        """
+        self.filepath = filepath
+        self.count = 0
+        self._file = open(filepath, 'wb', buffering=64 * RECORD.size)
+        self._file.write(HEADER.pack(MAGIC, VERSION, 2))
+
+        self._queue = Queue()
+        self._thread = threading.Thread(target=self._run, name="VirtualRealityRecorder")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, timestamp, orientations, positions):
+        """
+        Queue a tracking sample, it does not wait for the disk
+        """
+        orientation_left, orientation_right = orientations
+        position_left, position_right = positions
+
+        self._queue.put(RECORD.pack(
+            timestamp,
+            *orientation_left, *orientation_right,
+            *position_left, *position_right))
+
+        self.count += 1
+
+    def close(self):
+        """
+        Write the pending samples and close the file
+        """
+        if self._thread is None:
+            return
+
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+
+    def _run(self):
+        queue = self._queue
+        is_running = True
+
+        while is_running:
+            records = [queue.get()]
+
+            # write all the samples queued in the meantime at once
+            try:
+                while True:
+                    records.append(queue.get_nowait())
+            except Empty:
+                pass
+
+            if None in records:
+                records = records[:records.index(None)]
+                is_running = False
+
+            self._file.write(b''.join(records))
+
+
+# ############################################################
+# Playback
+# ############################################################
+
+class Playback:
+    __slots__ = {
+        "filepath",
+        "count",
+        "_file",
+        "_data",
+        "_start",
+        "_index",
+        }
+
+    def __init__(self, filepath):
+        """
+        :param filepath: file written by :class:`Recorder`
+        :type filepath: str
+        :raises ValueError: if the file is not a valid recording
+        """
+        self.filepath = filepath
+        self._file = open(filepath, 'rb')
+
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        except ValueError:
+            self._file.close()
+            raise ValueError("Empty tracking recording: \"{0}\"".format(filepath))
+
+        magic, version, eyes = HEADER.unpack_from(self._data, 0)
+        self.count = (len(self._data) - HEADER.size) // RECORD.size
+
+        if magic != MAGIC or version != VERSION or eyes != 2 or not self.count:
+            self.close()
+            raise ValueError("Invalid tracking recording: \"{0}\"".format(filepath))
+
+        self._start = self._timestamp(0)
+        self._index = 0
+
+    @property
+    def duration(self):
+        """
+        Time (in seconds) between the first and the last sample
+        """
+        return self._timestamp(self.count - 1) - self._start
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def _timestamp(self, index):
+        return struct.unpack_from('<d', self._data, HEADER.size + index * RECORD.size)[0]
+
+    def seek(self, time):
+        """
+        Find the latest sample at the time (in seconds) since the start of the recording
+
+        :return: index of the sample
+        :rtype: int
+        """
+        timestamp = self._start + time
+
+        # playing forward, the next sample is usually close
+        index = self._index
+        if self._timestamp(index) <= timestamp:
+            last = min(self.count, index + 4)
+            while index + 1 < last and self._timestamp(index + 1) <= timestamp:
+                index += 1
+
+            if index + 1 == last and last < self.count:
+                index = self._search(index, self.count, timestamp)
+
+        else:
+            index = self._search(0, index, timestamp)
+
+        self._index = index
+        return index
+
+    def _search(self, low, high, timestamp):
+        """
+        Binary search of the latest sample before timestamp
+        """
+        while high - low > 1:
+            middle = (low + high) // 2
+
+            if self._timestamp(middle) <= timestamp:
+                low = middle
+            else:
+                high = middle
+
+        return low
+
+    def sample(self, time):
+        """
+        Tracking sample at the time (in seconds) since the start of the recording
+
+        :return: timestamp, orientations and positions of both eyes
+        :rtype: (float, list, list)
+        """
+        values = RECORD.unpack_from(self._data, HEADER.size + self.seek(time) * RECORD.size)
+
+        orientations = [list(values[1:5]), list(values[5:9])]
+        positions = [list(values[9:12]), list(values[12:15])]
+        return values[0], orientations, positions
@@ -0,0 +1,101 @@
+"""
+Replay
+======
+
+Play back a recorded tracking session, no real HMD
+
+The playback time moves by a fixed step every frame, scaled by the
+playback rate, so the same frame always gets the same head pose no
+matter how long it took to render.
+"""
+
+import bpy
+
+from .debug import HMD as DebugHMD
+
+from .recording import Playback
+
+from ..lib import getAddonPreferences
+
+
+class HMD(DebugHMD):
+    def __init__(self, context, error_callback):
+        super(HMD, self).__init__(context, error_callback)
+        self._playback = None
+        self._time = 0.0
+        self._rate = 1.0
+
+    @property
+    def time(self):
+        """
+        Playback time, in seconds since the start of the recording
+        """
+        return self._time
+
+    def seek(self, time):
+        """
+        Move the playback to a time (in seconds) of the recording, it loops
+        """
+        duration = self._playback.duration
+
+        if duration > 0.0:
+            time %= duration
+        else:
+            time = 0.0
+
+        self._time = time
+
+    def init(self, context):
+        """
+        Initialize device
+
+        :return: return True if the device was properly initialized
+        :rtype: bool
+        """
+        preferences = getAddonPreferences(context)
+        filepath = bpy.path.abspath(preferences.replay_filepath)
+
+        try:
+            self._playback = Playback(filepath)
+
+        except (OSError, ValueError) as E:
+            self.error("init", E, True)
+            return False
+
+        self._rate = preferences.replay_rate
+        self.seek(preferences.replay_start)
+
+        return super(HMD, self).init(context)
+
+    def loop(self, context):
+        """
+        Get the recorded tracking data
+        """
+        timestamp, orientations, positions = self._playback.sample(self._time)
+
+        projection_matrix = self._getProjectionMatrix(context)
+
+        for eye in range(2):
+            self._eye_orientation_raw[eye] = orientations[eye]
+            self._eye_position_raw[eye] = positions[eye]
+            self._projection_matrix[eye] = projection_matrix
+
+        # the same sample may last several frames at slow playback rates
+        if timestamp != self._pose_timestamp:
+            self._pose_timestamp = timestamp
+            self._trackingSample(timestamp, orientations, positions)
+
+        # skip DebugHMD.loop(), it generates its own motion
+        super(DebugHMD, self).loop(context)
+
+        self.seek(self._time + self._rate / self.refresh_rate)
+
+    def quit(self):
+        """
+        Garbage collection
+        """
+        if self._playback:
+            self._playback.close()
+            self._playback = None
+
+        return super(HMD, self).quit()
@@ -0,0 +1,119 @@
+"""
+Resolution
+==========
+
+Dynamic resolution scaling of the eye buffers
+
+The render size moves between pre-built tiers, from the native size
+down to a floor, following a rolling average of the frame time.
+"""
+
+from collections import deque
+
+
+def resolutionTiers(floor=0.5, step=0.15):
+    """
+    Scale factors from the native resolution (1.0) down to the floor
+
+    :param floor: smallest scale factor
+    :type floor: float
+    :param step: scale difference between two tiers
+    :type step: float
+    :rtype: tuple of float
+    """
+    floor = min(1.0, max(0.1, floor))
+    tiers = [1.0]
+
+    while tiers[-1] - step > floor + 1e-6:
+        tiers.append(round(tiers[-1] - step, 4))
+
+    if tiers[-1] > floor:
+        tiers.append(floor)
+
+    return tuple(tiers)
+
+
+class ResolutionScaler:
+    __slots__ = {
+        "tiers",
+        "_tier",
+        "_samples",
+        "_window",
+        "_hysteresis",
+        "_cooldown",
+        "_wait",
+        }
+
+    def __init__(self, tiers, window=30, hysteresis=0.2, cooldown=45):
+        """
+        :param tiers: scale factors, from the largest to the smallest
+        :type tiers: tuple of float
+        :param window: number of frames in the rolling average
+        :type window: int
+        :param hysteresis: fraction of the budget to keep free before going up a tier
+        :type hysteresis: float
+        :param cooldown: frames to wait after a change before measuring again
+        :type cooldown: int
+        """
+        self.tiers = tiers
+        self._tier = 0
+        self._samples = deque(maxlen=window)
+        self._window = window
+        self._hysteresis = hysteresis
+        self._cooldown = cooldown
+        self._wait = 0
+
+    @property
+    def tier(self):
+        return self._tier
+
+    @property
+    def scale(self):
+        return self.tiers[self._tier]
+
+    def reset(self):
+        self._tier = 0
+        self._samples.clear()
+        self._wait = 0
+
+    def update(self, frame_time, budget):
+        """
+        Add a frame time sample and pick the tier for the next frames
+
+        :param frame_time: time (in seconds) spent rendering the frame
+        :type frame_time: float
+        :param budget: time (in seconds) available to render a frame
+        :type budget: float
+        :return: True if the tier changed
+        :rtype: bool
+        """
+        if self._wait:
+            self._wait -= 1
+            return False
+
+        samples = self._samples
+        samples.append(frame_time)
+
+        if len(samples) < self._window:
+            return False
+
+        average = sum(samples) / len(samples)
+        tier = self._tier
+
+        if average > budget and tier + 1 < len(self.tiers):
+            tier += 1
+
+        elif tier > 0:
+            # the cost follows the number of pixels, go up only if
+            # the larger tier still leaves the hysteresis margin free
+            ratio = self.tiers[tier - 1] / self.tiers[tier]
+            if average * ratio * ratio < budget * (1.0 - self._hysteresis):
+                tier -= 1
+
+        if tier == self._tier:
+            return False
+
+        self._tier = tier
+        samples.clear()
+        self._wait = self._cooldown
+        return True
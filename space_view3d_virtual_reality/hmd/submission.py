@@ -0,0 +1,116 @@
+"""
+Submission
+==========
+
+Wait for the device to take the frames from a separate thread
+
+Compositors may block the submission until the next vsync. The main
+thread hands the frame over to the device, where the GL context is
+current, and the worker waits for the device to take it. The main thread
+goes back to handle the events, and only waits for the worker before
+drawing again into the same eye buffers. At most one frame is in flight.
+"""
+
+import threading
+
+from time import perf_counter
+
+
+class SubmissionWorker:
+    __slots__ = {
+        "_submit",
+        "_condition",
+        "_is_pending",
+        "_is_running",
+        "_thread",
+        "_timestamp",
+        "_exception",
+        }
+
+    def __init__(self, submit):
+        """
+        :param submit: function waiting for the device to take the frame, it may raise
+        :type submit: func()
+        """
+        self._submit = submit
+        self._condition = threading.Condition()
+        self._is_pending = False
+        self._is_running = False
+        self._thread = None
+        self._timestamp = None
+        self._exception = None
+
+    def start(self):
+        self._is_running = True
+        self._thread = threading.Thread(target=self._run, name="VirtualRealitySubmission")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Wait for the frame in flight and stop the worker
+        """
+        if not self._thread:
+            return
+
+        self.wait()
+
+        with self._condition:
+            self._is_running = False
+            self._condition.notify_all()
+
+        self._thread.join()
+        self._thread = None
+
+    def submit(self):
+        """
+        Hand the frame over to the worker, after the previous one was sent
+        """
+        with self._condition:
+            while self._is_pending:
+                self._condition.wait()
+
+            self._is_pending = True
+            self._condition.notify_all()
+
+    def wait(self):
+        """
+        Wait for the frame in flight to be sent
+
+        :return: when the latest frame was sent and the exception it raised, if any
+        :rtype: (float, Exception)
+        """
+        with self._condition:
+            while self._is_pending:
+                self._condition.wait()
+
+            result = (self._timestamp, self._exception)
+            self._timestamp = None
+            self._exception = None
+
+        return result
+
+    def _run(self):
+        condition = self._condition
+
+        while True:
+            with condition:
+                while self._is_running and not self._is_pending:
+                    condition.wait()
+
+                if not self._is_running:
+                    return
+
+            exception = None
+            try:
+                self._submit()
+
+            except Exception as E:
+                # reported from the main thread
+                exception = E
+
+            with condition:
+                self._timestamp = perf_counter()
+                self._exception = exception
+                self._is_pending = False
+                condition.notify_all()
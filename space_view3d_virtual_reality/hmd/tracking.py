@@ -0,0 +1,151 @@
+"""
+Tracking
+========
+
+Poll the device from a separate thread, at the sensor rate
+
+The worker publishes every sample in a ring of slots: it fills the next
+slot and then advances the sequence, so the drawing only ever reads
+complete samples, never waits for the device and can tell how old the
+latest sample is from its timestamp. The samples polled in between two
+frames are kept in the ring too, for the pose prediction and the
+tracking recording.
+
+The device bridges are not thread safe, every bridge call is serialized
+by the lock of the backend, and the thread holds it while it polls. The
+calls of the main thread under the lock are short, the blocking vsync
+wait of the frame submission is never made under it.
+"""
+
+import threading
+
+from time import (
+        perf_counter,
+        sleep,
+        )
+
+HISTORY = 16 # samples kept in the ring
+
+
+class PoseSlot:
+    __slots__ = {
+        "_samples",
+        "_sequence",
+        "_read",
+        }
+
+    def __init__(self):
+        # (sequence, timestamp, data)
+        self._samples = [None] * HISTORY
+        self._sequence = 0
+        self._read = 0
+
+    def write(self, timestamp, data):
+        """
+        Publish a sample, called from the worker thread only
+        """
+        sequence = self._sequence + 1
+
+        self._samples[sequence % HISTORY] = (sequence, timestamp, data)
+        self._sequence = sequence
+
+    def read(self):
+        """
+        The latest complete sample, and all the samples published since the previous read
+
+        :return: the latest (sequence, timestamp, data) sample, or None if not available yet,
+                 and the unread samples, oldest first, ending with the latest if it is new
+        :rtype: (tuple, list)
+        """
+        sequence = self._sequence
+
+        if not sequence:
+            return None, []
+
+        samples = self._samples
+        latest = samples[sequence % HISTORY]
+
+        # the worker may be writing the slot after the latest one, the oldest of the ring
+        unread = []
+        for index in range(max(self._read + 1, sequence - HISTORY + 2), sequence):
+            sample = samples[index % HISTORY]
+
+            # or it has already overwritten it
+            if sample[0] == index:
+                unread.append(sample)
+
+        if latest[0] > self._read:
+            unread.append(latest)
+
+        self._read = latest[0]
+        return latest, unread
+
+
+class TrackingThread:
+    __slots__ = {
+        "slot",
+        "lock",
+        "exception",
+        "_poll",
+        "_period",
+        "_thread",
+        "_is_running",
+        }
+
+    def __init__(self, poll, rate, lock=None):
+        """
+        :param poll: function returning the tracking data of the device
+        :type poll: func()
+        :param rate: polling rate in Hz
+        :type rate: float
+        :param lock: lock held while polling, serializing the calls to a device that is not thread safe
+        :type lock: :class:`threading.Lock`
+        """
+        self.slot = PoseSlot()
+        self.lock = lock or threading.Lock()
+        self.exception = None
+        self._poll = poll
+        self._period = 1.0 / rate
+        self._thread = None
+        self._is_running = threading.Event()
+
+    @property
+    def is_running(self):
+        return self._is_running.is_set()
+
+    def start(self):
+        self._is_running.set()
+        self._thread = threading.Thread(target=self._run, name="VirtualRealityTracking")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._is_running.clear()
+
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        period = self._period
+        slot = self.slot
+        lock = self.lock
+
+        while self._is_running.is_set():
+            start = perf_counter()
+
+            try:
+                with lock:
+                    data = self._poll()
+
+            except Exception as E:
+                # reported by the main thread
+                self.exception = E
+                self._is_running.clear()
+                return
+
+            slot.write(perf_counter(), data)
+
+            wait = period - (perf_counter() - start)
+            if wait > 0.0:
+                sleep(wait)
@@ -9,19 +9,32 @@ def getAddonName():
     return __name__.split('.')[0]
 
 
+def getAddonPreferences(context):
+    """
+    Preferences of the addon
+    """
+    addon = getAddonName()
+    return context.user_preferences.addons[addon].preferences
+
+
 def getDisplayBackend(context):
     """
     Preference set in the addon
     """
-    addon = getAddonName()
-    preferences = context.user_preferences.addons[addon].preferences
+    preferences = getAddonPreferences(context)
     return preferences.display_backend
 
 
+_checked_modules = set()
+
+
 def checkModule(path):
     """
-    If library exists append it to sys.path
+    If library exists append it to sys.path, only once per library
     """
+    if path in _checked_modules:
+        return
+
     import sys
     import os
 
@@ -31,6 +44,23 @@ def checkModule(path):
     if library_path not in sys.path:
         sys.path.append(library_path)
 
+    _checked_modules.add(path)
+
+
+def matrixDifference(matrix_a, matrix_b):
+    """
+    Largest absolute difference between the elements of two matrices
+    """
+    difference = 0.0
+
+    for row_a, row_b in zip(matrix_a, matrix_b):
+        for a, b in zip(row_a, row_b):
+            delta = abs(a - b)
+            if delta > difference:
+                difference = delta
+
+    return difference
+
 
 def isMac():
     """
@@ -0,0 +1,180 @@
+"""
+Level of Detail
+***************
+
+Draw lighter versions of the objects that are small on the HMD screen
+
+The detail tiers of an object are other objects, listed from the finest
+to the coarsest in its ``vr_lod`` custom property (comma separated
+names, e.g. "Tree.LOD1, Tree.LOD2"), usually hidden in the viewport.
+They are read when the HMD starts and when objects are added or removed.
+While the HMD renders, one object of each set is shown and the others
+hidden, so the master viewport keeps the original ones.
+
+The tiers are whole objects, not mesh data or modifier levels: assigning
+``ob.data`` or a subdivision level is an RNA update that tags the object
+and rebuilds its derived mesh on the next redraw, twice a frame to keep
+the master viewport untouched. The hide flags are written in bulk
+without updates, and restored after the HMD drawing.
+
+The tier follows the projected size of the object (bounding sphere
+radius over its distance to the head, scaled by the lens): the first
+tier below ``screen_size``, and another tier every time it halves.
+A tier only changes once the size is out of the hysteresis band, so
+the objects don't flicker on the boundaries.
+
+It needs NumPy, and the bounds of :class:`culling.SceneBounds`.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+LOD_PROPERTY = "vr_lod"
+
+
+def eyePosition(modelview_matrix):
+    """
+    World space position of the eye of a modelview matrix
+    """
+    matrix = numpy.asarray(modelview_matrix, dtype=numpy.float64)
+    return -matrix[:3, :3].T.dot(matrix[:3, 3])
+
+
+class LevelOfDetail:
+    __slots__ = {
+        "screen_size",
+        "hysteresis",
+        "_structure",
+        "_generation",
+        "_bases",
+        "_members",
+        "_tier_counts",
+        "_tiers",
+        "_hidden",
+        }
+
+    def __init__(self, screen_size=0.25, hysteresis=0.1):
+        """
+        :param screen_size: projected size (fraction of the half height of the view) of the first tier
+        :type screen_size: float
+        :param hysteresis: fraction of the size an object goes past a boundary before it changes tier
+        :type hysteresis: float
+        """
+        self.screen_size = screen_size
+        self.hysteresis = hysteresis
+        self._structure = -1
+        self._generation = -1
+        self._bases = None
+        self._members = None
+        self._tier_counts = None
+        self._tiers = None
+        self._hidden = None
+
+    @property
+    def count(self):
+        """
+        Number of objects with detail tiers
+        """
+        return 0 if self._bases is None else len(self._bases)
+
+    def _register(self, scene):
+        """
+        Index the detail tiers of the objects, when objects are added or removed only
+        """
+        objects = scene.objects
+        indices = {ob.name: i for i, ob in enumerate(objects)}
+        sets = []
+
+        for i, ob in enumerate(objects):
+            names = ob.get(LOD_PROPERTY)
+            if not names:
+                continue
+
+            members = [i]
+            for name in str(names).split(","):
+                index = indices.get(name.strip())
+                if index is not None and index != i:
+                    members.append(index)
+
+            if len(members) > 1:
+                sets.append(members)
+
+        if not sets:
+            self._bases = None
+            self._members = None
+            self._tier_counts = None
+            self._tiers = None
+            return
+
+        width = max(len(members) for members in sets)
+
+        # padded with the coarsest tier, the tiers past it fall back to it
+        self._members = numpy.array([members + members[-1:] * (width - len(members)) for members in sets], dtype=numpy.intp)
+        self._bases = self._members[:, 0].copy()
+        self._tier_counts = numpy.array([len(members) - 1 for members in sets], dtype=numpy.intp)
+
+        # start from the original objects
+        self._tiers = numpy.zeros(len(sets), dtype=numpy.intp)
+
+    def _tierOf(self, sizes):
+        with numpy.errstate(divide='ignore'):
+            tiers = numpy.ceil(numpy.log2(self.screen_size / sizes))
+
+        return numpy.clip(tiers, 0, self._tier_counts).astype(numpy.intp)
+
+    def apply(self, scene, scene_bounds, matrices):
+        """
+        Show the tier of every object set for its projected size
+
+        :param matrices: (projection, modelview) matrices of each eye
+        :type matrices: list of tuple
+        :return: the hide flags of every object, :attr:`culling.SceneBounds.flags` if nothing changes
+        :rtype: numpy.ndarray
+        """
+        if self._structure != scene_bounds.structure:
+            self._register(scene)
+            self._structure = scene_bounds.structure
+
+        if self._generation != scene_bounds.generation:
+            # the hide flags may have changed
+            self._generation = scene_bounds.generation
+            self._hidden = None
+
+        if self._bases is None:
+            return scene_bounds.flags
+
+        # both eyes get the same tiers
+        eye = sum(eyePosition(modelview_matrix) for projection_matrix, modelview_matrix in matrices) / len(matrices)
+        scale = matrices[0][0][1][1]
+
+        bases = self._bases
+        centers = scene_bounds.centers[bases]
+        distances = numpy.sqrt(((centers - eye) ** 2).sum(axis=1))
+        sizes = scene_bounds.radii[bases] * scale / numpy.maximum(distances, 1e-6)
+
+        tiers = self._tiers
+        coarser = self._tierOf(sizes * (1.0 + self.hysteresis))
+        finer = self._tierOf(sizes * (1.0 - self.hysteresis))
+        tiers = numpy.where(coarser > tiers, coarser, numpy.where(finer < tiers, finer, tiers))
+
+        # the flags are only built again when a tier changes
+        if self._hidden is None or not numpy.array_equal(tiers, self._tiers):
+            self._tiers = tiers
+            self._hidden = self._override(scene_bounds.flags, tiers)
+
+        return self._hidden
+
+    def _override(self, flags, tiers):
+        # the sets of the objects hidden in the scene stay untouched
+        is_active = ~flags[self._bases]
+        members = self._members[is_active]
+
+        if not len(members):
+            return flags
+
+        hidden = flags.copy()
+        hidden[members.ravel()] = True
+        hidden[members[numpy.arange(len(members)), tiers[is_active]]] = False
+        return hidden
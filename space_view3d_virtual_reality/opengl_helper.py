@@ -1,6 +1,108 @@
 import bpy
-from bgl import *
-from mathutils import Matrix, Euler
+import bgl
+from bgl import (
+        Buffer,
+        GL_ACTIVE_TEXTURE,
+        GL_BYTE,
+        GL_COLOR_ATTACHMENT0,
+        GL_COMPILE_STATUS,
+        GL_DEPTH_ATTACHMENT,
+        GL_DEPTH_COMPONENT,
+        GL_DEPTH_COMPONENT32,
+        GL_DEPTH_TEST,
+        GL_DRAW_FRAMEBUFFER,
+        GL_FILL,
+        GL_FLOAT,
+        GL_FRAGMENT_SHADER,
+        GL_FRAMEBUFFER,
+        GL_FRAMEBUFFER_COMPLETE,
+        GL_FRAMEBUFFER_INCOMPLETE_ATTACHMENT,
+        GL_FRAMEBUFFER_INCOMPLETE_DRAW_BUFFER,
+        GL_FRAMEBUFFER_INCOMPLETE_LAYER_TARGETS,
+        GL_FRAMEBUFFER_INCOMPLETE_MISSING_ATTACHMENT,
+        GL_FRAMEBUFFER_INCOMPLETE_MULTISAMPLE,
+        GL_FRAMEBUFFER_INCOMPLETE_READ_BUFFER,
+        GL_FRAMEBUFFER_UNDEFINED,
+        GL_FRAMEBUFFER_UNSUPPORTED,
+        GL_FRONT_AND_BACK,
+        GL_INT,
+        GL_LESS,
+        GL_LINEAR,
+        GL_MODELVIEW,
+        GL_MODELVIEW_MATRIX,
+        GL_NEAREST,
+        GL_NONE,
+        GL_PROJECTION,
+        GL_PROJECTION_MATRIX,
+        GL_QUADS,
+        GL_RENDERBUFFER,
+        GL_RGB,
+        GL_RGBA,
+        GL_RGBA8,
+        GL_TEXTURE,
+        GL_TEXTURE0,
+        GL_TEXTURE_2D,
+        GL_TEXTURE_COMPARE_MODE,
+        GL_TEXTURE_MAG_FILTER,
+        GL_TEXTURE_MIN_FILTER,
+        GL_UNSIGNED_BYTE,
+        GL_VIEWPORT,
+        glActiveTexture,
+        glAttachShader,
+        glBegin,
+        glBindFramebuffer,
+        glBindRenderbuffer,
+        glBindTexture,
+        glCheckFramebufferStatus,
+        glColor4f,
+        glCompileShader,
+        glCopyTexSubImage2D,
+        glCreateProgram,
+        glCreateShader,
+        glDeleteFramebuffers,
+        glDeleteProgram,
+        glDeleteRenderbuffers,
+        glDeleteTextures,
+        glDepthFunc,
+        glEnable,
+        glEnd,
+        glFramebufferRenderbuffer,
+        glFramebufferTexture2D,
+        glGenFramebuffers,
+        glGenRenderbuffers,
+        glGenTextures,
+        glGetFloatv,
+        glGetIntegerv,
+        glGetProgramInfoLog,
+        glGetShaderInfoLog,
+        glGetShaderSource,
+        glGetShaderiv,
+        glGetUniformLocation,
+        glIsFramebuffer,
+        glIsProgram,
+        glIsTexture,
+        glLinkProgram,
+        glLoadIdentity,
+        glMatrixMode,
+        glOrtho,
+        glPolygonMode,
+        glPopMatrix,
+        glPushMatrix,
+        glRenderbufferStorage,
+        glShaderSource,
+        glTexCoord3f,
+        glTexImage2D,
+        glTexParameteri,
+        glTranslatef,
+        glUniform1f,
+        glUniform1i,
+        glUseProgram,
+        glVertex2f,
+        glViewport,
+        gluLookAt,
+        )
+
+from .pool import newPool
 
 SpaceView3D = bpy.types.SpaceView3D
 callback_handle = []
@@ -78,14 +180,18 @@ def resize(self, context):
     self.width = context.region.width
     self.height = context.region.height
 
-    self.buffer_width, self.buffer_height = calculate_image_size(self.width, self.height)
+    # non power of two textures are fine, and much smaller for a 1920x1080 region
+    self.buffer_width, self.buffer_height = calculate_image_size(self.width, self.height, power_of_two=False)
 
     # image to dump screen
     self.color_id = create_image(self.buffer_width, self.buffer_height, GL_RGBA)
 
 
-def calculate_image_size(width, height):
-    """get a power of 2 size"""
+def calculate_image_size(width, height, power_of_two=True):
+    """get a power of 2 size, or the size itself"""
+    if not power_of_two:
+        return width, height
+
     buffer_width, buffer_height = 0,0
 
     i = 0
@@ -100,21 +206,21 @@ def calculate_image_size(width, height):
 
 
 def update_image(tex_id, viewport, target=GL_RGBA, texture=GL_TEXTURE0):
-    """copy the current buffer to the image"""
-    glActiveTexture(texture)
-    glBindTexture(GL_TEXTURE_2D, tex_id)
-    glCopyTexImage2D(GL_TEXTURE_2D, 0, target, viewport[0], viewport[1], viewport[2], viewport[3], 0)
-    glBindTexture(GL_TEXTURE_2D, 0)
+    """copy the current buffer to the image, in place"""
+    texture_manager.update(tex_id, viewport, texture)
 
 
 def create_image(width, height, target=GL_RGBA):
-    """create an empty image, dimensions pow2"""
+    """create an empty image, reusing a pooled one if possible"""
+    return texture_manager.acquire(width, height, target)
+
+
+def _create_image(width, height, target=GL_RGBA):
+    """allocate the storage of an empty image, once"""
     if target == GL_RGBA:
-        target, internal_format, dimension  = GL_RGBA, GL_RGB, 3
+        target, internal_format, storage_format, dimension = GL_RGBA, GL_RGB, GL_RGBA8, 3
     else:
-        target, internal_format, dimension = GL_DEPTH_COMPONENT32, GL_DEPTH_COMPONENT, 1
-
-    null_buffer = Buffer(GL_BYTE, [(width + 1) * (height + 1) * dimension])
+        target, internal_format, storage_format, dimension = GL_DEPTH_COMPONENT32, GL_DEPTH_COMPONENT, GL_DEPTH_COMPONENT32, 1
 
     id_buf = Buffer(GL_INT, 1)
     glGenTextures(1, id_buf)
@@ -122,30 +228,98 @@ def create_image(width, height, target=GL_RGBA):
     tex_id = id_buf.to_list()[0]
     glBindTexture(GL_TEXTURE_2D, tex_id)
 
-    glTexImage2D(GL_TEXTURE_2D, 0, target, width, height, 0, internal_format, GL_UNSIGNED_BYTE, null_buffer)
+    if _has_texture_storage:
+        # immutable storage, the driver does not need to track reallocations
+        bgl.glTexStorage2D(GL_TEXTURE_2D, 1, storage_format, width, height)
+
+    else:
+        try:
+            glTexImage2D(GL_TEXTURE_2D, 0, target, width, height, 0, internal_format, GL_UNSIGNED_BYTE, None)
+
+        except TypeError:
+            # older bgl requires a buffer, make it exactly the size of the image
+            null_buffer = Buffer(GL_BYTE, [width * height * dimension])
+            glTexImage2D(GL_TEXTURE_2D, 0, target, width, height, 0, internal_format, GL_UNSIGNED_BYTE, null_buffer)
+            del null_buffer
+
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
 
     if target == GL_DEPTH_COMPONENT32:
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_COMPARE_MODE, GL_NONE)
 
-    glCopyTexImage2D(GL_TEXTURE_2D, 0, target, 0, 0, width, height, 0)
-
     glBindTexture(GL_TEXTURE_2D, 0)
 
-    del null_buffer
-
     return tex_id
 
 
 def delete_image(tex_id):
-    """clear created image"""
+    """give the created image back to the pool"""
+    if not texture_manager.release(tex_id):
+        _delete_image(tex_id)
+
+
+def _delete_image(tex_id):
+    """free the image"""
     id_buf = Buffer(GL_INT, 1)
-    id_buf.to_list()[0] = tex_id
+    id_buf[0] = tex_id
 
     if glIsTexture(tex_id):
         glDeleteTextures(1, id_buf)
 
+
+# glTexStorage2D is only exposed by recent versions of bgl
+_has_texture_storage = hasattr(bgl, "glTexStorage2D")
+
+
+class TextureManager:
+    """
+    Images with their storage allocated once per size
+
+    The screen copies only update the contents of the allocated
+    storage, instead of reallocating it every frame.
+    """
+    __slots__ = {
+        "_pool",
+        "_sizes",
+        }
+
+    def __init__(self):
+        self._pool = newPool(self._allocate, self._free)
+        self._sizes = {}
+
+    def acquire(self, width, height, target=GL_RGBA):
+        """get an image of this size, reusing an idle one if possible"""
+        return self._pool.acquire((width, height, target, 0))
+
+    def release(self, tex_id):
+        """give an image back, False if it does not come from the manager"""
+        return self._pool.release(tex_id)
+
+    def update(self, tex_id, viewport, texture=GL_TEXTURE0):
+        """copy the current read buffer to the image, without reallocating it"""
+        width, height = self._sizes.get(tex_id, (viewport[2], viewport[3]))
+
+        glActiveTexture(texture)
+        glBindTexture(GL_TEXTURE_2D, tex_id)
+        glCopyTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, viewport[0], viewport[1], min(width, viewport[2]), min(height, viewport[3]))
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def _allocate(self, key):
+        width, height, target, samples = key
+        tex_id = _create_image(width, height, target)
+        self._sizes[tex_id] = (width, height)
+        return tex_id
+
+    def _free(self, tex_id):
+        self._sizes.pop(tex_id, None)
+        _delete_image(tex_id)
+
+
+# a single pool: textures are shared between the contexts of the windows, unlike framebuffers
+texture_manager = TextureManager()
+
+
 # ##################
 # Framebuffer Routines
 # ##################
@@ -177,8 +351,25 @@ def check_framebuffer_status(target):
     return False
 
 
+def _current_context():
+    """the window whose GL context is current, 0 if none"""
+    window = getattr(bpy.context, "window", None)
+    return window.as_pointer() if window else 0
+
+
 def create_framebuffer(width, height, target=GL_RGBA):
-    """create an empty framebuffer"""
+    """create an empty framebuffer, reusing a pooled one of the current context if possible"""
+    pool = _framebuffer_pool(_current_context())
+    fbo_id = pool.acquire((width, height, target, 0))
+
+    if fbo_id == -1:
+        pool.discard(fbo_id)
+
+    return fbo_id
+
+
+def _create_framebuffer(width, height, target=GL_RGBA):
+    """allocate an empty framebuffer"""
     id_buf = Buffer(GL_INT, 1)
 
     glGenFramebuffers(1, id_buf)
@@ -188,7 +379,7 @@ def create_framebuffer(width, height, target=GL_RGBA):
         print("Framebuffer error on creation")
         return -1
 
-    tex_id = create_image(width, height)
+    tex_id = _create_image(width, height)
 
     glBindFramebuffer(GL_FRAMEBUFFER, fbo_id)
     glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, tex_id, 0)
@@ -202,10 +393,12 @@ def create_framebuffer(width, height, target=GL_RGBA):
     # attach the depth buffer
     glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth_id)
 
+    _framebuffer_attachments[(_current_context(), fbo_id)] = (tex_id, depth_id)
+
     #glDrawBuffers(fbo_id, GL_COLOR_ATTACHMENT0)
 
     if not check_framebuffer_status(GL_DRAW_FRAMEBUFFER):
-        delete_framebuffer(fbo_id)
+        _delete_framebuffer(fbo_id)
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
         return -1
 
@@ -214,18 +407,85 @@ def create_framebuffer(width, height, target=GL_RGBA):
 
 
 def delete_framebuffer(fbo_id):
-    """clear created framebuffer"""
+    """give the created framebuffer back to the pool"""
+    if not _framebuffer_pool(_current_context()).release(fbo_id):
+        _delete_framebuffer(fbo_id)
+
+
+def _delete_framebuffer(fbo_id, context=None):
+    """free the framebuffer and its attachments"""
+    current = _current_context()
+
+    if context is None:
+        context = current
+
+    tex_id, depth_id = _framebuffer_attachments.pop((context, fbo_id), (0, 0))
     id_buf = Buffer(GL_INT, 1)
-    id_buf.to_list()[0] = fbo_id
 
-    if glIsFramebuffer(fbo_id):
+    # the name means another framebuffer in another context, this one goes away with its window
+    if context == current and glIsFramebuffer(fbo_id):
+        id_buf[0] = fbo_id
         glDeleteFramebuffers(1, id_buf)
 
+    # textures and renderbuffers are shared between the contexts of the windows
+    if tex_id:
+        _delete_image(tex_id)
+
+    if depth_id:
+        id_buf[0] = depth_id
+        glDeleteRenderbuffers(1, id_buf)
+
+
+def _framebuffer_pool(context):
+    """framebuffers are not shared between GL contexts, each context has its own pool"""
+    pool = _framebuffer_pools.get(context)
+
+    if pool is None:
+        pool = newPool(lambda key: _create_framebuffer(key[0], key[1], key[2]),
+                       lambda fbo_id: _delete_framebuffer(fbo_id, context))
+        _framebuffer_pools[context] = pool
+
+    return pool
+
+
+# (context, framebuffer) -> (color texture, depth renderbuffer)
+_framebuffer_attachments = {}
+
+# context -> pool
+_framebuffer_pools = {}
+
 # ##################
 # GLSL Screen Shader
 # ##################
+
+# uniforms set by setup_uniforms(), looked up once at link time
+SCREEN_UNIFORMS = (
+        "bgl_RenderedTexture",
+        "bgl_RenderedTextureWidth",
+        "bgl_RenderedTextureHeight",
+        "bgl_RenderedStereoEye",
+        )
+
+# (program, source hash, shader type) -> linked program
+_program_cache = {}
+
+# program -> {uniform name: location}
+_uniform_locations = {}
+
+
+def _source_hash(source):
+    import hashlib
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
 def create_shader(source, program=None, type=GL_FRAGMENT_SHADER):
-    """"""
+    """compile and link the shader, programs are cached by source and type"""
+    key = (program, _source_hash(source), type)
+    cached = _program_cache.get(key)
+
+    if cached is not None:
+        return cached
+
     if program == None:
         program = glCreateProgram()
 
@@ -241,23 +501,55 @@ def create_shader(source, program=None, type=GL_FRAGMENT_SHADER):
     glAttachShader(program, shader)
     glLinkProgram(program)
 
+    # fill the uniform table once, the locations only change when relinking
+    _uniform_locations[program] = {name: glGetUniformLocation(program, name) for name in SCREEN_UNIFORMS}
+
+    _program_cache[key] = program
     return program
 
 
+def uniform_location(program, name):
+    """location of the uniform, from the table filled at link time"""
+    locations = _uniform_locations.setdefault(program, {})
+    location = locations.get(name)
+
+    if location is None:
+        location = glGetUniformLocation(program, name)
+        locations[name] = location
+
+    return location
+
+
+def invalidate_shader_cache(delete=False):
+    """
+    forget the cached programs, e.g. when the OpenGL context is lost
+
+    :param delete: also delete the programs, only if the context is still valid
+    :type delete: bool
+    """
+    if delete:
+        for program in set(_program_cache.values()):
+            if glIsProgram(program):
+                glDeleteProgram(program)
+
+    _program_cache.clear()
+    _uniform_locations.clear()
+
+
 def setup_uniforms(program, color_id, width, height, is_left):
     """"""
-    uniform = glGetUniformLocation(program, "bgl_RenderedTexture")
+    uniform = uniform_location(program, "bgl_RenderedTexture")
     glActiveTexture(GL_TEXTURE0)
     glBindTexture(GL_TEXTURE_2D, color_id)
     if uniform != -1: glUniform1i(uniform, 0)
 
-    uniform = glGetUniformLocation(program, "bgl_RenderedTextureWidth")
+    uniform = uniform_location(program, "bgl_RenderedTextureWidth")
     if uniform != -1: glUniform1f(uniform, width)
 
-    uniform = glGetUniformLocation(program, "bgl_RenderedTextureHeight")
+    uniform = uniform_location(program, "bgl_RenderedTextureHeight")
     if uniform != -1: glUniform1f(uniform, height)
 
-    uniform = glGetUniformLocation(program, "bgl_RenderedStereoEye")
+    uniform = uniform_location(program, "bgl_RenderedStereoEye")
     if uniform != -1: glUniform1i(uniform, 0 if is_left else 1)
 
 def bindcode(image):
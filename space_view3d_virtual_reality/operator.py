@@ -2,13 +2,30 @@ import bpy
 
 from bpy.app.handlers import persistent
 
-from .hmd import HMD
+from time import perf_counter
 
-from .preview import Preview
+from .commands import (
+        Commands,
+        command_bus,
+        )
+
+from .pacing import FramePacer
+
+from .pool import trimPools
+
+from .profiler import frame_profiler
+
+from .visibility import (
+        VisibilityCache,
+        scene_generation,
+        viewState,
+        virtual_reality_scene_update_post,
+        )
 
 from .lib import (
         getDisplayBackend,
         isMac,
+        matrixDifference,
         )
 
 
@@ -16,17 +33,9 @@ TODO = False
 
 
 # ############################################################
-# Commands
+# Slave Status
 # ############################################################
 
-class Commands:
-    recenter = 'RECENTER'
-    fullscreen = 'FULLSCREEN'
-    play = 'PLAY'
-    pause = 'PAUSE'
-    test = 'TEST'
-
-
 class SlaveStatus:
     non_setup    = 0   # initial
     dupli        = 1   # view3d duplicated
@@ -53,6 +62,8 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
     # update the values in def _init_static
     _hmd = None
     _timer = None
+    _timer_window = None
+    _pacer = None
     _handle_pre = None
     _handle_post = None
     _handle_pixel = None
@@ -65,6 +76,15 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
     _visible_master = None
     _visible_slave = None
     _is_rendering = False
+    _last_frame = None
+    _readback = None
+    _export = None
+    _capture = None
+    _frame_index = 0
+    _scissor = None
+    _scene_bounds = None
+    _culler = None
+    _lod = None
 
     action = bpy.props.EnumProperty(
         description="",
@@ -99,8 +119,14 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
             area.tag_redraw()
             return {'FINISHED'}
 
+        if event.type == 'TIMER':
+            # outside of the drawing, only when the commands changed
+            command_bus.mirror(vr.commands)
+
         if event.type == 'TIMER' and \
            not vr.is_paused:
+            frame_profiler.frameBegin()
+
             if self._slave_area:
                 self._slave_area.tag_redraw()
 
@@ -110,8 +136,39 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
             if vr.use_preview:
                 area.tag_redraw()
 
+            self._pace(context)
+
         return {'PASS_THROUGH'}
 
+    def _pace(self, context):
+        """
+        Re-schedule the timer to start the next frame as late as it safely can
+        """
+        pacer = self._pacer
+        now = perf_counter()
+        wm = context.window_manager
+
+        if self._timer:
+            step = pacer.reschedule(self._timer.time_step, now)
+
+            if step is not None:
+                wm.event_timer_remove(self._timer)
+                self._timer = wm.event_timer_add(step, self._timer_window)
+
+        vr = wm.virtual_reality
+        if vr.missed_frames != pacer.missed:
+            vr.missed_frames = pacer.missed
+
+        if vr.use_profiling and self._hmd:
+            vr.pose_age = self._hmd.pose_age * 1000.0
+
+            if self._culler:
+                if vr.culled_objects != self._culler.culled:
+                    vr.culled_objects = self._culler.culled
+
+                vr.cull_time = self._culler.cost * 1000.0
+                vr.cull_saved_time = self._culler.saved * 1000.0
+
     def invoke(self, context, event):
         wm = context.window_manager
         vr = wm.virtual_reality
@@ -201,6 +258,27 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
 
         self._preview.quit()
 
+        if self._export:
+            self._export.close()
+            print("Frame export: {0} frames published, {1} dropped".format(
+                  self._export.published, self._export.dropped))
+            self._export = None
+
+        if self._capture:
+            self._capture.close()
+            print("Capture: {0} frames written, {1} dropped".format(
+                  self._capture.written // 2, self._capture.dropped))
+            self._capture = None
+
+        self._readback = None
+
+        if self._scene_bounds:
+            self._scene_bounds.close()
+            self._scene_bounds = None
+
+        self._culler = None
+        self._lod = None
+
         if self._hmd:
             self._hmd.quit()
 
@@ -217,6 +295,8 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
     def _init_static(self):
         self._hmd = None
         self._timer = None
+        self._timer_window = None
+        self._pacer = FramePacer()
         self._handle_pre = None
         self._handle_post = None
         self._handle_pixel = None
@@ -226,9 +306,18 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
         self._slave_window = None
         self._slave_area = None
         self._is_mac = isMac()
-        self._visible_master = None
-        self._visible_slave = None
+        self._visible_master = VisibilityCache()
+        self._visible_slave = VisibilityCache()
         self._is_rendering = False
+        self._last_frame = None
+        self._readback = None
+        self._export = None
+        self._capture = None
+        self._frame_index = 0
+        self._scissor = None
+        self._scene_bounds = None
+        self._culler = None
+        self._lod = None
 
     def init(self, context):
         """
@@ -242,14 +331,19 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
 
         self._init_static()
 
+        # only imported once the display starts, to keep the add-on startup light
+        from .hmd import HMD
+        from .preview import Preview
+
         display_backend = getDisplayBackend(context)
         self._hmd = HMD(display_backend, context, self._error_callback)
         self._preview = Preview()
 
         self._hash_master = hash(context.area)
 
-        # setup modal
-        self._timer = wm.event_timer_add(1.0 / 75.0, context.window) # 75 Hz
+        # setup modal, the timer is re-scheduled once we know the device
+        self._timer_window = context.window
+        self._timer = wm.event_timer_add(self._pacer.period, context.window)
         self._handle_pre = bpy.types.SpaceView3D.draw_handler_add(self._draw_callback_pre, (context,), 'WINDOW', 'PRE_VIEW')
         self._handle_post = bpy.types.SpaceView3D.draw_handler_add(self._draw_callback_post, (context,), 'WINDOW', 'POST_VIEW')
         self._handle_pixel = bpy.types.SpaceView3D.draw_handler_add(self._draw_callback_pixel, (context,), 'WINDOW', 'POST_PIXEL')
@@ -264,10 +358,102 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
         return True
 
     def _init(self, context):
+        vr = context.window_manager.virtual_reality
+        self._hmd.setDynamicResolution(vr.use_dynamic_resolution, vr.resolution_floor * 0.01)
+        self._hmd.setAsyncSubmission(vr.use_async_submission)
+        self._hmd.setStereoLayout(vr.stereo_layout)
+
         if not self._hmd.init(context):
             self.report({'ERROR'}, "Error initializing device")
             return False
 
+        if self._hmd.is_side_by_side:
+            from .stereo import ViewportScissor
+            self._scissor = ViewportScissor()
+
+        self._pacer.refresh_rate = self._hmd.refresh_rate
+        self._pacer.reset()
+
+        if vr.use_recording:
+            try:
+                self._hmd.startRecording(bpy.path.abspath(vr.record_filepath))
+
+            except OSError as E:
+                self.report({'ERROR'}, "Error recording the tracking: {0}".format(E))
+                return False
+
+        use_frame_export = vr.use_frame_export
+        use_capture = vr.use_capture
+
+        if use_frame_export or use_capture:
+            from .readback import (
+                    TextureReadback,
+                    isSupported as isReadbackSupported,
+                    )
+
+            if not isReadbackSupported():
+                self.report({'WARNING'}, "Exporting and capturing the frames need direct access to the bgl buffers, "
+                                         "not available in this version of Blender")
+                use_frame_export = use_capture = False
+
+        if use_frame_export:
+            from .export import (
+                    DEFAULT_FILEPATH as EXPORT_FILEPATH,
+                    FrameExport,
+                    )
+
+            filepath = bpy.path.abspath(vr.export_filepath) if vr.export_filepath else EXPORT_FILEPATH
+
+            # the lower resolution tiers fit in the native size
+            width = height = 0
+            for i in range(2):
+                self._hmd.setEye(i)
+                width = max(width, self._hmd.width)
+                height = max(height, self._hmd.height)
+
+            try:
+                self._export = FrameExport(filepath, width, height)
+
+            except OSError as E:
+                self.report({'ERROR'}, "Error exporting the frames: {0}".format(E))
+                return False
+
+        if use_capture:
+            from .capture import FrameCapture
+
+            try:
+                # not the Blender binary, the encoders run a script
+                self._capture = FrameCapture(bpy.path.abspath(vr.capture_directory), bpy.app.binary_path_python)
+
+            except OSError as E:
+                self.report({'ERROR'}, "Error capturing the frames: {0}".format(E))
+                return False
+
+        from .culling import (
+                FrustumCuller,
+                SceneBounds,
+                numpy,
+                )
+
+        from .lod import LevelOfDetail
+
+        if numpy is not None:
+            # also used by the 'OBJECT' hide method
+            self._scene_bounds = SceneBounds()
+
+            if vr.use_culling:
+                self._culler = FrustumCuller()
+
+            if vr.use_lod:
+                self._lod = LevelOfDetail(vr.lod_screen_size, vr.lod_hysteresis)
+
+        elif vr.use_culling or vr.use_lod:
+            self.report({'WARNING'}, "Frustum culling and level of detail need NumPy, drawing all the objects")
+
+        if self._export or self._capture:
+            # more buffers in rotation while the workers still copy the previous ones
+            self._readback = TextureReadback(3 if self._capture else 2)
+
         # get the data from device
         color_texture = [0, 0]
         for i in range(2):
@@ -370,11 +556,8 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
         """
         Process any pending command from the main window
         """
-        wm = context.window_manager
-        vr = wm.virtual_reality
-
-        while vr.commands:
-            command = vr.command_pop()
+        while command_bus:
+            command = command_bus.pop()
 
             if command == Commands.recenter:
                 if self._hmd:
@@ -403,24 +586,246 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
         Get fresh tracking data and render into the FBO
         """
         self._is_rendering = True
+        start = perf_counter()
+
+        frame_profiler.begin('hmd.loop')
         self._hmd.loop(context)
+        frame_profiler.end('hmd.loop')
 
         scene = context.scene
         view3d = context.space_data
         region = context.region
 
+        matrices = []
+        frustums = []
         for i in range(2):
             self._hmd.setEye(i)
+            modelview_matrix = self._hmd.modelview_matrix
+            frustums.append((self._hmd.projection_matrix, modelview_matrix))
+            matrices.append((self._hmd.viewport_projection_matrix, modelview_matrix))
+
+        # the previous frame may still be in flight, the waits are not part of the frame cost
+        wait_start = perf_counter()
+        self._hmd.waitSubmission()
+        waited = perf_counter() - wait_start
+
+        render_time = None
+        if self._isRedrawNeeded(context, matrices):
+            if self._readback:
+                frame_profiler.begin('readback')
+                self._readFrame()
+                frame_profiler.end('readback')
+
+            # the resolution only changes the drawing time
+            render_start = perf_counter()
+
+            lod_time = draw_time = 0.0
+
+            is_hiding = self._culler or self._lod
+            try:
+                if is_hiding:
+                    # with the eye projections, not the ones remapped to the side-by-side viewports
+                    lod_time = self._hideObjects(context, frustums)
+
+                draw_start = perf_counter()
+                self._draw(scene, view3d, region, matrices)
+                draw_time = perf_counter() - draw_start
+
+            finally:
+                # the culled objects and the detail tiers must not stay hidden in the user scene
+                if is_hiding:
+                    self._scene_bounds.show(scene)
+
+            render_time = perf_counter() - render_start
+
+            if self._culler:
+                self._culler.measure(render_time - draw_time - lod_time, draw_time)
+
+            if self._readback:
+                self._requestFrame()
+
+        elif self._readback:
+            self._repeatFrame()
+
+        frame_profiler.begin('frameReady')
+        self._hmd.submitFrame()
+        frame_profiler.end('frameReady')
+
+        waited += self._hmd.frame_wait
+        self._pacer.frameEnd(start + waited, perf_counter())
+
+        if render_time is not None and self._hmd.updateResolution(render_time):
+            self._resolutionChanged()
+
+        self._is_rendering = False
+
+    def _hideObjects(self, context, matrices):
+        """
+        Hide the objects the HMD doesn't need to draw, and swap the detail tiers,
+        :meth:`SceneBounds.show` restores them for the other viewports
+
+        :return: time (in seconds) spent on the level of detail
+        :rtype: float
+        """
+        scene = context.scene
+        scene_bounds = self._scene_bounds
+
+        frame_profiler.begin('cull')
+        scene_bounds.update(scene)
+        frame_profiler.end('cull')
+
+        hidden = scene_bounds.flags
+        lod_time = 0.0
+
+        if self._lod:
+            frame_profiler.begin('lod')
+            lod_start = perf_counter()
+            vr = context.window_manager.virtual_reality
+            self._lod.screen_size = vr.lod_screen_size
+            self._lod.hysteresis = vr.lod_hysteresis
+            hidden = self._lod.apply(scene, scene_bounds, matrices)
+            lod_time = perf_counter() - lod_start
+            frame_profiler.end('lod')
+
+        frame_profiler.begin('cull')
+
+        if self._culler:
+            hidden = self._culler.apply(scene_bounds, matrices, hidden)
+
+        scene_bounds.hide(scene, hidden)
+        frame_profiler.end('cull')
+
+        return lod_time
 
+    def _requestFrame(self):
+        """
+        Read the eye buffers back, before the next frame draws into them
+        """
+        self._frame_index += 1
+
+        textures = []
+        sizes = []
+        viewports = []
+        for i in range(2):
+            self._hmd.setEye(i)
+            offscreen = self._hmd.offscreen
+            textures.append(self._hmd.color_texture)
+            sizes.append((offscreen.width, offscreen.height))
+            viewports.append(self._hmd.viewport)
+
+        metadata = (self._frame_index,) + self._hmd.pose()
+
+        if self._hmd.is_side_by_side:
+            # a single read, split in eyes afterwards
+            self._readback.request(textures[:1], sizes[:1], metadata, viewports)
+
+        else:
+            self._readback.request(textures, sizes, metadata)
+
+    def _repeatFrame(self):
+        """
+        The headset shows the last frame again, the textures are not drawn
+        into so the previous frame can be read already, and captured again
+        """
+        frame_profiler.begin('readback')
+        self._readFrame()
+        frame_profiler.end('readback')
+
+        if self._capture:
+            self._frame_index += 1
+            self._capture.repeat(self._frame_index, self._hmd.pose()[0])
+
+    def _readFrame(self):
+        """
+        Hand the pixels of the previous frame over to their consumers,
+        the GPU is done with them by now
+        """
+        frame = self._readback.collect()
+
+        if frame is None:
+            return
+
+        pixels, sizes, (index, timestamp, orientations, positions) = frame
+
+        if self._export:
+            self._export.publish(index, timestamp, orientations, positions, pixels, sizes)
+
+        if self._capture:
+            self._capture.write(index, timestamp, orientations, positions, pixels, sizes)
+
+            if self._capture.exception:
+                self._error_callback("Capture: {0}".format(self._capture.exception), False)
+                self._capture.exception = None
+
+    def _resolutionChanged(self):
+        """
+        The eye buffers were swapped for another resolution tier
+        """
+        color_texture = [0, 0]
+        for i in range(2):
+            self._hmd.setEye(i)
+            color_texture[i] = self._hmd.color_texture
+
+        self._preview.update(color_texture[0], color_texture[1])
+
+        # the new buffers are empty
+        self._last_frame = None
+
+    def _isRedrawNeeded(self, context, matrices):
+        """
+        Whether the pose, the scene or the viewport drawing settings changed since the last drawn frame,
+        otherwise the device gets the previous textures again
+        """
+        vr = context.window_manager.virtual_reality
+        generation = scene_generation()
+        view_state = viewState(context.space_data)
+        last_frame = self._last_frame
+
+        self._last_frame = (generation, view_state, matrices)
+
+        if not vr.use_redraw_elision or last_frame is None:
+            return True
+
+        last_generation, last_view_state, last_matrices = last_frame
+        if generation != last_generation or view_state != last_view_state:
+            return True
+
+        threshold = vr.redraw_threshold
+        for (projection_matrix, modelview_matrix), (last_projection_matrix, last_modelview_matrix) in \
+                zip(matrices, last_matrices):
+
+            if matrixDifference(modelview_matrix, last_modelview_matrix) > threshold or \
+               matrixDifference(projection_matrix, last_projection_matrix) > threshold:
+                return True
+
+        # keep comparing against the drawn frame, so slow motion accumulates
+        self._last_frame = last_frame
+        return False
+
+    def _draw(self, scene, view3d, region, matrices):
+        """
+        Render both eyes into their offscreen buffers
+        """
+        is_side_by_side = self._hmd.is_side_by_side
+
+        for i, (projection_matrix, modelview_matrix) in enumerate(matrices):
+            self._hmd.setEye(i)
             offscreen = self._hmd.offscreen
-            projection_matrix = self._hmd.projection_matrix
-            modelview_matrix = self._hmd.modelview_matrix
 
             # drawing
-            offscreen.draw_view3d(scene, view3d, region, projection_matrix, modelview_matrix)
+            stage = 'draw_view3d.right' if i else 'draw_view3d.left'
+            frame_profiler.begin(stage)
 
-        self._hmd.frameReady()
-        self._is_rendering = False
+            if is_side_by_side:
+                # keep the other eye half untouched
+                self._scissor.begin(self._hmd.viewport)
+                offscreen.draw_view3d(scene, view3d, region, projection_matrix, modelview_matrix)
+                self._scissor.end()
+
+            else:
+                offscreen.draw_view3d(scene, view3d, region, projection_matrix, modelview_matrix)
+
+            frame_profiler.end(stage)
 
     def _drawPreview(self, context):
         wm = context.window_manager
@@ -434,7 +839,9 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
         vr = wm.virtual_reality
 
         if self._hmd.is_direct_mode:
+            frame_profiler.begin('commands')
             self._commands(context)
+            frame_profiler.end('commands')
 
         if vr.is_paused:
             return
@@ -452,7 +859,9 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
         if self._hmd.is_direct_mode:
             return
 
+        frame_profiler.begin('commands')
         self._commands(context)
+        frame_profiler.end('commands')
 
         if vr.is_paused:
             return
@@ -520,31 +929,17 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
         disable(font_id, SHADOW)
 
     def _pre_draw_hide(self, context, visible):
-        scene = context.scene
-        space = context.space_data
-
-        visible['objects'] = []
-        objects = visible['objects']
+        frame_profiler.begin('pre_draw_hide')
 
-        for ob in scene.objects:
-            if not ob.hide:
-                objects.append(ob)
-                ob.hide = True
+        vr = context.window_manager.virtual_reality
+        visible.hide(context, vr.hide_method, self._scene_bounds)
 
-        visible['show_grease_pencil'] = space.show_grease_pencil
-        space.show_grease_pencil = False
+        frame_profiler.end('pre_draw_hide')
 
     def _post_draw_show(self, context, visible):
-        space = context.space_data
-
-        objects = visible['objects']
-
-        for ob in objects:
-            ob.hide = False
-
-        visible['objects'] = []
-
-        space.show_grease_pencil = visible['show_grease_pencil']
+        frame_profiler.begin('post_draw_show')
+        visible.show(context)
+        frame_profiler.end('post_draw_show')
 
     def _hide_master(self, context):
         """
@@ -571,11 +966,9 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
         hash_area = hash(area)
 
         if hash_area == self._hash_slave:
-            self._visible_slave = {}
             self._pre_draw_hide(context, self._visible_slave)
 
         elif hash_area == self._hash_master and self._hide_master(context):
-            self._visible_master = {}
             self._pre_draw_hide(context, self._visible_master)
 
     def _draw_callback_post(self, context):
@@ -630,6 +1023,40 @@ class VirtualRealityDisplayOperator(bpy.types.Operator):
         vr.error_message = message
 
 
+class VirtualRealityProfileExportOperator(bpy.types.Operator):
+    """Save the frame timings of the virtual reality display"""
+    bl_idname = "view3d.virtual_reality_profile_export"
+    bl_label = "Export Frame Timings"
+    bl_description = "Save the per-stage frame timings (.csv or .json)"
+
+    filepath = bpy.props.StringProperty(
+        subtype='FILE_PATH',
+        )
+
+    @classmethod
+    def poll(cls, context):
+        return context.window_manager.virtual_reality.use_profiling
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            self.filepath = "frame_timings.csv"
+
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        filepath = bpy.path.abspath(self.filepath)
+
+        try:
+            frame_profiler.dump(filepath)
+
+        except Exception as E:
+            self.report({'ERROR'}, str(E))
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+
 # ############################################################
 # Global Properties
 # ############################################################
@@ -638,6 +1065,7 @@ from bpy.props import (
         BoolProperty,
         CollectionProperty,
         EnumProperty,
+        FloatProperty,
         StringProperty,
         IntProperty,
         )
@@ -657,6 +1085,13 @@ class VirtualRealityCommandInfo(bpy.types.PropertyGroup):
         )
 
 
+def _update_profiling(self, context):
+    if self.use_profiling and not frame_profiler.is_enabled:
+        frame_profiler.reset()
+
+    frame_profiler.is_enabled = self.use_profiling
+
+
 class VirtualRealityInfo(bpy.types.PropertyGroup):
     is_enabled = BoolProperty(
             name="Enabled",
@@ -700,6 +1135,117 @@ class VirtualRealityInfo(bpy.types.PropertyGroup):
         default="ALL",
         )
 
+    use_prediction = BoolProperty(
+        name="Prediction",
+        description="Extrapolate the tracking to the time the frame is displayed",
+        default=True,
+        )
+
+    use_tracking_thread = BoolProperty(
+        name="Tracking Thread",
+        description="Poll the device from a separate thread, so the drawing never waits for it (set before starting)",
+        default=False,
+        )
+
+    use_async_submission = BoolProperty(
+        name="Async Submission",
+        description="Send the frames to the device from a separate thread, "
+                    "so the interface does not wait for the vsync (set before starting)",
+        default=False,
+        )
+
+    stereo_layout = EnumProperty(
+        name="Stereo Layout",
+        description="How the eyes are laid out in the offscreen buffers (set before starting)",
+        items=(("SEPARATE", "Separate", "An offscreen buffer per eye"),
+               ("SIDE_BY_SIDE", "Side-by-Side", "Both eyes in a single double width offscreen buffer"),
+               ),
+        default="SEPARATE",
+        )
+
+    use_frame_export = BoolProperty(
+        name="Export Frames",
+        description="Publish the eye frames in shared memory for other local processes (set before starting)",
+        default=False,
+        )
+
+    export_filepath = StringProperty(
+        name="Export",
+        description="Shared memory file of the exported frames (empty for the default)",
+        subtype='FILE_PATH',
+        default="",
+        )
+
+    use_capture = BoolProperty(
+        name="Capture",
+        description="Save the frames shown in the headset and their pose as image sequences (set before starting)",
+        default=False,
+        )
+
+    capture_directory = StringProperty(
+        name="Capture Directory",
+        description="Folder of the captured image sequences",
+        subtype='DIR_PATH',
+        default="//capture/",
+        )
+
+    use_culling = BoolProperty(
+        name="Frustum Culling",
+        description="Hide the objects outside of both eye frustums while the headset renders, needs NumPy (set before starting)",
+        default=False,
+        )
+
+    culled_objects = IntProperty(
+        name="Culled Objects",
+        description="Objects outside of both eye frustums in the last drawn frame",
+        default=0,
+        )
+
+    cull_time = FloatProperty(
+        name="Cull Time",
+        description="Time (in milliseconds) the culling, and hiding and showing the objects, took in the last drawn frame",
+        default=0.0,
+        )
+
+    cull_saved_time = FloatProperty(
+        name="Cull Saved Time",
+        description="Drawing time (in milliseconds) the culled objects would have taken in the last drawn frame, "
+                    "at most, estimated from the time per drawn object",
+        default=0.0,
+        )
+
+    use_lod = BoolProperty(
+        name="Level of Detail",
+        description="Draw the lighter tiers (listed in the \"vr_lod\" object property) of the objects small on the headset screen, "
+                    "needs NumPy (set before starting)",
+        default=False,
+        )
+
+    lod_screen_size = FloatProperty(
+        name="Screen Size",
+        description="Projected size (in relation to the view height) below which the objects use their first lighter tier, "
+                    "the next tiers every time it halves",
+        min=0.001,
+        max=1.0,
+        default=0.25,
+        precision=3,
+        )
+
+    lod_hysteresis = FloatProperty(
+        name="Hysteresis",
+        description="How far past a tier boundary the projected size goes before the object changes tier",
+        min=0.0,
+        max=0.5,
+        default=0.1,
+        subtype='FACTOR',
+        )
+
+    pose_age = FloatProperty(
+        name="Pose Age",
+        description="Time (in milliseconds) between reading the tracking and drawing with it",
+        default=0.0,
+        )
+
     lock_camera = BoolProperty(
         name="Lock Camera",
         description="Lock the view to the camera (only for Direct Mode)",
@@ -716,22 +1262,84 @@ class VirtualRealityInfo(bpy.types.PropertyGroup):
         description = "Skip the optimization to prevent extra drawing",
         )
 
+    hide_method = EnumProperty(
+        name="Hide Method",
+        description="How to hide the scene objects while the viewports redraw",
+        items=(("BULK", "Bulk", "Hide all the objects at once, cache the visibility until the scene changes"),
+               ("OBJECT", "Object", "Hide the objects in the view one by one on every redraw (all of them without NumPy)"),
+               ),
+        default="BULK",
+        )
+
+    use_redraw_elision = BoolProperty(
+        name="Skip Still Frames",
+        description="Send the previous frame again when neither the head nor the scene moved",
+        default=True,
+        )
+
+    redraw_threshold = FloatProperty(
+        name="Threshold",
+        description="Smallest change in the view matrices that triggers a new frame",
+        min=0.0,
+        max=0.1,
+        default=0.0001,
+        precision=5,
+        )
+
+    use_dynamic_resolution = BoolProperty(
+        name="Dynamic Resolution",
+        description="Lower the eye resolution when frames take too long (set before starting)",
+        default=False,
+        )
+
+    resolution_floor = IntProperty(
+        name="Minimum Resolution",
+        description="Smallest resolution, in relation to the native resolution of the device",
+        min=10,
+        max=100,
+        default=50,
+        subtype='PERCENTAGE',
+        )
+
+    missed_frames = IntProperty(
+        name="Missed Frames",
+        description="Frames that were not ready for their display refresh",
+        default=0,
+        )
+
+    use_profiling = BoolProperty(
+        name="Profiling",
+        default=False,
+        description="Record the time spent on each stage of the frame",
+        update=_update_profiling,
+        )
+
+    use_recording = BoolProperty(
+        name="Record Tracking",
+        description="Save the tracking session, to replay it with the Replay backend (set before starting)",
+        default=False,
+        )
+
+    record_filepath = StringProperty(
+        name="Recording",
+        description="File to save the tracking session to",
+        subtype='FILE_PATH',
+        default="//tracking.vrrec",
+        )
+
+    # mirror of the command bus, for display only
     commands = CollectionProperty(type=VirtualRealityCommandInfo)
 
 
     def command_push(self, action):
-        command = self.commands.add()
-        command.action = action
+        command_bus.push(action)
 
     def command_pop(self):
-        command = self.commands[0]
-        action = command.action
-        self.commands.remove(0)
-        return action
+        return command_bus.pop()
 
     def reset(self):
-        while self.commands:
-            self.commands.remove(0)
+        command_bus.clear()
+        self.commands.clear()
 
         self.use_preview = False
         self.use_hmd_only = False
@@ -740,6 +1348,10 @@ class VirtualRealityInfo(bpy.types.PropertyGroup):
         self.is_slave_setup = False
         self.is_paused = False
         self.is_debug = False
+        self.missed_frames = 0
+        self.culled_objects = 0
+        self.cull_time = 0.0
+        self.cull_saved_time = 0.0
 
 
 # ############################################################
@@ -751,6 +1363,12 @@ def virtual_reality_load_pre(dummy):
     wm = bpy.context.window_manager
     wm.virtual_reality.reset()
 
+    # a new file is about to take memory, free the idle buffers and programs
+    trimPools()
+
+    from .opengl_helper import invalidate_shader_cache
+    invalidate_shader_cache(delete=True)
+
 
 @persistent
 def virtual_reality_load_post(dummy):
@@ -765,8 +1383,10 @@ def virtual_reality_load_post(dummy):
 def register():
     bpy.app.handlers.load_pre.append(virtual_reality_load_pre)
     bpy.app.handlers.load_pre.append(virtual_reality_load_post)
+    bpy.app.handlers.scene_update_post.append(virtual_reality_scene_update_post)
 
     bpy.utils.register_class(VirtualRealityDisplayOperator)
+    bpy.utils.register_class(VirtualRealityProfileExportOperator)
     bpy.utils.register_class(VirtualRealityCommandInfo)
     bpy.utils.register_class(VirtualRealityInfo)
     bpy.types.WindowManager.virtual_reality = bpy.props.PointerProperty(
@@ -779,8 +1399,10 @@ def register():
 def unregister():
     bpy.app.handlers.load_pre.remove(virtual_reality_load_pre)
     bpy.app.handlers.load_pre.remove(virtual_reality_load_post)
+    bpy.app.handlers.scene_update_post.remove(virtual_reality_scene_update_post)
 
     bpy.utils.unregister_class(VirtualRealityDisplayOperator)
+    bpy.utils.unregister_class(VirtualRealityProfileExportOperator)
     del bpy.types.WindowManager.virtual_reality
     bpy.utils.unregister_class(VirtualRealityInfo)
     bpy.utils.unregister_class(VirtualRealityCommandInfo)
@@ -0,0 +1,161 @@
+"""
+Frame Pacing
+************
+
+Schedule the redraws from the device refresh rate and the measured frame cost
+
+The frames are aligned to a grid of display refreshes. The next frame
+starts as late as possible while still finishing before its refresh,
+heavy scenes skip to every other refresh instead of piling up frames.
+"""
+
+from math import ceil
+
+MIN_STEP = 0.001 # seconds
+RESCHEDULE_TOLERANCE = 0.001 # seconds
+
+
+class FramePacer:
+    __slots__ = {
+        "margin",
+        "missed",
+        "frames",
+        "_period",
+        "_cost",
+        "_interval",
+        "_anchor",
+        "_deadline",
+        "_generation",
+        "_scheduled",
+        }
+
+    def __init__(self, refresh_rate=75.0, margin=0.002):
+        """
+        :param refresh_rate: display refresh rate in Hz
+        :type refresh_rate: float
+        :param margin: safety margin (in seconds) kept before each deadline
+        :type margin: float
+        """
+        self.margin = margin
+        self.refresh_rate = refresh_rate
+        self.reset()
+
+    def reset(self):
+        self.missed = 0
+        self.frames = 0
+        self._cost = None
+        self._interval = 1
+        self._anchor = None
+        self._deadline = None
+        self._generation = 0
+        self._scheduled = None
+
+    @property
+    def refresh_rate(self):
+        return 1.0 / self._period
+
+    @refresh_rate.setter
+    def refresh_rate(self, value):
+        if not value or value <= 0.0:
+            value = 75.0
+        self._period = 1.0 / value
+
+    @property
+    def period(self):
+        """
+        Time between two frames, a multiple of the refresh period
+        """
+        return self._period * self._interval
+
+    @property
+    def cost(self):
+        """
+        Average time it takes to render a frame
+        """
+        return self._cost or 0.0
+
+    def frameEnd(self, start, end):
+        """
+        Measure a frame and check whether it made its deadline
+
+        :param start: time the frame started rendering
+        :type start: float
+        :param end: time the frame was sent to the device
+        :type end: float
+        """
+        cost = end - start
+        period = self._period
+
+        if self._cost is None:
+            self._cost = cost
+        else:
+            # exponential moving average
+            self._cost += (cost - self._cost) * 0.1
+
+        self.frames += 1
+
+        if self._deadline is not None and end > self._deadline:
+            self.missed += 1
+            # re-synchronize the grid with the late frame
+            self._anchor = end
+            self._generation += 1
+
+        elif self._anchor is None:
+            self._anchor = end
+            self._generation += 1
+
+        # refreshes per frame, so frames are not queued faster than we can render them
+        interval = max(1, int(ceil((self._cost + self.margin) / period)))
+
+        if interval != self._interval:
+            self._interval = interval
+            self._generation += 1
+
+        refreshes = int(ceil((end - self._anchor) / period))
+        self._deadline = self._anchor + (refreshes + self._interval) * period
+
+    def step(self, now):
+        """
+        Time to wait for the timer event after the upcoming frame
+
+        Called on a timer event, the frame about to render aims at the current
+        deadline, so the next event is for the frame one period after it
+        """
+        if self._deadline is None:
+            return self.period
+
+        step = self._deadline + self.period - self.cost - self.margin - now
+
+        while step < MIN_STEP:
+            step += self.period
+
+        return step
+
+    def reschedule(self, current_step, now):
+        """
+        New step for the timer when the schedule changed, None to keep the timer as it is
+
+        A new frame interval, a grid re-synchronized after a missed frame or
+        a frame cost drifting past the tolerance re-arm the timer to align
+        the next frame, the tick after re-arms it once more to tick every period.
+
+        :param current_step: step of the running timer
+        :type current_step: float
+        :rtype: float or None
+        """
+        scheduled = self._scheduled
+
+        if scheduled is None or \
+           scheduled[0] != self._generation or \
+           abs(scheduled[1] - self.cost) > RESCHEDULE_TOLERANCE:
+
+            self._scheduled = (self._generation, self.cost)
+            step = self.step(now)
+
+        else:
+            step = self.period
+
+        if abs(step - current_step) > RESCHEDULE_TOLERANCE:
+            return step
+
+        return None
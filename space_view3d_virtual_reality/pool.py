@@ -0,0 +1,155 @@
+"""
+Pool
+****
+
+Keep GPU resources around between sessions
+
+Toggling the virtual reality display would otherwise allocate
+(and fragment) the same buffers over and over. Released resources
+stay idle in the pool until they are needed again, the pool is
+trimmed when its idle memory goes over budget and cleared when
+the addon is unregistered.
+"""
+
+from collections import OrderedDict
+
+DEFAULT_BUDGET = 512 * 1024 * 1024 # bytes of idle resources
+
+
+def estimateSize(key):
+    """
+    Approximate memory (in bytes) of a resource, 4 bytes per sample plus depth
+
+    :param key: (width, height, format, samples)
+    :type key: tuple
+    """
+    width, height, format, samples = key
+    return width * height * 8 * max(1, samples)
+
+
+class ResourcePool:
+    __slots__ = {
+        "budget",
+        "_create",
+        "_destroy",
+        "_idle",
+        "_in_use",
+        "_idle_size",
+        }
+
+    def __init__(self, create, destroy, budget=DEFAULT_BUDGET):
+        """
+        :param create: function to allocate a resource for a key
+        :type create: func(key)
+        :param destroy: function to free a resource
+        :type destroy: func(resource)
+        :param budget: bytes of idle resources to keep around
+        :type budget: int
+        """
+        self.budget = budget
+        self._create = create
+        self._destroy = destroy
+        self._idle = OrderedDict() # (key, resource) -> None, least recently released first
+        self._in_use = {}
+        self._idle_size = 0
+
+    @property
+    def idle_size(self):
+        return self._idle_size
+
+    def __len__(self):
+        return len(self._idle) + len(self._in_use)
+
+    def acquire(self, key):
+        """
+        Get an idle resource for the key, or allocate a new one
+
+        :param key: (width, height, format, samples)
+        :type key: tuple
+        """
+        for entry in reversed(self._idle):
+            if entry[0] == key:
+                del self._idle[entry]
+                self._idle_size -= estimateSize(key)
+                resource = entry[1]
+                break
+        else:
+            resource = self._create(key)
+
+        self._in_use[resource] = key
+        return resource
+
+    def release(self, resource):
+        """
+        Give a resource back to the pool
+
+        :return: False if the resource does not belong to the pool
+        :rtype: bool
+        """
+        key = self._in_use.pop(resource, None)
+
+        if key is None:
+            return False
+
+        self._idle[(key, resource)] = None
+        self._idle_size += estimateSize(key)
+
+        self.trim(self.budget)
+        return True
+
+    def discard(self, resource):
+        """
+        Forget a resource in use without giving it back, e.g. if it failed to initialize
+        """
+        self._in_use.pop(resource, None)
+
+    def trim(self, budget=0):
+        """
+        Free the least recently released resources until the idle memory fits the budget
+        """
+        while self._idle and self._idle_size > budget:
+            (key, resource), _ = self._idle.popitem(last=False)
+            self._idle_size -= estimateSize(key)
+            self._destroyResource(resource)
+
+    def clear(self):
+        """
+        Free all the idle resources, and forget the ones in use
+        """
+        self.trim(0)
+        self._in_use.clear()
+
+    def _destroyResource(self, resource):
+        try:
+            self._destroy(resource)
+
+        except Exception as E:
+            print(E)
+
+
+_pools = []
+
+
+def newPool(create, destroy, budget=DEFAULT_BUDGET):
+    """
+    Create a pool that is cleared with :func:`clearPools`
+    """
+    pool = ResourcePool(create, destroy, budget)
+    _pools.append(pool)
+    return pool
+
+
+def clearPools():
+    """
+    Free all the pooled resources, on unregister
+    """
+    for pool in _pools:
+        pool.clear()
+
+
+def trimPools(budget=0):
+    """
+    Free the idle resources, on memory pressure
+    """
+    for pool in _pools:
+        pool.trim(budget)
@@ -11,15 +11,57 @@ from .opengl_helper import (
         view_setup,
         )
 
-from bgl import *
+from bgl import (
+        Buffer,
+        GL_COMPILE,
+        GL_DEPTH_TEST,
+        GL_FILL,
+        GL_FRONT_AND_BACK,
+        GL_INT,
+        GL_QUADS,
+        GL_TEXTURE0,
+        GL_TEXTURE_2D,
+        GL_TEXTURE_BINDING_2D,
+        GL_VIEWPORT,
+        glActiveTexture,
+        glBegin,
+        glBindTexture,
+        glCallList,
+        glColor4f,
+        glDeleteLists,
+        glDisable,
+        glEnable,
+        glEnd,
+        glEndList,
+        glGenLists,
+        glGetIntegerv,
+        glNewList,
+        glPolygonMode,
+        glScissor,
+        glTexCoord3f,
+        glVertex2f,
+        glViewport,
+        )
 
 
 class Preview:
     __slots__ = {
             "_color_texture_left",
             "_color_texture_right",
+            "_display_list",
+            "_is_dirty",
+            "_viewport",
+            "_texture",
             }
 
+    def __init__(self):
+        self._color_texture_left = 0
+        self._color_texture_right = 0
+        self._display_list = 0
+        self._is_dirty = True
+        self._viewport = None
+        self._texture = None
+
     def init(self, color_texture_left, color_texture_right):
         """
         Initialize preview window
@@ -29,13 +71,21 @@ class Preview:
         :param color_texture_right: 2D Texture binding ID (bind to the Framebuffer Object) for right eye
         :type color_texture_right: bgl.GLuint
         """
+        # buffers for the OpenGL queries, reused every frame
+        self._viewport = Buffer(GL_INT, 4)
+        self._texture = Buffer(GL_INT, 1)
+
         self.update(color_texture_left, color_texture_right)
 
     def quit(self):
         """
         Destroy preview window
         """
-        pass
+        if self._display_list:
+            glDeleteLists(self._display_list, 1)
+            self._display_list = 0
+
+        self._is_dirty = True
 
     def update(self, color_texture_left, color_texture_right):
         """
@@ -49,15 +99,15 @@ class Preview:
         self._color_texture_left = color_texture_left
         self._color_texture_right = color_texture_right
 
+        # the display list is rebuilt in the next draw, when
+        # we are sure to be in the viewport OpenGL context
+        self._is_dirty = True
 
     def _drawRectangle(self, eye):
-        texco = [(1, 1), (0, 1), (0, 0), (1,0)]
-        verco = [[(0.0, 1.0), (-1.0, 1.0), (-1.0, -1.0), ( 0.0, -1.0)],
-                 [(1.0, 1.0), ( 0.0, 1.0), ( 0.0, -1.0), ( 1.0, -1.0)]]
-
-        glPolygonMode(GL_FRONT_AND_BACK , GL_FILL)
-
-        glColor4f(1.0, 1.0, 1.0, 0.0)
+        texco = ((1, 1), (0, 1), (0, 0), (1, 0))
+        verco = (((0.0, 1.0), (-1.0, 1.0), (-1.0, -1.0), ( 0.0, -1.0)),
+                 ((1.0, 1.0), ( 0.0, 1.0), ( 0.0, -1.0), ( 1.0, -1.0)),
+                 ((1.0, 1.0), (-1.0, 1.0), (-1.0, -1.0), ( 1.0, -1.0)))
 
         glBegin(GL_QUADS)
         for i in range(4):
@@ -65,6 +115,44 @@ class Preview:
             glVertex2f(verco[eye][i][0], verco[eye][i][1])
         glEnd()
 
+    def _build(self):
+        """
+        Record the state and geometry of both eyes in a display list
+        """
+        if not self._display_list:
+            self._display_list = glGenLists(1)
+
+        glNewList(self._display_list, GL_COMPILE)
+
+        glDisable(GL_DEPTH_TEST)
+
+        view_setup()
+
+        glEnable(GL_TEXTURE_2D)
+        glActiveTexture(GL_TEXTURE0)
+
+        glPolygonMode(GL_FRONT_AND_BACK , GL_FILL)
+        glColor4f(1.0, 1.0, 1.0, 0.0)
+
+        if self._color_texture_left == self._color_texture_right:
+            # side-by-side, both eyes in a single quad
+            glBindTexture(GL_TEXTURE_2D, self._color_texture_left)
+            self._drawRectangle(2)
+
+        else:
+            glBindTexture(GL_TEXTURE_2D, self._color_texture_left)
+            self._drawRectangle(0)
+
+            glBindTexture(GL_TEXTURE_2D, self._color_texture_right)
+            self._drawRectangle(1)
+
+        glDisable(GL_TEXTURE_2D)
+
+        view_reset()
+
+        glEndList()
+        self._is_dirty = False
+
     def loop(self, scale):
         """
         Draw in the preview window
@@ -72,11 +160,14 @@ class Preview:
         if not scale:
             return
 
-        act_tex = Buffer(GL_INT, 1)
-        glGetIntegerv(GL_TEXTURE_2D, act_tex)
+        if self._is_dirty:
+            self._build()
+
+        texture = self._texture
+        glGetIntegerv(GL_TEXTURE_BINDING_2D, texture)
 
         if scale != 100:
-            viewport = Buffer(GL_INT, 4)
+            viewport = self._viewport
             glGetIntegerv(GL_VIEWPORT, viewport)
 
             width = int(scale * 0.01 * viewport[2])
@@ -85,26 +176,10 @@ class Preview:
             glViewport(viewport[0], viewport[1], width, height)
             glScissor(viewport[0], viewport[1], width, height)
 
-        glDisable(GL_DEPTH_TEST)
-
-        view_setup()
-
-        glEnable(GL_TEXTURE_2D)
-        glActiveTexture(GL_TEXTURE0)
-
-        glBindTexture(GL_TEXTURE_2D, self._color_texture_left)
-        self._drawRectangle(0)
-
-        glBindTexture(GL_TEXTURE_2D, self._color_texture_right)
-        self._drawRectangle(1)
+        glCallList(self._display_list)
 
-        glBindTexture(GL_TEXTURE_2D, act_tex[0])
-
-        glDisable(GL_TEXTURE_2D)
-
-        view_reset()
+        glBindTexture(GL_TEXTURE_2D, texture[0])
 
         if scale != 100:
             glViewport(viewport[0], viewport[1], viewport[2], viewport[3])
             glScissor(viewport[0], viewport[1], viewport[2], viewport[3])
-
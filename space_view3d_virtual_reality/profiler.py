@@ -0,0 +1,167 @@
+"""
+Profiler
+========
+
+Per-stage timing of the frame loop
+
+The samples are kept in a fixed size ring buffer, so the overhead
+is the same after a few seconds or a few hours of session
+"""
+
+from array import array
+from time import perf_counter
+
+STAGES = (
+        'commands',
+        'pre_draw_hide',
+        'hmd.loop',
+        'readback',
+        'lod',
+        'cull',
+        'draw_view3d.left',
+        'draw_view3d.right',
+        'frameReady',
+        'post_draw_show',
+        )
+
+DEFAULT_SIZE = 4096
+
+
+class FrameProfiler:
+    __slots__ = {
+        "is_enabled",
+        "_size",
+        "_index",
+        "_count",
+        "_timestamps",
+        "_samples",
+        "_start",
+        }
+
+    def __init__(self, size=DEFAULT_SIZE):
+        self.is_enabled = False
+        self._size = size
+        self._start = {}
+        self.reset()
+
+    def reset(self):
+        """
+        Discard all the samples
+        """
+        size = self._size
+        self._index = -1
+        self._count = 0
+        self._timestamps = array('d', bytes(8 * size))
+        self._samples = {stage: array('d', bytes(8 * size)) for stage in STAGES}
+        self._start.clear()
+
+    def frameBegin(self):
+        """
+        Start a new frame, overwriting the oldest one when the buffer is full
+        """
+        if not self.is_enabled:
+            return
+
+        index = (self._index + 1) % self._size
+        self._index = index
+        self._count = min(self._count + 1, self._size)
+
+        self._timestamps[index] = perf_counter()
+        for samples in self._samples.values():
+            samples[index] = 0.0
+
+    def begin(self, stage):
+        if not self.is_enabled:
+            return
+
+        self._start[stage] = perf_counter()
+
+    def end(self, stage):
+        """
+        Time spent since :meth:`begin`, it accumulates if the stage runs more than once in the frame
+        """
+        if not self.is_enabled or self._index == -1:
+            return
+
+        start = self._start.pop(stage, None)
+        if start is None:
+            return
+
+        self._samples[stage][self._index] += perf_counter() - start
+
+    def frames(self):
+        """
+        Samples from the oldest to the newest frame
+
+        :return: list of (timestamp, {stage: seconds})
+        :rtype: list
+        """
+        size = self._size
+        first = (self._index - self._count + 1) % size
+        frames = []
+
+        for i in range(self._count):
+            index = (first + i) % size
+            frames.append((self._timestamps[index],
+                           {stage: samples[index] for stage, samples in self._samples.items()}))
+
+        return frames
+
+    def summary(self):
+        """
+        Mean and max of each stage in milliseconds
+        """
+        summary = {}
+        count = self._count
+
+        for stage, samples in self._samples.items():
+            values = self._validSamples(samples)
+            summary[stage] = {
+                    "mean_ms": (sum(values) / count * 1000.0) if count else 0.0,
+                    "max_ms": (max(values) * 1000.0) if count else 0.0,
+                    }
+
+        return summary
+
+    def _validSamples(self, samples):
+        if self._count == self._size:
+            return samples
+        first = (self._index - self._count + 1) % self._size
+        return [samples[(first + i) % self._size] for i in range(self._count)]
+
+    def dumpCSV(self, filepath):
+        import csv
+
+        with open(filepath, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame", "timestamp") + tuple("{0}_ms".format(stage) for stage in STAGES))
+
+            for i, (timestamp, samples) in enumerate(self.frames()):
+                writer.writerow([i, "{0:.6f}".format(timestamp)] +
+                                ["{0:.4f}".format(samples[stage] * 1000.0) for stage in STAGES])
+
+    def dumpJSON(self, filepath):
+        import json
+
+        data = {
+                "stages": STAGES,
+                "summary": self.summary(),
+                "frames": [{"timestamp": timestamp,
+                            "stages_ms": {stage: samples[stage] * 1000.0 for stage in STAGES}}
+                           for timestamp, samples in self.frames()],
+                }
+
+        with open(filepath, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def dump(self, filepath):
+        """
+        Save the samples, the format is picked from the file extension (.csv or .json)
+        """
+        if filepath.lower().endswith(".json"):
+            self.dumpJSON(filepath)
+        else:
+            self.dumpCSV(filepath)
+
+
+frame_profiler = FrameProfiler()
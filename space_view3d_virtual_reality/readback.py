@@ -0,0 +1,238 @@
+"""
+Readback
+********
+
+Copy the eye textures back to the CPU without stalling the drawing
+
+bgl can neither map a pixel buffer object nor give an offset to
+glGetTexImage, so the asynchronous transfer is done with one frame
+of latency instead: the textures of a frame are only read right before
+the next frame draws into them (or on a frame that does not redraw),
+once the GPU is long done with them.
+The pixels land in a rotating set of buffers, so a consumer can still
+use the previous ones while the next ones are read.
+
+The consumers read the buffers in place: through the buffer protocol
+when bgl supports it, from the address in the bgl.Buffer C struct
+otherwise (2.7x). Without either, :func:`isSupported` is False and the
+readback is not used, converting the buffers to lists of Python ints
+would stall the frame loop.
+"""
+
+import ctypes
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from bgl import (
+        Buffer,
+        GL_BYTE,
+        GL_PACK_ALIGNMENT,
+        GL_RGBA,
+        GL_INT,
+        GL_TEXTURE_2D,
+        GL_TEXTURE_BINDING_2D,
+        GL_UNSIGNED_BYTE,
+        glBindTexture,
+        glGetIntegerv,
+        glGetTexImage,
+        glPixelStorei,
+        )
+
+
+class _BufferStruct(ctypes.Structure):
+    """
+    C layout of bgl.Buffer (2.7x), to reach its data when it has no buffer protocol
+    """
+    _fields_ = (
+        ("ob_refcnt", ctypes.c_ssize_t),
+        ("ob_type", ctypes.c_void_p),
+        ("ob_size", ctypes.c_ssize_t),
+        ("parent", ctypes.c_void_p),
+        ("type", ctypes.c_int),
+        ("ndimensions", ctypes.c_int),
+        ("dimensions", ctypes.POINTER(ctypes.c_int)),
+        ("data", ctypes.c_void_p),
+        )
+
+
+def bufferView(buffer):
+    """
+    Memory view on the data of a GL_BYTE buffer, without copying it
+
+    :return: the view, or None if bgl gives no direct access to its memory
+    :rtype: memoryview
+    """
+    try:
+        return memoryview(buffer).cast('B')
+
+    except TypeError:
+        pass
+
+    # the buffer object is its C struct, check the layout matches before trusting the data pointer
+    struct = _BufferStruct.from_address(id(buffer))
+    size = len(buffer)
+
+    if struct.type != GL_BYTE or struct.ndimensions != 1 or struct.dimensions[0] != size or not struct.data:
+        return None
+
+    # the view does not keep the buffer alive, the caller does
+    return memoryview((ctypes.c_ubyte * size).from_address(struct.data)).cast('B')
+
+
+_is_supported = None
+
+
+def isSupported():
+    """
+    Whether the buffers can be read in place, the readback is not worth it otherwise
+    """
+    global _is_supported
+
+    if _is_supported is None:
+        try:
+            _is_supported = bufferView(Buffer(GL_BYTE, 16)) is not None
+
+        except Exception as E:
+            print(E)
+            _is_supported = False
+
+    return _is_supported
+
+
+def splitSideBySide(pixels, width, viewports):
+    """
+    RGBA pixels of each eye of a side-by-side texture
+
+    :param pixels: pixels of the whole texture
+    :type pixels: bytes-like
+    :param width: texture width
+    :type width: int
+    :param viewports: (x, y, width, height) of each eye in the texture
+    :type viewports: tuple
+    :return: strided views on the pixels with NumPy, copies of the rows otherwise
+    :rtype: list of numpy.ndarray or bytearray
+    """
+    stride = width * 4
+    eyes = []
+
+    if numpy is not None:
+        rows = numpy.frombuffer(pixels, dtype=numpy.uint8).reshape(-1, stride)
+
+        for x, y, eye_width, eye_height in viewports:
+            eyes.append(rows[y:y + eye_height, x * 4:(x + eye_width) * 4])
+
+        return eyes
+
+    for x, y, eye_width, eye_height in viewports:
+        eye = bytearray()
+        start = y * stride + x * 4
+        size = eye_width * 4
+
+        for offset in range(start, start + eye_height * stride, stride):
+            eye += pixels[offset:offset + size]
+
+        eyes.append(eye)
+
+    return eyes
+
+
+def copyPixels(destination, pixels):
+    """
+    Copy the pixels of an eye in one go
+
+    :param destination: writable memory of the size of the pixels
+    :type destination: memoryview
+    :param pixels: contiguous bytes, or a strided view from :func:`splitSideBySide`
+    :type pixels: bytes-like or numpy.ndarray
+    """
+    if numpy is not None and isinstance(pixels, numpy.ndarray):
+        numpy.frombuffer(destination, dtype=numpy.uint8).reshape(pixels.shape)[...] = pixels
+
+    else:
+        destination[:] = pixels
+
+
+class TextureReadback:
+    __slots__ = {
+        "_buffers",
+        "_views",
+        "_sizes",
+        "_index",
+        "_pending",
+        "_binding",
+        }
+
+    def __init__(self, count=2):
+        """
+        :param count: number of rotating buffers for each texture
+        :type count: int
+        """
+        self._buffers = [None] * max(2, count)
+        self._views = [None] * max(2, count)
+        self._sizes = [None] * max(2, count)
+        self._index = 0
+        self._pending = None
+        self._binding = Buffer(GL_INT, 1)
+
+    def request(self, textures, sizes, metadata=None, viewports=None):
+        """
+        Read the textures before they are drawn into again
+
+        :param textures: texture ids
+        :type textures: list of int
+        :param sizes: (width, height) of each texture
+        :type sizes: list of tuple
+        :param metadata: anything to give back with the pixels
+        :param viewports: (x, y, width, height) of each eye, to split a single side-by-side texture
+        :type viewports: list of tuple
+        """
+        self._pending = (list(textures), [tuple(size) for size in sizes], metadata, viewports)
+
+    def discard(self):
+        self._pending = None
+
+    def collect(self):
+        """
+        Read the requested textures, call it before drawing into them again
+
+        The pixels are views on the buffers, valid until they rotate back.
+
+        :return: the RGBA pixels and the size of each eye, and the metadata, or None
+        :rtype: (list, list of tuple, object)
+        """
+        if self._pending is None:
+            return None
+
+        textures, sizes, metadata, viewports = self._pending
+        self._pending = None
+
+        index = self._index
+        self._index = (index + 1) % len(self._buffers)
+
+        buffers = self._buffers[index]
+        if self._sizes[index] != sizes:
+            # bytes are bytes, bgl only has signed buffers
+            buffers = [Buffer(GL_BYTE, width * height * 4) for width, height in sizes]
+            self._buffers[index] = buffers
+            self._views[index] = [bufferView(buffer) for buffer in buffers]
+            self._sizes[index] = sizes
+
+        glGetIntegerv(GL_TEXTURE_BINDING_2D, self._binding)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+
+        for texture, buffer in zip(textures, buffers):
+            glBindTexture(GL_TEXTURE_2D, texture)
+            glGetTexImage(GL_TEXTURE_2D, 0, GL_RGBA, GL_UNSIGNED_BYTE, buffer)
+
+        glBindTexture(GL_TEXTURE_2D, self._binding[0])
+
+        pixels = self._views[index]
+
+        if viewports:
+            pixels = splitSideBySide(pixels[0], sizes[0][0], viewports)
+            sizes = [(viewport[2], viewport[3]) for viewport in viewports]
+
+        return pixels, sizes, metadata
@@ -0,0 +1,80 @@
+"""
+Stereo Layout
+*************
+
+Draw an eye in its own rectangle of a shared offscreen
+
+``draw_view3d`` always renders to the whole offscreen, so the eye
+projection is remapped to its rectangle, and a scissor keeps what
+falls outside of the eye frustum (and the clear) off the other eye.
+"""
+
+from mathutils import Matrix
+
+from bgl import (
+        Buffer,
+        GL_INT,
+        GL_SCISSOR_BOX,
+        GL_SCISSOR_TEST,
+        glDisable,
+        glEnable,
+        glGetIntegerv,
+        glIsEnabled,
+        glScissor,
+        )
+
+
+def viewportProjection(projection_matrix, viewport, width, height):
+    """
+    Projection matrix that draws in the viewport instead of the whole offscreen
+
+    :param viewport: (x, y, width, height) of the eye in the offscreen
+    :type viewport: tuple
+    :param width: offscreen width
+    :type width: int
+    :param height: offscreen height
+    :type height: int
+    :rtype: :class:`mathutils.Matrix`
+    """
+    x, y, eye_width, eye_height = viewport
+
+    scale_x = eye_width / width
+    scale_y = eye_height / height
+    offset_x = (2.0 * x + eye_width) / width - 1.0
+    offset_y = (2.0 * y + eye_height) / height - 1.0
+
+    # from the eye normalized device coordinates to the offscreen ones
+    remap = Matrix(((scale_x, 0.0, 0.0, offset_x),
+                    (0.0, scale_y, 0.0, offset_y),
+                    (0.0, 0.0, 1.0, 0.0),
+                    (0.0, 0.0, 0.0, 1.0)))
+
+    return remap * projection_matrix
+
+
+class ViewportScissor:
+    """
+    Restrict the drawing to a viewport, and restore the scissor state afterwards
+    """
+    __slots__ = {
+        "_box",
+        "_is_enabled",
+        }
+
+    def __init__(self):
+        self._box = Buffer(GL_INT, 4)
+        self._is_enabled = False
+
+    def begin(self, viewport):
+        self._is_enabled = glIsEnabled(GL_SCISSOR_TEST)
+        glGetIntegerv(GL_SCISSOR_BOX, self._box)
+
+        glEnable(GL_SCISSOR_TEST)
+        glScissor(viewport[0], viewport[1], viewport[2], viewport[3])
+
+    def end(self):
+        box = self._box
+        glScissor(box[0], box[1], box[2], box[3])
+
+        if not self._is_enabled:
+            glDisable(GL_SCISSOR_TEST)
@@ -21,6 +21,37 @@ class VirtualRealityPanel(bpy.types.Panel):
 
         if not vr.is_enabled:
             col.operator("view3d.virtual_reality_display", text="Virtual Reality").action='ENABLE'
+
+            row = col.row()
+            row.prop(vr, "use_dynamic_resolution")
+            sub = row.column()
+            sub.active = vr.use_dynamic_resolution
+            sub.prop(vr, "resolution_floor", text="Min")
+
+            col.prop(vr, "stereo_layout", text="")
+            col.prop(vr, "use_tracking_thread")
+            col.prop(vr, "use_async_submission")
+            col.prop(vr, "use_culling")
+            col.prop(vr, "use_lod")
+            sub = col.column(align=True)
+            sub.active = vr.use_lod
+            sub.prop(vr, "lod_screen_size")
+            sub.prop(vr, "lod_hysteresis")
+
+            col.prop(vr, "use_recording")
+            sub = col.column()
+            sub.active = vr.use_recording
+            sub.prop(vr, "record_filepath", text="")
+
+            col.prop(vr, "use_frame_export")
+            sub = col.column()
+            sub.active = vr.use_frame_export
+            sub.prop(vr, "export_filepath", text="")
+
+            col.prop(vr, "use_capture")
+            sub = col.column()
+            sub.active = vr.use_capture
+            sub.prop(vr, "capture_directory", text="")
         else:
             col.operator("view3d.virtual_reality_display", text="Virtual Reality", icon="X").action='DISABLE'
 
@@ -51,7 +82,34 @@ class VirtualRealityPanel(bpy.types.Panel):
                     col.label(text="Tracking:")
                     col.row().prop(vr, "tracking_mode", expand=True)
 
+                    sub = col.column()
+                    sub.active = vr.tracking_mode != 'NONE'
+                    sub.prop(vr, "use_prediction")
+
                     col.prop(vr, "lock_camera")
+                    col.prop(vr, "hide_method")
+
+                    row = col.row()
+                    row.prop(vr, "use_redraw_elision")
+                    sub = row.column()
+                    sub.active = vr.use_redraw_elision
+                    sub.prop(vr, "redraw_threshold")
+
+                    col.separator()
+                    row = col.row(align=True)
+                    row.prop(vr, "use_profiling")
+                    sub = row.row(align=True)
+                    sub.active = vr.use_profiling
+                    sub.operator("view3d.virtual_reality_profile_export", text="", icon="EXPORT")
+
+                    if vr.use_profiling:
+                        col.label(text="Missed Frames: {0}".format(vr.missed_frames))
+                        col.label(text="Pose Age: {0:.1f} ms".format(vr.pose_age))
+
+                        if vr.use_culling:
+                            col.label(text="Culled: {0}".format(vr.culled_objects))
+                            col.label(text="Cull Time: {0:.2f} ms, saves up to {1:.2f} ms".format(
+                                      vr.cull_time, vr.cull_saved_time))
 
                     if vr.error_message:
                         col.separator()
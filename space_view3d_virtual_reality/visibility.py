@@ -0,0 +1,197 @@
+"""
+Visibility
+==========
+
+Hide the scene objects while the master/slave viewports redraw
+
+The hide flags are cached and only read back from the scene when it changes.
+The objects are hidden and shown with a single bulk ``foreach_set``,
+instead of writing ``ob.hide`` object by object on every redraw.
+"""
+
+import bpy
+
+from bpy.app.handlers import persistent
+
+
+_scene_generation = 0
+_scene_update_listeners = []
+
+# data whose updates change what the viewports draw, besides the objects
+DATA_COLLECTIONS = (
+        "meshes",
+        "curves",
+        "metaballs",
+        "lattices",
+        "armatures",
+        "materials",
+        "textures",
+        "images",
+        "lamps",
+        "worlds",
+        "cameras",
+        "node_groups",
+        "groups",
+        "particles",
+        )
+
+# viewport settings changing the drawing, without a scene update
+VIEW_SETTINGS = (
+        "viewport_shade",
+        "show_textured_solid",
+        "show_only_render",
+        "use_matcap",
+        "matcap_icon",
+        )
+
+
+def scene_generation():
+    """
+    Counter increased every time the scene objects are updated
+    """
+    return _scene_generation
+
+
+def tag_scene_update():
+    global _scene_generation
+    _scene_generation += 1
+
+
+def add_scene_update_listener(callback):
+    """
+    Call ``callback(scene)`` on scene updates, while the object ``is_updated`` flags are still valid
+    """
+    _scene_update_listeners.append(callback)
+
+
+def remove_scene_update_listener(callback):
+    if callback in _scene_update_listeners:
+        _scene_update_listeners.remove(callback)
+
+
+def viewState(space):
+    """
+    The drawing settings of a 3d viewport, to tell whether they changed
+    """
+    return tuple(getattr(space, name, None) for name in VIEW_SETTINGS)
+
+
+def _isDataUpdated():
+    data = bpy.data
+
+    for name in DATA_COLLECTIONS:
+        collection = getattr(data, name, None)
+
+        if collection is not None and getattr(collection, "is_updated", False):
+            return True
+
+    return False
+
+
+@persistent
+def virtual_reality_scene_update_post(scene):
+    if scene.is_updated or bpy.data.objects.is_updated or _isDataUpdated():
+        tag_scene_update()
+
+        for callback in _scene_update_listeners:
+            callback(scene)
+
+
+class VisibilityCache:
+    __slots__ = {
+        "_generation",
+        "_scene_hash",
+        "_flags",
+        "_hidden",
+        "_objects",
+        "_method",
+        "_show_grease_pencil",
+        }
+
+    def __init__(self):
+        self._generation = -1
+        self._scene_hash = None
+        self._flags = []
+        self._hidden = []
+        self._objects = []
+        self._method = None
+        self._show_grease_pencil = False
+
+    def hide(self, context, method='BULK', scene_bounds=None):
+        """
+        Hide all the visible objects and the grease pencil
+
+        :param method: 'BULK' to use foreach_set, 'OBJECT' to hide object by object
+        :type method: str
+        :param scene_bounds: with 'OBJECT', only hide the objects in the view (the others are clipped anyway)
+        :type scene_bounds: :class:`culling.SceneBounds`
+        """
+        scene = context.scene
+        space = context.space_data
+        objects = scene.objects
+
+        if method == 'BULK' and not hasattr(objects, "foreach_set"):
+            method = 'OBJECT'
+
+        self._method = method
+
+        if method == 'BULK':
+            self._hideBulk(scene, objects)
+
+        elif scene_bounds is not None and context.region_data is not None:
+            scene_bounds.update(scene)
+            self._hideObjects(scene_bounds.viewObjects(context.region_data.perspective_matrix))
+
+        else:
+            self._hideObjects(objects)
+
+        self._show_grease_pencil = space.show_grease_pencil
+        space.show_grease_pencil = False
+
+    def show(self, context):
+        """
+        Restore the objects hidden in :meth:`hide`
+        """
+        scene = context.scene
+        space = context.space_data
+
+        if self._method == 'BULK':
+            scene.objects.foreach_set("hide", self._flags)
+
+        elif self._method == 'OBJECT':
+            for ob in self._objects:
+                ob.hide = False
+
+            self._objects = []
+
+        else:
+            return
+
+        self._method = None
+        space.show_grease_pencil = self._show_grease_pencil
+
+    def _hideBulk(self, scene, objects):
+        count = len(objects)
+        scene_hash = hash(scene)
+
+        if self._generation != _scene_generation or \
+           self._scene_hash != scene_hash or \
+           len(self._flags) != count:
+
+            self._flags = [False] * count
+            objects.foreach_get("hide", self._flags)
+
+            self._hidden = [True] * count
+            self._generation = _scene_generation
+            self._scene_hash = scene_hash
+
+        objects.foreach_set("hide", self._hidden)
+
+    def _hideObjects(self, objects):
+        self._objects = []
+        hidden = self._objects
+
+        for ob in objects:
+            if not ob.hide:
+                hidden.append(ob)
+                ob.hide = True
@@ -0,0 +1,17 @@
+"""
+Tests
+=====
+
+Deterministic tests of the frame loop helpers, without Blender or a headset.
+
+The add-on package imports ``bpy``, the stand-in modules of the benchmark
+are installed first.
+
+Usage (from the repository root)::
+
+    $ python -m unittest discover -s tests -t .
+"""
+
+from benchmark import stubs
+
+stubs.install()
@@ -0,0 +1,115 @@
+import unittest
+
+from space_view3d_virtual_reality import bvh
+from space_view3d_virtual_reality.culling import frustumPlanes
+
+numpy = bvh.numpy
+
+PROJECTION = ((1.5, 0.0, 0.0, 0.0),
+              (0.0, 1.5, 0.0, 0.0),
+              (0.0, 0.0, -1.002, -0.2),
+              (0.0, 0.0, -1.0, 0.0))
+
+MODELVIEW = ((1.0, 0.0, 0.0, 0.0),
+             (0.0, 1.0, 0.0, 0.0),
+             (0.0, 0.0, 1.0, -20.0),
+             (0.0, 0.0, 0.0, 1.0))
+
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class BoundsHierarchyTest(unittest.TestCase):
+    def setUp(self):
+        self.random = numpy.random.RandomState(3)
+        self.planes = frustumPlanes(PROJECTION, MODELVIEW)
+        self.tree = bvh.BoundsHierarchy()
+
+    def boxes(self, count, size=60.0):
+        centers = self.random.uniform(-size * 0.5, size * 0.5, (count, 3)).astype(numpy.float32)
+        extents = self.random.uniform(0.1, 2.0, (count, 3)).astype(numpy.float32)
+        return centers - extents, centers + extents
+
+    def bruteForce(self, lower, upper):
+        centers = (lower + upper) * 0.5
+        extents = (upper - lower) * 0.5
+        normals = self.planes[:, :3]
+
+        distance = centers.dot(normals.T) + extents.dot(numpy.abs(normals).T) + self.planes[:, 3]
+        return numpy.flatnonzero(distance.min(axis=1) >= 0.0).tolist()
+
+    def query(self):
+        return sorted(self.tree.frustum(self.planes).tolist())
+
+    def test_empty(self):
+        lower, upper = self.boxes(0)
+        self.tree.build(lower, upper)
+        self.assertEqual(self.query(), [])
+
+    def test_build(self):
+        for count in (1, bvh.BRANCHING, 100, 3000):
+            lower, upper = self.boxes(count)
+            self.tree.build(lower, upper)
+
+            expected = self.bruteForce(lower, upper)
+            self.assertEqual(self.query(), expected)
+
+        # the view sees part of the scene, the hierarchy skips the rest
+        self.assertTrue(0 < len(expected) < 3000)
+
+    def test_refit_few(self):
+        lower, upper = self.boxes(3000)
+        self.tree.build(lower, upper)
+
+        # moved into the view (at the origin), and out of it
+        visible = self.bruteForce(lower, upper)
+        hidden = sorted(set(range(3000)) - set(visible))
+        moved = numpy.array(hidden[:5] + visible[:5])
+
+        lower[moved[:5]] = (-1.0, -1.0, -1.0)
+        upper[moved[:5]] = (1.0, 1.0, 1.0)
+        lower[moved[5:]] = (199.0, -1.0, -1.0)
+        upper[moved[5:]] = (201.0, 1.0, 1.0)
+
+        self.tree.refit(moved, lower[moved], upper[moved])
+
+        expected = self.bruteForce(lower, upper)
+        self.assertEqual(self.query(), expected)
+
+        for index in moved[:5]:
+            self.assertIn(index, expected)
+
+        for index in moved[5:]:
+            self.assertNotIn(index, expected)
+
+    def test_refit_many(self):
+        lower, upper = self.boxes(3000)
+        self.tree.build(lower, upper)
+
+        # more than count // BRANCHING, the levels are rebuilt
+        moved = self.random.choice(3000, 1000, replace=False)
+        new_lower, new_upper = self.boxes(1000)
+        lower[moved] = new_lower
+        upper[moved] = new_upper
+
+        self.tree.refit(moved, new_lower, new_upper)
+        self.assertEqual(self.query(), self.bruteForce(lower, upper))
+
+    def test_resort(self):
+        lower, upper = self.boxes(3000)
+        self.tree.build(lower, upper)
+        order = self.tree.order.copy()
+
+        # the objects scatter, the nodes grow too loose and it sorts again
+        for step in range(4):
+            moved = self.random.choice(3000, 300, replace=False)
+            new_lower, new_upper = self.boxes(300, size=600.0)
+            lower[moved] = new_lower
+            upper[moved] = new_upper
+            self.tree.refit(moved, new_lower, new_upper)
+
+            self.assertEqual(self.query(), self.bruteForce(lower, upper))
+
+        self.assertFalse(numpy.array_equal(self.tree.order, order))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+from space_view3d_virtual_reality.capture import FrameCapture
+
+ORIENTATIONS = ((1.0, 0.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0))
+POSITIONS = ((-0.03, 0.0, 0.0), (0.03, 0.0, 0.0))
+SIZES = ((4, 2), (4, 2))
+
+
+def readPNG(filepath):
+    """
+    Bottom-up RGBA pixels of a PNG written by encodePNG
+    """
+    with open(filepath, 'rb') as f:
+        data = f.read()
+
+    width, height = struct.unpack_from('>II', data, 16)
+    idat = data.index(b'IDAT')
+    length = struct.unpack_from('>I', data, idat - 4)[0]
+    rows = zlib.decompress(data[idat + 4:idat + 4 + length])
+
+    stride = width * 4 + 1
+    return b''.join(rows[offset + 1:offset + stride] for offset in range((height - 1) * stride, -1, -stride))
+
+
+class FrameCaptureTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write(self):
+        capture = FrameCapture(self.directory.name, max_pending=64)
+
+        # two rotating buffers, like the readback
+        buffers = [[bytearray(32), bytearray(32)] for i in range(2)]
+        expected = {}
+
+        for frame in range(8):
+            pixels = buffers[frame % 2]
+            for eye in range(2):
+                pixels[eye][:] = bytes([frame, eye]) * 16
+                expected[frame, eye] = bytes(pixels[eye])
+
+            self.assertTrue(capture.write(frame, frame * 0.5, ORIENTATIONS, POSITIONS, pixels, SIZES))
+
+        # an elided frame repeats the images of the previous one
+        self.assertTrue(capture.repeat(8, 4.0))
+        expected[8, 0] = expected[7, 0]
+        expected[8, 1] = expected[7, 1]
+
+        capture.close()
+
+        self.assertEqual(capture.written, 18)
+        self.assertEqual(capture.dropped, 0)
+        self.assertIsNone(capture.exception)
+
+        for (frame, eye), pixels in expected.items():
+            name = "{0}_{1:06d}.png".format(("left", "right")[eye], frame)
+            self.assertEqual(readPNG(os.path.join(self.directory.name, name)), pixels)
+
+        with open(os.path.join(self.directory.name, "poses.csv")) as f:
+            rows = f.read().splitlines()
+
+        self.assertEqual(len(rows), 10)
+        self.assertEqual([int(row.split(",")[0]) for row in rows[1:]], list(range(9)))
+        self.assertEqual(float(rows[-1].split(",")[1]), 4.0)
+
+    def test_dropped(self):
+        capture = FrameCapture(self.directory.name, max_pending=0)
+        pixels = [bytes(32), bytes(32)]
+
+        self.assertFalse(capture.write(0, 0.0, ORIENTATIONS, POSITIONS, pixels, SIZES))
+        # nothing was copied, the elided frame is dropped too
+        self.assertFalse(capture.repeat(1, 0.5))
+
+        capture.close()
+        self.assertEqual(capture.dropped, 2)
+        self.assertEqual(capture.written, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+from space_view3d_virtual_reality.commands import (
+        CommandBus,
+        Commands,
+        )
+
+
+class FakeCollection(list):
+    clears = 0
+
+    def clear(self):
+        self.clears += 1
+        del self[:]
+
+    def add(self):
+        item = type("Command", (), {})()
+        self.append(item)
+        return item
+
+
+class CommandBusTest(unittest.TestCase):
+    def setUp(self):
+        self.bus = CommandBus()
+
+    def popAll(self):
+        actions = []
+        while self.bus:
+            actions.append(self.bus.pop())
+        return actions
+
+    def test_repeated_command_is_dropped(self):
+        self.bus.push(Commands.recenter)
+        self.bus.push(Commands.recenter)
+
+        self.assertEqual(len(self.bus), 1)
+        self.assertEqual(self.popAll(), [Commands.recenter])
+
+    def test_playback_state_replaces_the_pending_one(self):
+        self.bus.push(Commands.play)
+        self.bus.push(Commands.pause)
+
+        self.assertEqual(len(self.bus), 1)
+        self.assertEqual(list(self.bus), [Commands.pause])
+        self.assertEqual(self.popAll(), [Commands.pause])
+
+    def test_groups_keep_their_order(self):
+        for action in (Commands.recenter, Commands.play, Commands.fullscreen, Commands.pause, Commands.recenter):
+            self.bus.push(action)
+
+        self.assertEqual(self.popAll(), [Commands.recenter, Commands.fullscreen, Commands.pause])
+
+    def test_popped_command_can_be_pushed_again(self):
+        self.bus.push(Commands.recenter)
+        self.assertEqual(self.bus.pop(), Commands.recenter)
+
+        self.bus.push(Commands.recenter)
+        self.assertEqual(self.popAll(), [Commands.recenter])
+
+    def test_ungrouped_commands_are_not_coalesced(self):
+        self.bus.push(Commands.test)
+        self.bus.push(Commands.test)
+
+        self.assertEqual(self.popAll(), [Commands.test, Commands.test])
+
+    def test_pop_empty(self):
+        self.bus.push(Commands.play)
+        self.bus.push(Commands.pause)
+        self.bus.pop()
+
+        self.assertFalse(self.bus)
+        self.assertRaises(IndexError, self.bus.pop)
+
+    def test_clear(self):
+        self.bus.push(Commands.recenter)
+        self.bus.push(Commands.play)
+        self.bus.clear()
+
+        self.assertEqual(len(self.bus), 0)
+        self.bus.push(Commands.play)
+        self.assertEqual(self.popAll(), [Commands.play])
+
+    def test_mirror_only_when_changed(self):
+        collection = FakeCollection()
+
+        self.bus.push(Commands.recenter)
+        self.bus.mirror(collection)
+        self.bus.mirror(collection)
+
+        self.assertEqual(collection.clears, 1)
+        self.assertEqual([command.action for command in collection], [Commands.recenter])
+
+        # coalesced, nothing changed
+        self.bus.push(Commands.recenter)
+        self.bus.mirror(collection)
+        self.assertEqual(collection.clears, 1)
+
+        self.bus.pop()
+        self.bus.mirror(collection)
+        self.assertEqual(collection.clears, 2)
+        self.assertEqual(len(collection), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import unittest
+
+from unittest import mock
+
+from mathutils import Matrix
+
+from benchmark.simulator import (
+        FakeObject,
+        FakeObjectCollection,
+        )
+
+from space_view3d_virtual_reality import culling
+from space_view3d_virtual_reality.visibility import virtual_reality_scene_update_post
+
+numpy = culling.numpy
+
+# looking down -z, -1 <= x, y <= 1, near 1 and far 10
+PROJECTION = Matrix(((1.0, 0.0, 0.0, 0.0),
+                     (0.0, 1.0, 0.0, 0.0),
+                     (0.0, 0.0, -2.0 / 9.0, -11.0 / 9.0),
+                     (0.0, 0.0, 0.0, 1.0)))
+
+MODELVIEW = Matrix.Identity(4)
+
+
+class FakeScene:
+    def __init__(self, objects):
+        self.objects = FakeObjectCollection(objects)
+        self.is_updated = False
+
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class FrustumPlanesTest(unittest.TestCase):
+    def test_orthographic(self):
+        planes = culling.frustumPlanes(PROJECTION, MODELVIEW)
+
+        # scaled by 2/9 for the depth, the planes point inwards
+        expected = ((1.0, 0.0, 0.0, 1.0),
+                    (-1.0, 0.0, 0.0, 1.0),
+                    (0.0, 1.0, 0.0, 1.0),
+                    (0.0, -1.0, 0.0, 1.0),
+                    (0.0, 0.0, -2.0 / 9.0, -2.0 / 9.0),
+                    (0.0, 0.0, 2.0 / 9.0, 20.0 / 9.0))
+
+        numpy.testing.assert_allclose(planes, expected, atol=1e-12)
+
+    def test_modelview(self):
+        # the camera moved 5 along x, the planes are in world space
+        planes = culling.frustumPlanes(PROJECTION, Matrix.Translation((-5.0, 0.0, 0.0)))
+
+        inside = numpy.array((5.0, 0.0, -5.0, 1.0))
+        outside = numpy.array((0.0, 0.0, -5.0, 1.0))
+
+        self.assertTrue((planes.dot(inside) >= 0.0).all())
+        self.assertFalse((planes.dot(outside) >= 0.0).all())
+
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class FrustumCullerTest(unittest.TestCase):
+    def setUp(self):
+        objects = [
+                FakeObject("Inside", (0.0, 0.0, -5.0), 0.5),
+                FakeObject("Outside", (10.0, 0.0, -5.0), 0.5),
+                FakeObject("Straddling", (1.25, 0.0, -5.0), 0.5),
+                FakeObject("Behind", (0.0, 0.0, 5.0), 0.5),
+                FakeObject("Lamp", (10.0, 0.0, -5.0), 0.5),
+                FakeObject("Hidden", (0.0, 10.0, -5.0), 0.5),
+                ]
+        objects[4].type = 'LAMP'
+        objects[5]._hide = True
+
+        self.scene = FakeScene(objects)
+        self.bounds = culling.SceneBounds()
+        self.bounds.update(self.scene)
+
+    def tearDown(self):
+        self.bounds.close()
+
+    def test_apply(self):
+        culler = culling.FrustumCuller()
+        flags = self.bounds.flags.copy()
+
+        hidden = culler.apply(self.bounds, [(PROJECTION, MODELVIEW)], self.bounds.flags)
+
+        # outside and behind culled, the lamp is always drawn, the hidden object stays hidden
+        self.assertEqual(hidden.tolist(), [False, True, False, True, False, True])
+        self.assertEqual(culler.culled, 2)
+        self.assertEqual(culler.drawn, 3)
+
+        # the flags given are not modified
+        self.assertEqual(self.bounds.flags.tolist(), flags.tolist())
+
+    def test_any_eye(self):
+        culler = culling.FrustumCuller()
+
+        # the other eye sees the outside object
+        matrices = [(PROJECTION, MODELVIEW), (PROJECTION, Matrix.Translation((-10.0, 0.0, 0.0)))]
+        hidden = culler.apply(self.bounds, matrices, self.bounds.flags)
+
+        self.assertEqual(hidden.tolist(), [False, False, False, True, False, True])
+
+    def test_hide_show(self):
+        culler = culling.FrustumCuller()
+        hidden = culler.apply(self.bounds, [(PROJECTION, MODELVIEW)], self.bounds.flags)
+
+        self.bounds.hide(self.scene, hidden)
+        self.assertEqual([ob._hide for ob in self.scene.objects], hidden.tolist())
+
+        self.bounds.show(self.scene)
+        self.assertEqual([ob._hide for ob in self.scene.objects], [False, False, False, False, False, True])
+
+    def test_nothing_culled(self):
+        # the flags given back untouched, nothing to hide or show
+        self.bounds.hide(self.scene, self.bounds.flags)
+        self.scene.objects[0]._hide = True
+        self.bounds.show(self.scene)
+        self.assertTrue(self.scene.objects[0]._hide)
+
+
+@unittest.skipIf(numpy is None, "NumPy is not available")
+class SceneBoundsRefitTest(unittest.TestCase):
+    def setUp(self):
+        self.scene = FakeScene([FakeObject("Object.{0:02d}".format(i), (float(i) * 4.0, 0.0, 0.0)) for i in range(16)])
+        self.bounds = culling.SceneBounds()
+        self.bounds.update(self.scene)
+
+    def tearDown(self):
+        self.bounds.close()
+
+    def move(self, indices, offset):
+        for i in indices:
+            ob = self.scene.objects[i]
+            ob.matrix_world[1][3] += offset
+            ob.is_updated = True
+
+        # the dirty objects are collected during the scene update, while is_updated is set
+        self.scene.is_updated = True
+        virtual_reality_scene_update_post(self.scene)
+        self.scene.is_updated = False
+
+        for ob in self.scene.objects:
+            ob.is_updated = False
+
+    def refit(self):
+        with mock.patch.object(culling.SceneBounds, "_readBounds", autospec=True,
+                               side_effect=culling.SceneBounds._readBounds) as read_bounds:
+            structure = self.bounds.structure
+            self.assertTrue(self.bounds.update(self.scene))
+            self.assertEqual(self.bounds.structure, structure)
+
+        return read_bounds.call_count
+
+    def checkCenters(self):
+        expected = [[ob.matrix_world[0][3], ob.matrix_world[1][3], 0.0] for ob in self.scene.objects]
+        numpy.testing.assert_allclose(self.bounds.centers, expected)
+
+    def test_dirty_objects(self):
+        self.move([3], 50.0)
+
+        # a single object, read from its own properties
+        self.assertEqual(self.refit(), 0)
+        self.checkCenters()
+
+        # the tree finds it at its new place only
+        planes = culling.frustumPlanes(PROJECTION, Matrix.Translation((-12.0, -50.0, -5.0)))
+        self.assertEqual(self.bounds.tree.frustum(planes).tolist(), [3])
+
+    def test_many_objects(self):
+        # more than count // 8, all the bounds are read in bulk
+        self.move(range(0, 16, 3), -20.0)
+
+        self.assertEqual(self.refit(), 1)
+        self.checkCenters()
+
+    def test_no_update(self):
+        self.assertFalse(self.bounds.update(self.scene))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+
+from space_view3d_virtual_reality.export import (
+        FrameExport,
+        FrameReader,
+        )
+
+ORIENTATIONS = ((1.0, 0.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0))
+POSITIONS = ((-0.03, 0.0, 0.0), (0.03, 0.0, 0.0))
+
+
+def eyePixels(frame, sizes):
+    return [bytes([frame % 256, eye]) * (width * height * 2) for eye, (width, height) in enumerate(sizes)]
+
+
+class FrameExportTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, "frames")
+        self.export = FrameExport(self.filepath, 4, 2, slot_count=3)
+        self.reader = FrameReader(self.filepath)
+
+    def tearDown(self):
+        self.reader.close()
+        self.export.close()
+        self.directory.cleanup()
+
+    def publish(self, frame, sizes=((4, 2), (4, 2))):
+        return self.export.publish(frame, frame * 0.01, ORIENTATIONS, POSITIONS, eyePixels(frame, sizes), sizes)
+
+    def check(self, frame, sizes=((4, 2), (4, 2))):
+        values = self.reader.read(frame)
+        self.assertIsNotNone(values, frame)
+
+        sequence, index, timestamp, orientations, positions, pixels, read_sizes = values
+        self.assertEqual(index, frame)
+        self.assertEqual(timestamp, frame * 0.01)
+        self.assertEqual(read_sizes, sizes)
+        self.assertAlmostEqual(positions[1][0], 0.03)
+        self.assertEqual([bytes(eye) for eye in pixels], eyePixels(frame, sizes))
+        return sequence
+
+    def test_empty(self):
+        self.assertEqual(self.reader.latest, 0)
+        self.assertIsNone(self.reader.read(1))
+
+    def test_wraparound(self):
+        for frame in range(1, 8):
+            self.assertTrue(self.publish(frame))
+
+        self.assertEqual(self.reader.latest, 7)
+
+        # the last slot_count frames are still in the ring
+        for frame in (5, 6, 7):
+            self.check(frame)
+
+        for frame in (1, 2, 3, 4):
+            self.assertIsNone(self.reader.read(frame))
+
+        self.assertEqual(self.export.published, 7)
+        self.assertEqual(self.export.dropped, 0)
+
+    def test_overwritten_while_reading(self):
+        self.publish(1)
+        sequence = self.check(1)
+        self.assertTrue(self.reader.isValid(1, sequence))
+
+        self.publish(2)
+        self.publish(3)
+        self.assertTrue(self.reader.isValid(1, sequence))
+
+        # same slot
+        self.publish(4)
+        self.assertFalse(self.reader.isValid(1, sequence))
+
+    def test_eye_sizes(self):
+        self.publish(1, ((4, 2), (2, 2)))
+        self.check(1, ((4, 2), (2, 2)))
+
+    def test_grow(self):
+        self.publish(1)
+        sequence = self.check(1)
+
+        # larger than the slots, the ring grows and the previous frames are gone
+        self.assertTrue(self.publish(2, ((8, 4), (6, 4))))
+        self.assertEqual((self.export.width, self.export.height), (8, 4))
+        self.assertFalse(self.reader.isValid(1, sequence))
+
+        self.check(2, ((8, 4), (6, 4)))
+        self.assertIsNone(self.reader.read(1))
+
+        for frame in range(3, 6):
+            self.publish(frame, ((8, 4), (8, 4)))
+
+        self.check(5, ((8, 4), (8, 4)))
+
+    def test_grow_unmaps(self):
+        self.publish(1)
+        self.check(1)
+        data = self.reader._data
+
+        self.publish(2, ((8, 4), (8, 4)))
+        self.check(2, ((8, 4), (8, 4)))
+        self.assertTrue(data.closed)
+
+    def test_grow_pixels_in_use(self):
+        self.publish(1)
+        pixels = self.reader.read(1)[5]
+        data = self.reader._data
+
+        self.publish(2, ((8, 4), (8, 4)))
+        self.check(2, ((8, 4), (8, 4)))
+
+        # still mapped for the pixels given out, until they are released
+        self.assertFalse(data.closed)
+        self.assertEqual([bytes(eye) for eye in pixels], eyePixels(1, ((4, 2), (4, 2))))
+
+
+if __name__ == '__main__':
+    unittest.main()
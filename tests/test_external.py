@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from space_view3d_virtual_reality.hmd.external import (
+        LAYOUT,
+        POSE_OFFSET,
+        TIMESTAMP,
+        TIMESTAMP_OFFSET,
+        PosePublisher,
+        SharedMemorySource,
+        )
+
+ORIENTATIONS = ((0.5, 0.5, 0.5, 0.5), (0.0, 1.0, 0.0, 0.0))
+POSITIONS = ((-0.032, 1.5, 0.25), (0.032, 1.5, 0.25))
+
+
+class SharedMemorySourceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        filepath = os.path.join(self.directory.name, "pose")
+
+        self.publisher = PosePublisher('SHARED_MEMORY', filepath)
+        self.source = SharedMemorySource(filepath)
+        self.buffer = bytearray(LAYOUT.size)
+
+    def tearDown(self):
+        self.source.close()
+        self.publisher.close()
+        self.directory.cleanup()
+
+    def values(self):
+        return list(memoryview(self.buffer)[POSE_OFFSET:].cast('f'))
+
+    def test_unpublished(self):
+        # the zero-filled ring is not a pose, a zero quaternion would give NaN matrices
+        self.buffer[POSE_OFFSET:POSE_OFFSET + 4] = b'\xff' * 4
+        self.assertFalse(self.source.read(self.buffer))
+        self.assertEqual(self.buffer[POSE_OFFSET:POSE_OFFSET + 4], b'\xff' * 4)
+
+    def test_published(self):
+        self.assertFalse(self.source.read(self.buffer))
+
+        self.publisher.publish(12.5, ORIENTATIONS, POSITIONS)
+
+        self.assertTrue(self.source.read(self.buffer))
+        self.assertEqual(TIMESTAMP.unpack_from(self.buffer, TIMESTAMP_OFFSET)[0], 12.5)
+
+        expected = [*ORIENTATIONS[0], *POSITIONS[0], *ORIENTATIONS[1], *POSITIONS[1]]
+        for value, expected_value in zip(self.values(), expected):
+            self.assertAlmostEqual(value, expected_value, places=6)
+
+        # the same pose is not new
+        self.assertFalse(self.source.read(self.buffer))
+
+        self.publisher.publish(12.75, ORIENTATIONS, POSITIONS)
+        self.assertTrue(self.source.read(self.buffer))
+        self.assertEqual(TIMESTAMP.unpack_from(self.buffer, TIMESTAMP_OFFSET)[0], 12.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import math
+import random
+import unittest
+
+from mathutils import (
+        Matrix,
+        Quaternion,
+        )
+
+from space_view3d_virtual_reality.hmd import matrices
+
+TOLERANCE = 1e-15
+
+
+def randomQuaternion(rng):
+    # uniform rotation, unit length
+    u1, u2, u3 = rng.random(), rng.random(), rng.random()
+    return (math.sqrt(1.0 - u1) * math.sin(2.0 * math.pi * u2),
+            math.sqrt(1.0 - u1) * math.cos(2.0 * math.pi * u2),
+            math.sqrt(u1) * math.sin(2.0 * math.pi * u3),
+            math.sqrt(u1) * math.cos(2.0 * math.pi * u3))
+
+
+def referenceModelview(orientation, position, view_matrix, scale=None):
+    """
+    The mathutils path of baseHMD.updateMatrices
+    """
+    transformation = Quaternion(orientation).to_matrix().to_4x4()
+
+    if position is not None:
+        if scale is not None:
+            position = [value * scale for value in position]
+
+        transformation = Matrix.Translation(position) * transformation
+
+    return transformation.inverted() * view_matrix
+
+
+@unittest.skipIf(matrices.numpy is None, "NumPy is not available")
+class ModelviewMatricesTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(5)
+        self.view_matrix = Matrix.Translation((0.25, -0.5, -2.0)) * Matrix.Rotation(0.3, 4, 'X')
+
+    def assertMatricesEqual(self, matrix, reference):
+        error = max(abs(value - expected) for row, expected_row in zip(matrix, reference)
+                    for value, expected in zip(row, expected_row))
+        self.assertLess(error, TOLERANCE)
+
+    def test_rotation(self):
+        orientations = [randomQuaternion(self.rng) for i in range(8)]
+        result = matrices.modelviewMatrices(orientations, None, self.view_matrix)
+
+        for orientation, matrix in zip(orientations, result.tolist()):
+            self.assertMatricesEqual(matrix, referenceModelview(orientation, None, self.view_matrix))
+
+    def test_rotation_translation(self):
+        orientations = [randomQuaternion(self.rng) for i in range(8)]
+        positions = [[self.rng.uniform(-0.5, 0.5) for j in range(3)] for i in range(8)]
+
+        for scale in (None, 0.5):
+            result = matrices.modelviewMatrices(orientations, positions, self.view_matrix, scale)
+
+            for orientation, position, matrix in zip(orientations, positions, result.tolist()):
+                self.assertMatricesEqual(matrix, referenceModelview(orientation, position, self.view_matrix, scale))
+
+    def test_degenerate(self):
+        # before the first tracking sample, or a broken one
+        orientations = [(0.0, 0.0, 0.0, 0.0), (float('nan'), 0.0, 0.0, 0.0), randomQuaternion(self.rng)]
+        positions = [(0.0, 1.0, 0.0)] * 3
+
+        result = matrices.modelviewMatrices(orientations, positions, self.view_matrix)
+        self.assertFalse(any(math.isnan(value) for value in result.flat))
+
+        identity = (1.0, 0.0, 0.0, 0.0)
+        for i in range(2):
+            self.assertMatricesEqual(result[i].tolist(), referenceModelview(identity, positions[i], self.view_matrix))
+
+        # the others are not affected
+        self.assertMatricesEqual(result[2].tolist(), referenceModelview(orientations[2], positions[2], self.view_matrix))
+
+        # nor the caller's samples
+        self.assertEqual(orientations[0], (0.0, 0.0, 0.0, 0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
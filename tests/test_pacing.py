@@ -0,0 +1,80 @@
+import unittest
+
+from space_view3d_virtual_reality.pacing import FramePacer
+
+
+class FramePacerTest(unittest.TestCase):
+    def setUp(self):
+        # 10 ms refreshes, 2 ms margin
+        self.pacer = FramePacer(refresh_rate=100.0, margin=0.002)
+
+    def test_missed_frames(self):
+        pacer = self.pacer
+
+        pacer.frameEnd(0.0, 0.004)
+        pacer.frameEnd(0.0095, 0.0135)
+        self.assertEqual(pacer.missed, 0)
+
+        # due at 24 ms
+        pacer.frameEnd(0.0195, 0.0285)
+        self.assertEqual(pacer.missed, 1)
+
+        # the grid is re-synchronized with the late frame, due at 38.5 ms
+        pacer.frameEnd(0.0335, 0.0375)
+        self.assertEqual(pacer.missed, 1)
+
+        # more than a refresh late still counts once
+        pacer.frameEnd(0.0435, 0.07)
+        self.assertEqual(pacer.missed, 2)
+        self.assertEqual(pacer.frames, 5)
+
+    def test_heavy_frames_skip_a_refresh(self):
+        pacer = self.pacer
+
+        pacer.frameEnd(0.0, 0.015)
+        self.assertAlmostEqual(pacer.period, 0.02)
+
+        # due at 55 ms, every other refresh
+        pacer.frameEnd(0.02, 0.034)
+        pacer.frameEnd(0.04, 0.054)
+        self.assertEqual(pacer.missed, 0)
+        self.assertAlmostEqual(pacer.period, 0.02)
+
+    def test_step(self):
+        pacer = self.pacer
+        self.assertAlmostEqual(pacer.step(0.0), 0.01)
+
+        pacer.frameEnd(0.0, 0.004)
+
+        # the frame after the one due at 14 ms starts 6 ms (cost and margin) before 24 ms
+        self.assertAlmostEqual(pacer.step(0.005), 0.013)
+
+        # too late for it, the next refresh
+        self.assertAlmostEqual(pacer.step(0.02), 0.008)
+
+    def test_reschedule(self):
+        pacer = self.pacer
+        pacer.frameEnd(0.0, 0.004)
+
+        # align the timer, then tick every period, then leave it alone
+        step = pacer.reschedule(0.01, 0.005)
+        self.assertAlmostEqual(step, 0.013)
+        self.assertAlmostEqual(pacer.reschedule(step, 0.018), 0.01)
+        self.assertIsNone(pacer.reschedule(0.01, 0.028))
+
+        # a missed frame moves the grid
+        pacer.frameEnd(0.0095, 0.03)
+        self.assertIsNotNone(pacer.reschedule(0.01, 0.031))
+
+    def test_reset(self):
+        self.pacer.frameEnd(0.0, 0.004)
+        self.pacer.frameEnd(0.0095, 0.03)
+        self.pacer.reset()
+
+        self.assertEqual(self.pacer.missed, 0)
+        self.assertEqual(self.pacer.frames, 0)
+        self.assertEqual(self.pacer.cost, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
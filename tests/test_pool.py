@@ -0,0 +1,154 @@
+import unittest
+
+from unittest import mock
+
+import bpy
+
+from space_view3d_virtual_reality import (
+        opengl_helper,
+        pool,
+        )
+
+KEY = (64, 32, 'RGBA8', 0) # pool.estimateSize(KEY) bytes
+SIZE = pool.estimateSize(KEY)
+
+
+class ResourcePoolTest(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+        self.destroyed = []
+        self.pool = pool.newPool(self.create, self.destroyed.append, budget=2 * SIZE)
+
+    def tearDown(self):
+        pool._pools.remove(self.pool)
+
+    def create(self, key):
+        self.created.append(key)
+        return len(self.created)
+
+    def test_reuse(self):
+        resource = self.pool.acquire(KEY)
+        self.assertTrue(self.pool.release(resource))
+        self.assertEqual(self.pool.idle_size, SIZE)
+
+        # same key, the idle resource is taken back
+        self.assertEqual(self.pool.acquire(KEY), resource)
+        self.assertEqual(self.pool.idle_size, 0)
+
+        # other key, a new one
+        self.assertNotEqual(self.pool.acquire((32, 32, 'RGBA8', 0)), resource)
+        self.assertEqual(len(self.created), 2)
+
+    def test_release_foreign(self):
+        self.assertFalse(self.pool.release(42))
+        self.assertEqual(self.destroyed, [])
+
+    def test_budget(self):
+        resources = [self.pool.acquire(KEY) for i in range(3)]
+
+        for resource in resources:
+            self.pool.release(resource)
+
+        # over budget, the least recently released goes first
+        self.assertEqual(self.destroyed, resources[:1])
+        self.assertEqual(self.pool.idle_size, 2 * SIZE)
+        self.assertEqual(len(self.pool), 2)
+
+        # the most recently released is reused
+        self.assertEqual(self.pool.acquire(KEY), resources[2])
+
+    def test_trim_pools(self):
+        resources = [self.pool.acquire(KEY) for i in range(2)]
+        in_use = self.pool.acquire(KEY)
+
+        for resource in resources:
+            self.pool.release(resource)
+
+        pool.trimPools(SIZE)
+        self.assertEqual(self.destroyed, resources[:1])
+
+        pool.trimPools()
+        self.assertEqual(self.destroyed, resources)
+        self.assertEqual(self.pool.idle_size, 0)
+
+        # the resources in use are not touched
+        self.assertEqual(len(self.pool), 1)
+        self.assertTrue(self.pool.release(in_use))
+
+
+class FakeWindow:
+    def __init__(self, pointer):
+        self.pointer = pointer
+
+    def as_pointer(self):
+        return self.pointer
+
+
+class FakeContext:
+    def __init__(self, window):
+        self.window = window
+
+
+class FramebufferPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.context = bpy.context
+        self.deleted = []
+
+        def delete(kind):
+            def glDelete(count, buffer):
+                self.deleted.append((kind, buffer[0]))
+            return glDelete
+
+        self.patches = [
+                mock.patch.object(opengl_helper, "glDeleteFramebuffers", delete('framebuffer')),
+                mock.patch.object(opengl_helper, "glDeleteTextures", delete('texture')),
+                mock.patch.object(opengl_helper, "glDeleteRenderbuffers", delete('renderbuffer')),
+                ]
+
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+        for context in (1, 2):
+            framebuffer_pool = opengl_helper._framebuffer_pools.pop(context, None)
+            if framebuffer_pool:
+                pool._pools.remove(framebuffer_pool)
+
+        bpy.context = self.context
+
+    def useWindow(self, pointer):
+        bpy.context = FakeContext(FakeWindow(pointer))
+
+    def test_attachments(self):
+        self.useWindow(1)
+        fbo_id = opengl_helper.create_framebuffer(64, 32)
+        tex_id, depth_id = opengl_helper._framebuffer_attachments[(1, fbo_id)]
+
+        # pooled, nothing is deleted
+        opengl_helper.delete_framebuffer(fbo_id)
+        self.assertEqual(self.deleted, [])
+
+        opengl_helper._framebuffer_pools[1].trim()
+        self.assertEqual(sorted(self.deleted),
+                         sorted([('framebuffer', fbo_id), ('texture', tex_id), ('renderbuffer', depth_id)]))
+
+    def test_contexts(self):
+        self.useWindow(1)
+        fbo_id = opengl_helper.create_framebuffer(64, 32)
+        opengl_helper.delete_framebuffer(fbo_id)
+
+        # the framebuffer of the first window is not reused in the second one
+        self.useWindow(2)
+        self.assertNotEqual(opengl_helper.create_framebuffer(64, 32), fbo_id)
+
+        # trimmed from the second window, only the shared attachments can be deleted
+        tex_id, depth_id = opengl_helper._framebuffer_attachments[(1, fbo_id)]
+        opengl_helper._framebuffer_pools[1].trim()
+        self.assertEqual(sorted(self.deleted), sorted([('texture', tex_id), ('renderbuffer', depth_id)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
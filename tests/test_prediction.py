@@ -0,0 +1,117 @@
+import unittest
+
+from math import (
+        acos,
+        cos,
+        sin,
+        )
+
+from space_view3d_virtual_reality.hmd.prediction import (
+        MAX_HORIZON,
+        PosePredictor,
+        )
+
+IDENTITY = (1.0, 0.0, 0.0, 0.0)
+
+
+def rotationZ(angle):
+    return (cos(angle * 0.5), 0.0, 0.0, sin(angle * 0.5))
+
+
+def angleZ(q):
+    angle = 2.0 * acos(max(-1.0, min(1.0, q[0])))
+    return angle if q[3] >= 0.0 else -angle
+
+
+class PosePredictorTest(unittest.TestCase):
+    def predict(self, predictor, orientations, positions):
+        orientations = [list(orientation) for orientation in orientations]
+        positions = [list(position) for position in positions]
+        predictor.predict(orientations, positions)
+        return orientations, positions
+
+    def test_linear_extrapolation(self):
+        predictor = PosePredictor(latency=0.02)
+        predictor.push(0.0, [IDENTITY, IDENTITY], [(0.0, 0.0, 0.0), (0.1, 0.0, 0.0)])
+        predictor.push(0.01, [IDENTITY, IDENTITY], [(0.01, 0.0, -0.02), (0.11, 0.0, -0.02)])
+
+        orientations, positions = self.predict(predictor, [IDENTITY, IDENTITY], [(0.0, 0.0, 0.0)] * 2)
+
+        # 1 m/s in x and -2 m/s in z, 20 ms ahead of the latest sample
+        for position, x in zip(positions, (0.03, 0.13)):
+            self.assertAlmostEqual(position[0], x)
+            self.assertAlmostEqual(position[1], 0.0)
+            self.assertAlmostEqual(position[2], -0.06)
+
+        for orientation in orientations:
+            self.assertAlmostEqual(orientation[0], 1.0)
+
+    def test_angular_extrapolation(self):
+        predictor = PosePredictor(latency=0.02)
+        predictor.push(0.0, [IDENTITY, IDENTITY], [(0.0, 0.0, 0.0)] * 2)
+        predictor.push(0.01, [rotationZ(0.01), rotationZ(-0.01)], [(0.0, 0.0, 0.0)] * 2)
+
+        orientations, positions = self.predict(predictor, [IDENTITY, IDENTITY], [(0.0, 0.0, 0.0)] * 2)
+
+        # 1 rad/s around z, 20 ms ahead of the latest sample
+        self.assertAlmostEqual(angleZ(orientations[0]), 0.03)
+        self.assertAlmostEqual(angleZ(orientations[1]), -0.03)
+
+    def test_velocity_over_the_history(self):
+        predictor = PosePredictor(latency=0.01, size=3)
+
+        for i, x in enumerate((0.0, 1.0, 2.0, 3.0)):
+            predictor.push(i * 0.01, [IDENTITY, IDENTITY], [(x, 0.0, 0.0)] * 2)
+
+        orientations, positions = self.predict(predictor, [IDENTITY, IDENTITY], [(0.0, 0.0, 0.0)] * 2)
+
+        # the oldest sample was dropped from the history of 3
+        self.assertAlmostEqual(positions[0][0], 4.0)
+
+    def test_not_enough_samples(self):
+        predictor = PosePredictor(latency=0.02)
+        predictor.push(0.0, [IDENTITY, IDENTITY], [(1.0, 2.0, 3.0)] * 2)
+
+        orientations, positions = self.predict(predictor, [IDENTITY, IDENTITY], [(1.0, 2.0, 3.0)] * 2)
+        self.assertEqual(positions, [[1.0, 2.0, 3.0]] * 2)
+
+    def test_disabled(self):
+        predictor = PosePredictor(is_enabled=False, latency=0.02)
+        predictor.push(0.0, [IDENTITY, IDENTITY], [(0.0, 0.0, 0.0)] * 2)
+        predictor.push(0.01, [IDENTITY, IDENTITY], [(0.01, 0.0, 0.0)] * 2)
+
+        orientations, positions = self.predict(predictor, [IDENTITY, IDENTITY], [(0.01, 0.0, 0.0)] * 2)
+        self.assertEqual(positions, [[0.01, 0.0, 0.0]] * 2)
+
+    def test_old_samples_are_ignored(self):
+        predictor = PosePredictor(latency=0.02)
+        predictor.push(0.0, [IDENTITY, IDENTITY], [(0.0, 0.0, 0.0)] * 2)
+        predictor.push(0.01, [IDENTITY, IDENTITY], [(0.01, 0.0, 0.0)] * 2)
+        predictor.push(0.01, [IDENTITY, IDENTITY], [(5.0, 0.0, 0.0)] * 2)
+        predictor.push(0.005, [IDENTITY, IDENTITY], [(5.0, 0.0, 0.0)] * 2)
+
+        orientations, positions = self.predict(predictor, [IDENTITY, IDENTITY], [(0.0, 0.0, 0.0)] * 2)
+        self.assertAlmostEqual(positions[0][0], 0.03)
+
+    def test_horizon(self):
+        predictor = PosePredictor(latency=0.01)
+        predictor.push(1.0, [IDENTITY, IDENTITY], [(0.0, 0.0, 0.0)] * 2)
+
+        # exponential moving average of the time between the sample and the submission
+        predictor.frameSubmitted(1.02)
+        self.assertAlmostEqual(predictor.horizon, 0.012)
+
+        # submitted before the sample, not measured
+        predictor.frameSubmitted(0.5)
+        self.assertAlmostEqual(predictor.horizon, 0.012)
+
+        predictor.latency = 1.0
+        self.assertEqual(predictor.horizon, MAX_HORIZON)
+
+        predictor.reset()
+        predictor.latency = 0.0
+        self.assertEqual(predictor.horizon, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from space_view3d_virtual_reality.hmd.recording import (
+        HEADER,
+        MAGIC,
+        RECORD,
+        VERSION,
+        Playback,
+        )
+
+START = 100.0
+INTERVAL = 0.25 # exact in binary, the seeks land on the samples
+COUNT = 64
+
+
+class PlaybackTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, "tracking.vrrec")
+
+        with open(self.filepath, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 2))
+
+            for i in range(COUNT):
+                f.write(RECORD.pack(START + i * INTERVAL, *((1.0, 0.0, 0.0, 0.0) * 2), *((float(i), 0.0, 0.0) * 2)))
+
+        self.playback = Playback(self.filepath)
+
+    def tearDown(self):
+        self.playback.close()
+        self.directory.cleanup()
+
+    def expected(self, time):
+        return max(0, min(COUNT - 1, int(time // INTERVAL)))
+
+    def test_header(self):
+        self.assertEqual(self.playback.count, COUNT)
+        self.assertEqual(self.playback.duration, (COUNT - 1) * INTERVAL)
+
+    def test_seek_forward(self):
+        for step in range(COUNT * 4):
+            time = step * INTERVAL / 4.0
+            self.assertEqual(self.playback.seek(time), self.expected(time), time)
+
+    def test_seek_jumps(self):
+        # far forward, backward, past both ends
+        for time in (0.0, 10.1, 2.0, 2.25, 15.0, 0.3, 1000.0, 5.0, -1.0, 0.5):
+            self.assertEqual(self.playback.seek(time), self.expected(time), time)
+
+    def test_sample(self):
+        timestamp, orientations, positions = self.playback.sample(2.6)
+
+        self.assertEqual(timestamp, START + 10 * INTERVAL)
+        self.assertEqual(positions, [[10.0, 0.0, 0.0], [10.0, 0.0, 0.0]])
+        self.assertEqual(orientations[1], [1.0, 0.0, 0.0, 0.0])
+
+    def test_invalid(self):
+        filepath = os.path.join(self.directory.name, "invalid.vrrec")
+
+        with open(filepath, 'wb') as f:
+            f.write(HEADER.pack(b'XXXX', VERSION, 2))
+
+        self.assertRaises(ValueError, Playback, filepath)
+
+        open(filepath, 'wb').close()
+        self.assertRaises(ValueError, Playback, filepath)
+
+
+if __name__ == '__main__':
+    unittest.main()
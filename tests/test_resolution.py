@@ -0,0 +1,67 @@
+import unittest
+
+from space_view3d_virtual_reality.hmd.resolution import (
+        ResolutionScaler,
+        resolutionTiers,
+        )
+
+BUDGET = 0.01
+
+
+class ResolutionScalerTest(unittest.TestCase):
+    def setUp(self):
+        self.scaler = ResolutionScaler((1.0, 0.85, 0.7), window=3, hysteresis=0.2, cooldown=2)
+
+    def updates(self, frame_time, count):
+        return [self.scaler.update(frame_time, BUDGET) for i in range(count)]
+
+    def test_tiers(self):
+        self.assertEqual(resolutionTiers(0.5, 0.15), (1.0, 0.85, 0.7, 0.55, 0.5))
+        self.assertEqual(resolutionTiers(1.0), (1.0,))
+        self.assertEqual(resolutionTiers(0.0, 0.3)[-1], 0.1)
+
+    def test_under_budget(self):
+        self.assertEqual(self.updates(0.005, 10), [False] * 10)
+        self.assertEqual(self.scaler.scale, 1.0)
+
+    def test_down_after_a_full_window(self):
+        self.assertEqual(self.updates(0.02, 3), [False, False, True])
+        self.assertEqual(self.scaler.tier, 1)
+        self.assertEqual(self.scaler.scale, 0.85)
+
+    def test_cooldown(self):
+        self.updates(0.02, 3)
+
+        # the frames right after a change are not measured, then the window fills again
+        self.assertEqual(self.updates(0.02, 2), [False, False])
+        self.assertEqual(self.scaler.tier, 1)
+        self.assertEqual(self.updates(0.02, 3), [False, False, True])
+        self.assertEqual(self.scaler.tier, 2)
+
+        # no tier below the floor
+        self.updates(0.02, 2)
+        self.assertEqual(self.updates(0.02, 3), [False, False, False])
+        self.assertEqual(self.scaler.tier, 2)
+
+    def test_hysteresis(self):
+        self.updates(0.02, 3 + 2)
+
+        # at 0.85 the native size would cost (1 / 0.85)^2 = 1.38 times more,
+        # 5.8 ms would become 8.0 ms, past 80% of the 10 ms budget
+        self.assertEqual(self.updates(0.0058, 6), [False] * 6)
+        self.assertEqual(self.scaler.tier, 1)
+
+        # the rolling average goes down to 5.5 ms, 7.7 ms at the native size
+        self.assertEqual(self.updates(0.005, 3), [True, False, False])
+        self.assertEqual(self.scaler.tier, 0)
+
+    def test_reset(self):
+        self.updates(0.02, 3)
+        self.scaler.reset()
+
+        self.assertEqual(self.scaler.tier, 0)
+        self.assertEqual(self.updates(0.02, 3), [False, False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from unittest import mock
+
+from space_view3d_virtual_reality import opengl_helper
+
+SOURCE = """
+uniform sampler2D bgl_RenderedTexture;
+void main() { gl_FragColor = texture2D(bgl_RenderedTexture, gl_TexCoord[0].st); }
+"""
+
+
+class ShaderCacheTest(unittest.TestCase):
+    def setUp(self):
+        opengl_helper.invalidate_shader_cache()
+
+        self.link = mock.Mock()
+        self.delete = mock.Mock()
+        self.patches = [
+                mock.patch.object(opengl_helper, "glLinkProgram", self.link),
+                mock.patch.object(opengl_helper, "glDeleteProgram", self.delete),
+                ]
+
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+        opengl_helper.invalidate_shader_cache()
+
+    def test_cached(self):
+        program = opengl_helper.create_shader(SOURCE)
+        self.assertEqual(self.link.call_count, 1)
+
+        # same source, the linked program without compiling or linking again
+        self.assertEqual(opengl_helper.create_shader(SOURCE), program)
+        self.assertEqual(self.link.call_count, 1)
+
+        # the uniform locations were looked up at link time
+        self.assertIn("bgl_RenderedTexture", opengl_helper._uniform_locations[program])
+
+        # other source, other program
+        self.assertNotEqual(opengl_helper.create_shader(SOURCE + "\n"), program)
+        self.assertEqual(self.link.call_count, 2)
+
+    def test_invalidate(self):
+        program = opengl_helper.create_shader(SOURCE)
+
+        opengl_helper.invalidate_shader_cache(delete=True)
+        self.delete.assert_called_once_with(program)
+
+        # linked again
+        opengl_helper.create_shader(SOURCE)
+        self.assertEqual(self.link.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
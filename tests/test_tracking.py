@@ -0,0 +1,135 @@
+import threading
+import unittest
+
+from space_view3d_virtual_reality.hmd.tracking import (
+        HISTORY,
+        PoseSlot,
+        TrackingThread,
+        )
+
+
+def sample(sequence):
+    # the data tells which sample it is, a torn read would not match
+    return float(sequence), (sequence, -sequence)
+
+
+class PoseSlotTest(unittest.TestCase):
+    def setUp(self):
+        self.slot = PoseSlot()
+
+    def write(self, start, count):
+        for sequence in range(start, start + count):
+            self.slot.write(*sample(sequence))
+
+    def sequences(self, samples):
+        return [sequence for sequence, timestamp, data in samples]
+
+    def test_empty(self):
+        self.assertEqual(self.slot.read(), (None, []))
+
+    def test_unread(self):
+        self.write(1, 3)
+
+        latest, unread = self.slot.read()
+        self.assertEqual(latest, (3, 3.0, (3, -3)))
+        self.assertEqual(self.sequences(unread), [1, 2, 3])
+
+        # nothing new, the latest sample is still available
+        latest, unread = self.slot.read()
+        self.assertEqual(latest[0], 3)
+        self.assertEqual(unread, [])
+
+    def test_overrun(self):
+        self.write(1, 3 * HISTORY)
+        latest, unread = self.slot.read()
+
+        # the slot after the latest one may be being written
+        self.assertEqual(self.sequences(unread), list(range(2 * HISTORY + 2, 3 * HISTORY + 1)))
+
+    def test_threads_lockstep(self):
+        rounds = [1, 5, HISTORY - 1, 2]
+        written = threading.Event()
+        read = threading.Event()
+
+        def writer():
+            start = 1
+            for count in rounds:
+                self.write(start, count)
+                start += count
+                written.set()
+                read.wait()
+                read.clear()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+
+        received = []
+        for count in rounds:
+            written.wait()
+            written.clear()
+            received.extend(self.sequences(self.slot.read()[1]))
+            read.set()
+
+        thread.join()
+        self.assertEqual(received, list(range(1, sum(rounds) + 1)))
+
+    def test_threads_concurrent(self):
+        total = 20000
+        thread = threading.Thread(target=self.write, args=(1, total))
+        thread.start()
+
+        received = []
+        while not received or received[-1] < total:
+            latest, unread = self.slot.read()
+
+            for sequence, timestamp, data in unread:
+                self.assertEqual((timestamp, data), sample(sequence))
+
+            if unread:
+                self.assertEqual(unread[-1], latest)
+
+            received.extend(self.sequences(unread))
+
+        thread.join()
+
+        # samples may be lost when the reader falls behind, never repeated or out of order
+        self.assertEqual(received, sorted(set(received)))
+        self.assertEqual(received[-1], total)
+
+
+class TrackingThreadTest(unittest.TestCase):
+    def test_poll(self):
+        polls = []
+
+        def poll():
+            polls.append(len(polls))
+            return polls[-1]
+
+        tracking = TrackingThread(poll, 1000.0)
+        tracking.start()
+
+        latest = None
+        while latest is None or latest[0] < 3:
+            latest, unread = tracking.slot.read()
+
+        tracking.stop()
+
+        self.assertFalse(tracking.is_running)
+        self.assertIsNone(tracking.exception)
+        self.assertEqual(latest[2], latest[0] - 1)
+
+    def test_exception(self):
+        def poll():
+            raise RuntimeError("device lost")
+
+        tracking = TrackingThread(poll, 1000.0)
+        tracking.start()
+        tracking._thread.join()
+
+        self.assertFalse(tracking.is_running)
+        self.assertIsInstance(tracking.exception, RuntimeError)
+        tracking.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+from benchmark.simulator import (
+        FakeObject,
+        Simulator,
+        )
+
+from space_view3d_virtual_reality.visibility import (
+        VisibilityCache,
+        scene_generation,
+        virtual_reality_scene_update_post,
+        )
+
+
+class VisibilityCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.simulator = Simulator(20)
+        self.scene = self.simulator.scene
+        self.context = self.simulator.context
+        self.objects = self.scene.objects
+
+        # some objects are hidden by the user
+        for i, ob in enumerate(self.objects):
+            ob._hide = (i % 3 == 0)
+
+        self.cache = VisibilityCache()
+
+    def flags(self):
+        return [ob._hide for ob in self.objects]
+
+    def sceneUpdate(self):
+        self.scene.is_updated = True
+        virtual_reality_scene_update_post(self.scene)
+        self.scene.is_updated = False
+
+    def test_restore(self):
+        for method in ('BULK', 'OBJECT'):
+            flags = self.flags()
+
+            self.cache.hide(self.context, method)
+            self.assertTrue(all(self.flags()))
+            self.assertFalse(self.context.space_data.show_grease_pencil)
+
+            self.cache.show(self.context)
+            self.assertEqual(self.flags(), flags)
+            self.assertTrue(self.context.space_data.show_grease_pencil)
+
+    def test_cached_flags(self):
+        flags = self.flags()
+        self.cache.hide(self.context)
+        self.cache.show(self.context)
+
+        # a change that did not go through a scene update is not read back
+        self.objects[1]._hide = True
+        self.cache.hide(self.context)
+        self.cache.show(self.context)
+        self.assertEqual(self.flags(), flags)
+
+    def test_scene_update(self):
+        self.cache.hide(self.context)
+        self.cache.show(self.context)
+
+        self.objects[1]._hide = True
+        flags = self.flags()
+
+        generation = scene_generation()
+        self.sceneUpdate()
+        self.assertEqual(scene_generation(), generation + 1)
+
+        # the new flags are read back
+        self.cache.hide(self.context)
+        self.assertTrue(all(self.flags()))
+        self.cache.show(self.context)
+        self.assertEqual(self.flags(), flags)
+
+    def test_no_update(self):
+        generation = scene_generation()
+        virtual_reality_scene_update_post(self.scene)
+        self.assertEqual(scene_generation(), generation)
+
+    def test_object_added(self):
+        self.cache.hide(self.context)
+        self.cache.show(self.context)
+
+        # a different count forces a read, even without a scene update
+        self.objects.append(FakeObject("Added", (0.0, 0.0, 0.0)))
+        flags = self.flags()
+
+        self.cache.hide(self.context)
+        self.cache.show(self.context)
+        self.assertEqual(self.flags(), flags)
+
+
+if __name__ == '__main__':
+    unittest.main()